@@ -0,0 +1,220 @@
+"""HTTP functions sending the requests over pooled keep-alive connections.
+
+The functions of this module behave like the ones of ``nailgun.client``: they
+set the ``content-type`` header to ``application/json`` unless already set,
+encode the ``data`` as JSON for such requests and log the requests and
+responses. But instead of opening a new TCP and TLS connection per request,
+they send the requests with a ``requests.Session`` per server and
+credentials, which keeps the connections to the server open and reuses them.
+
+Sessions are shared by the threads of a process and hold up to
+``api.pool.size`` connections, 10 by default, in the ``main`` section of the
+configuration file. Requests which could not connect, and idempotent requests
+answered with an HTTP 502, 503 or 504 status, are retried up to
+``api.retries`` times, 3 by default, with an exponential backoff.
+
+Sessions reject the cookies of the server, so that every request is
+authenticated with its own credentials as with ``nailgun.client``: a session
+cookie would let the requests with wrong credentials through.
+
+:func:`install` makes ``nailgun.client`` use these functions too, so that the
+requests of the nailgun entity mixins are pooled as well. :func:`stats` counts
+the connections opened and reused.
+
+"""
+import atexit
+import cookielib
+import logging
+import os
+import threading
+
+import requests
+
+from json import dumps
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
+from robottelo.common import conf
+from robottelo.common.limiter import limit_http
+from urlparse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+#: How many connections a session keeps open by default.
+DEFAULT_POOL_SIZE = 10
+#: How many times a request is retried by default.
+DEFAULT_RETRIES = 3
+#: The backoff factor of the retries: they wait 0, 0.5, 1, 2... seconds.
+RETRY_BACKOFF = 0.5
+#: The statuses for which the idempotent requests are retried.
+RETRY_STATUSES = (502, 503, 504)
+#: The ``nailgun.client`` functions replaced by :func:`install`.
+FUNCTIONS = ('delete', 'get', 'head', 'patch', 'post', 'put', 'request')
+
+# Maps (pid, origin, auth, verify) to a requests.Session instance
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _session_key(url, kwargs):
+    """Return the key of the session sending a request to ``url``
+
+    Foreman authenticates a session cookie before the credentials, so
+    sessions are not shared between credentials.
+
+    """
+    parts = urlsplit(url)
+    auth = kwargs.get('auth')
+    if isinstance(auth, list):
+        auth = tuple(auth)
+    return (
+        os.getpid(),
+        u'{0}://{1}'.format(parts.scheme, parts.netloc),
+        auth,
+        kwargs.get('verify', True),
+    )
+
+
+def get_session(url, **kwargs):
+    """Return the session sending the requests to the server of ``url``
+
+    :param str url: The URL of a request.
+    :param kwargs: The ``auth`` and ``verify`` arguments of the request.
+    :rtype: requests.Session
+
+    """
+    key = _session_key(url, kwargs)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            pool_size = int(conf.properties.get(
+                'main.api.pool.size', DEFAULT_POOL_SIZE))
+            retries = int(conf.properties.get(
+                'main.api.retries', DEFAULT_RETRIES))
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=pool_size,
+                max_retries=Retry(
+                    total=retries,
+                    read=0,
+                    backoff_factor=RETRY_BACKOFF,
+                    status_forcelist=RETRY_STATUSES,
+                    raise_on_status=False,
+                ),
+            )
+            session = _sessions[key] = requests.Session()
+            session.cookies.set_policy(
+                cookielib.DefaultCookiePolicy(allowed_domains=[]))
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+    return session
+
+
+def _request(method, url, **kwargs):
+    """Send a request with the session of its server, see
+    ``nailgun.client.request``
+
+    """
+    if 'files' not in kwargs:
+        # requests sets the content-type of file uploads
+        headers = kwargs.pop('headers', {})
+        headers.setdefault('content-type', 'application/json')
+        kwargs['headers'] = headers
+    if (kwargs.get('headers', {}).get('content-type', '').lower() ==
+            'application/json' and kwargs.get('data') is not None):
+        kwargs['data'] = dumps(kwargs['data'])
+    logger.debug(
+        'Making HTTP %s request to %s with %s.',
+        method.upper(),
+        url,
+        'options {0}'.format(kwargs) if len(kwargs) > 0 else 'no options',
+    )
+    response = get_session(url, **kwargs).request(method, url, **kwargs)
+    message = u'Received HTTP {0} response: {1}'.format(
+        response.status_code, response.text)
+    if response.status_code >= 400:
+        logger.warning(message)
+    else:
+        logger.debug(message)
+    return response
+
+
+#: Send a request, see ``requests.request``. The other functions call it.
+request = limit_http('api', _request)
+
+
+def head(url, **kwargs):
+    """Send a HEAD request, see ``requests.head``."""
+    kwargs.setdefault('allow_redirects', False)
+    return request('head', url, **kwargs)
+
+
+def get(url, **kwargs):
+    """Send a GET request, see ``requests.get``."""
+    return request('get', url, **kwargs)
+
+
+def post(url, data=None, json=None, **kwargs):
+    """Send a POST request, see ``requests.post``."""
+    return request('post', url, data=data, json=json, **kwargs)
+
+
+def put(url, data=None, **kwargs):
+    """Send a PUT request, see ``requests.put``."""
+    return request('put', url, data=data, **kwargs)
+
+
+def patch(url, data=None, **kwargs):
+    """Send a PATCH request, see ``requests.patch``."""
+    return request('patch', url, data=data, **kwargs)
+
+
+def delete(url, **kwargs):
+    """Send a DELETE request, see ``requests.delete``."""
+    return request('delete', url, **kwargs)
+
+
+def install(client):
+    """Make the ``client`` module send its requests with this module
+
+    :param client: A module like ``nailgun.client``, whose ``delete``,
+        ``get``, ``head``, ``patch``, ``post``, ``put`` and ``request``
+        functions are replaced.
+
+    """
+    for name in FUNCTIONS:
+        setattr(client, name, globals()[name])
+
+
+def stats():
+    """Return the connection counters of the sessions of the current process
+
+    :return: A dictionary with the ``requests`` sent, the connections
+        ``opened`` and the requests which ``reused`` an open connection.
+
+    """
+    with _sessions_lock:
+        sessions = [
+            session for key, session in _sessions.items()
+            if key[0] == os.getpid()
+        ]
+    sent = opened = 0
+    for session in sessions:
+        for adapter in set(session.adapters.values()):
+            for key in adapter.poolmanager.pools.keys():
+                pool = adapter.poolmanager.pools.get(key)
+                if pool is not None:
+                    sent += pool.num_requests
+                    opened += pool.num_connections
+    return {'requests': sent, 'opened': opened, 'reused': sent - opened}
+
+
+def close_sessions():
+    """Close the sessions of the current process and their connections"""
+    with _sessions_lock:
+        keys = [key for key in _sessions if key[0] == os.getpid()]
+        sessions = [_sessions.pop(key) for key in keys]
+    for session in sessions:
+        session.close()
+
+
+atexit.register(close_sessions)
@@ -2,8 +2,7 @@
 information from the Foreman server.
 
 """
-import requests
-
+from robottelo.api import client
 from robottelo.common.helpers import get_server_url
 from urlparse import urljoin
 
@@ -15,7 +14,7 @@ def get_api_doc():
     :rtype: dict
 
     """
-    response = requests.get(
+    response = client.get(
         urljoin(get_server_url(), '/apidoc/v2.json'), verify=False)
     return response.json()['docs']
 
@@ -0,0 +1,119 @@
+"""Iterate over large API collections one page at a time.
+
+Requesting a whole collection at once, with a huge ``per_page``, makes the
+server render a huge JSON document, which is then decoded and held in memory
+at once. :func:`iter_results` requests the pages one after the other, when
+the caller gets to them, and stops requesting them when the caller stops
+iterating::
+
+    for erratum in iter_results(path, auth=auth, verify=False):
+        if erratum['id'] == erratum_id:
+            break
+
+With ``prefetch=True`` the next page is requested in the background while
+the caller processes the current one.
+
+"""
+import threading
+
+from robottelo.api import client
+
+#: The number of results per page requested by default.
+DEFAULT_PER_PAGE = 100
+
+
+class _Prefetch(object):
+    """Call a function in the background and get its result later
+
+    :param function: The function to call.
+    :param args: The arguments to call ``function`` with.
+
+    """
+
+    def __init__(self, function, *args):
+        self._function = function
+        self._args = args
+        self._value = self._error = None
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        """Call the function and keep its outcome"""
+        try:
+            self._value = self._function(*self._args)
+        except Exception as err:  # pylint:disable=broad-except
+            self._error = err
+
+    def result(self):
+        """Wait for the function and return its result, or raise its
+        exception
+
+        """
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+
+def iter_pages(path, data=None, per_page=DEFAULT_PER_PAGE, prefetch=False,
+               raise_for_status=True, **kwargs):
+    """Yield the pages of the collection at ``path``, requested on demand
+
+    :param str path: The URL of the collection.
+    :param dict data: The search parameters.
+    :param int per_page: The number of results per page. ``None`` lets the
+        server choose.
+    :param bool prefetch: Request the next page while the current one is
+        processed.
+    :param bool raise_for_status: Raise an exception for the HTTP 4XX and
+        5XX responses. Otherwise their body is yielded as the last page.
+    :param kwargs: The other arguments of the requests, like ``auth`` and
+        ``verify``.
+    :return: A generator of the decoded pages. Each page is a dictionary with
+        the ``results`` of the page and the counters of the collection.
+    :raises: ``requests.exceptions.HTTPError`` If the server responds with an
+        HTTP 4XX or 5XX status code and ``raise_for_status`` is true.
+
+    """
+    def fetch(page):
+        """Request the page ``page``"""
+        params = dict(data or {})
+        params[u'page'] = page
+        if per_page is not None:
+            params[u'per_page'] = per_page
+        response = client.get(path, data=params, **kwargs)
+        if raise_for_status:
+            response.raise_for_status()
+        return response.json()
+
+    page = 1
+    pending = _Prefetch(fetch, page) if prefetch else None
+    while True:
+        body = pending.result() if prefetch else fetch(page)
+        results = body.get('results') or []
+        size = per_page or body.get('per_page') or len(results)
+        count = body.get('subtotal', body.get('total'))
+        last = (
+            len(results) == 0 or
+            len(results) < size or
+            count is not None and page * size >= int(count)
+        )
+        if prefetch and not last:
+            pending = _Prefetch(fetch, page + 1)
+        yield body
+        if last:
+            return
+        page += 1
+
+
+def iter_results(path, data=None, per_page=DEFAULT_PER_PAGE, prefetch=False,
+                 **kwargs):
+    """Yield the results of the collection at ``path``, requested on demand
+
+    See :func:`iter_pages` for the arguments.
+
+    """
+    for body in iter_pages(path, data, per_page, prefetch, True, **kwargs):
+        for result in body.get('results') or []:
+            yield result
@@ -0,0 +1,257 @@
+"""Create many entities at once, following their dependency graph.
+
+``create_missing`` creates the required parents of an entity one after the
+other, and each entity gets parents of its own. A :class:`CreationPlan`
+creates a set of entities and their required parents instead, parents
+first, independent entities at the same time. The entities needing a parent
+of the same kind share it::
+
+    plan = CreationPlan()
+    plan.add('product', 'Product')
+    plan.add('lifecycle_environment', 'LifecycleEnvironment')
+    plan.add('content_view', 'ContentView')
+    plan.add('repository', 'Repository', product='product')
+    created = plan.execute()
+
+A single organization is created for the product, the lifecycle environment
+and the content view. Then those three are created at the same time, and the
+repository last. ``created`` maps the labels given to :meth:`CreationPlan.add`
+to the entities created. The shared parents are labeled with the name of
+their class, ``Organization`` here. They are created with
+``create(fast=True)``, so they are only read back from the server when a
+field missing from the response is accessed, see
+:meth:`robottelo.entities.EntityCreateMixin.create`.
+
+``planner.workers`` in the ``main`` section of the configuration file sets
+how many entities are created at the same time, 4 by default.
+
+"""
+import collections
+import logging
+
+from nailgun import entity_fields
+from robottelo import entities
+from robottelo.common import conf, graph
+
+logger = logging.getLogger(__name__)
+
+#: The entities whose ``create_missing`` creates their parents itself, and
+#: refuses any value given beforehand. The plan leaves their parents alone.
+SELF_CONTAINED = ('Host',)
+
+
+class PlanError(Exception):
+    """Indicates that some entities of a plan could not be created.
+
+    ``outcome`` is the :data:`robottelo.common.graph.GraphOutcome` of the
+    plan: the entities created, the errors and the entities skipped.
+
+    """
+
+    def __init__(self, message, outcome):
+        super(PlanError, self).__init__(message)
+        self.outcome = outcome
+
+
+class CreationPlan(object):
+    """The entities to create, and the parents they share
+
+    :param nailgun.config.ServerConfig server_config: The server the entities
+        are created on, the default one if not given.
+
+    """
+
+    def __init__(self, server_config=None):
+        self.server_config = server_config
+        # Maps each label to a (entity name, field values) tuple
+        self._entities = collections.OrderedDict()
+
+    def add(self, label, entity, **fields):
+        """Plan the creation of an entity
+
+        The values of the fields referencing other entities may be labels of
+        the plan: a string for a ``OneToOneField``, a list of strings for a
+        ``OneToManyField``. The entity is then created after them. The
+        required fields referencing other entities which are not given are
+        shared parents, created once per class.
+
+        :param str label: The name of the entity in the plan.
+        :param entity: The name of a class of :mod:`robottelo.entities`, or
+            the class itself.
+        :param fields: The values of the fields of the entity.
+        :return: Nothing.
+        :raises ValueError: If ``label`` is already in the plan.
+
+        """
+        if not isinstance(entity, basestring):
+            entity = entity.__name__
+        if label in self._entities:
+            raise ValueError('{0} is already in the plan'.format(label))
+        getattr(entities, entity)  # Fail early on unknown entities
+        self._entities[label] = (entity, fields)
+
+    def _references(self):
+        """Resolve the references between the entities of the plan
+
+        Add the shared parents to the plan on the way.
+
+        :return: A dictionary mapping each label to a dictionary mapping the
+            field names to the label, or list of labels, they reference.
+
+        """
+        # The first entity of a class is the parent shared by the others
+        shared = {}
+        for label, (entity, _) in self._entities.items():
+            shared.setdefault(entity, label)
+        references = collections.OrderedDict()
+        labels = list(self._entities)
+        while labels:
+            label = labels.pop(0)
+            entity, fields = self._entities[label]
+            references[label] = {}
+            for field_name, field in getattr(
+                    entities, entity).get_fields().items():
+                if isinstance(field, entity_fields.OneToOneField):
+                    many = False
+                elif isinstance(field, entity_fields.OneToManyField):
+                    many = True
+                else:
+                    continue
+                if field_name in fields:
+                    value = fields[field_name]
+                    if many and all(
+                            isinstance(item, basestring) for item in value):
+                        references[label][field_name] = list(value)
+                    elif not many and isinstance(value, basestring):
+                        references[label][field_name] = value
+                    continue
+                if not field.required or entity in SELF_CONTAINED:
+                    continue
+                parent = shared.get(field.entity)
+                if parent is None:
+                    parent = field.entity
+                    if parent in self._entities:
+                        raise ValueError(
+                            'The label {0} is used by another class of '
+                            'entity'.format(parent))
+                    shared[field.entity] = parent
+                    self._entities[parent] = (field.entity, {})
+                    labels.append(parent)
+                references[label][field_name] = [parent] if many else parent
+        return references
+
+    def dependencies(self):
+        """Return the dependency graph of the plan
+
+        :return: A dictionary mapping each label, the shared parents
+            included, to a set of the labels it depends on.
+        :raises robottelo.common.graph.GraphError: If a label references an
+            unknown label, or if the references have a cycle.
+
+        """
+        return _dependencies(self._references())
+
+    def levels(self):
+        """Return the labels of the plan grouped by level
+
+        The entities of a level only depend on the entities of the previous
+        levels, so they can be created at the same time.
+
+        :return: A list of lists of labels.
+
+        """
+        dependencies = self.dependencies()
+        depths = {}
+        levels = []
+        for label in graph.topological_order(dependencies):
+            depth = depths[label] = max(
+                [depths[dependency] + 1
+                 for dependency in dependencies[label]] or [0])
+            if depth == len(levels):
+                levels.append([])
+            levels[depth].append(label)
+        return levels
+
+    def execute(self, max_workers=None):
+        """Create the entities of the plan
+
+        :param int max_workers: How many entities to create at the same time,
+            ``planner.workers`` by default.
+        :return: A dictionary mapping each label, the shared parents
+            included, to the entity created.
+        :raises PlanError: If some entities could not be created. The other
+            ones are created nonetheless.
+
+        """
+        references = self._references()
+        dependencies = _dependencies(references)
+        if max_workers is None:
+            max_workers = int(conf.properties.get(
+                'main.planner.workers', graph.DEFAULT_MAX_WORKERS))
+        created = {}
+
+        def create(label):
+            """Create the entity ``label`` with the entities it references"""
+            entity, fields = self._entities[label]
+            values = dict(fields)
+            for field_name, value in references[label].items():
+                if isinstance(value, list):
+                    values[field_name] = [created[item] for item in value]
+                else:
+                    values[field_name] = created[value]
+            created[label] = getattr(entities, entity)(
+                self.server_config, **values).create(fast=True)
+            return created[label]
+
+        outcome = graph.run(dependencies, create, max_workers)
+        logger.debug('Created {0} of {1} planned entities'.format(
+            len(outcome.results), len(dependencies)))
+        if outcome.errors or outcome.skipped:
+            raise PlanError(
+                'Could not create {0}, skipped {1}'.format(
+                    ', '.join(sorted(outcome.errors)),
+                    ', '.join(outcome.skipped) or 'nothing',
+                ),
+                outcome,
+            )
+        return dict(outcome.results)
+
+
+def _dependencies(references):
+    """Return the dependency graph of the references of a plan
+
+    :param dict references: See :meth:`CreationPlan._references`.
+    :raises robottelo.common.graph.GraphError: See
+        :meth:`CreationPlan.dependencies`.
+
+    """
+    dependencies = collections.OrderedDict()
+    for label, fields in references.items():
+        dependencies[label] = set()
+        for value in fields.values():
+            if isinstance(value, list):
+                dependencies[label].update(value)
+            else:
+                dependencies[label].add(value)
+    graph.topological_order(dependencies)
+    return dependencies
+
+
+def create_entities(entity_names, server_config=None, max_workers=None):
+    """Create an entity of each class and the parents they share
+
+    :param entity_names: The names of the classes of
+        :mod:`robottelo.entities` to create an entity of.
+    :param nailgun.config.ServerConfig server_config: The server the entities
+        are created on, the default one if not given.
+    :param int max_workers: See :meth:`CreationPlan.execute`.
+    :return: A dictionary mapping each name of ``entity_names`` to the entity
+        created.
+    :raises PlanError: If some entities could not be created.
+
+    """
+    plan = CreationPlan(server_config)
+    for name in entity_names:
+        plan.add(name, name)
+    created = plan.execute(max_workers)
+    return dict((name, created[name]) for name in entity_names)
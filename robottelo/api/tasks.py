@@ -0,0 +1,278 @@
+"""Poll many foreman tasks at once.
+
+Polling each task on its own costs one request per task every few seconds.
+A :class:`TaskPoller` checks all the outstanding tasks of a server with one
+``bulk_search`` request per tick instead, and resolves a :class:`TaskFuture`
+per task::
+
+    from robottelo.api import tasks
+
+    task_ids = [
+        entities.Repository(id=repo_id).sync(synchronous=False)['id']
+        for repo_id in repo_ids
+    ]
+    for task_info in tasks.poll_tasks(task_ids):
+        ...
+
+:meth:`robottelo.entities.ForemanTask.poll` uses the shared pollers too, so
+the tasks waited for by many threads are polled together.
+
+"""
+import logging
+import os
+import threading
+import time
+
+from nailgun import config
+from nailgun.entity_mixins import (
+    TASK_POLL_RATE,
+    TASK_TIMEOUT,
+    TaskFailedError,
+    TaskTimedOutError,
+)
+from requests.exceptions import HTTPError
+from robottelo import entities
+from robottelo.api import client
+
+logger = logging.getLogger(__name__)
+
+#: The states of the tasks which are not finished yet.
+PENDING_STATES = ('planning', 'planned', 'running')
+
+# Maps (pid, url, auth, verify, poll_rate) to a TaskPoller instance
+_pollers = {}
+_pollers_lock = threading.Lock()
+
+
+class TaskFuture(object):
+    """The outcome of a task, available once the task finishes
+
+    :param str task_id: The task id.
+    :param float deadline: When the task times out, as a ``time.time()``
+        value.
+
+    """
+
+    def __init__(self, task_id, deadline):
+        self.task_id = task_id
+        self.deadline = deadline
+        self._event = threading.Event()
+        self._task_info = None
+        self._error = None
+
+    def done(self):
+        """Tell whether the task finished or timed out"""
+        return self._event.is_set()
+
+    def set_result(self, task_info):
+        """Resolve the future with the task information"""
+        if task_info['result'] != 'success':
+            self.set_error(TaskFailedError(
+                'Task {0} completed with result {1}. Error message(s): '
+                '{2}'.format(
+                    self.task_id,
+                    task_info['result'],
+                    task_info.get('humanized', {}).get('errors'),
+                )
+            ))
+            return
+        self._task_info = task_info
+        self._event.set()
+
+    def set_error(self, error):
+        """Resolve the future with an exception"""
+        self._error = error
+        self._event.set()
+
+    def result(self, timeout=None):
+        """Wait for the task and return its information
+
+        :param float timeout: Seconds to wait, until the task deadline by
+            default.
+        :rtype: dict
+        :raises: ``nailgun.entity_mixins.TaskTimedOutError`` if the task does
+            not finish in time.
+        :raises: ``nailgun.entity_mixins.TaskFailedError`` if the task
+            finishes with any result other than "success".
+
+        """
+        if timeout is None:
+            timeout = max(0, self.deadline - time.time())
+        # Event.wait without a timeout cannot be interrupted in Python 2
+        if not self._event.wait(timeout + 1):
+            raise TaskTimedOutError(
+                'Timed out polling task {0}'.format(self.task_id))
+        if self._error is not None:
+            raise self._error
+        return self._task_info
+
+
+class TaskPoller(object):
+    """Poll the tasks of a server with one request per tick
+
+    A background thread runs while tasks are outstanding.
+
+    :param nailgun.config.ServerConfig server_config: The server.
+    :param int poll_rate: Seconds between two ticks.
+
+    """
+
+    def __init__(self, server_config, poll_rate=TASK_POLL_RATE):
+        self.server_config = server_config
+        self.poll_rate = poll_rate
+        #: How many ``bulk_search`` requests were sent.
+        self.requests = 0
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, task_id, timeout=TASK_TIMEOUT):
+        """Poll ``task_id`` until it finishes or ``timeout`` seconds elapse
+
+        Submitting a task already polled returns its future.
+
+        :rtype: TaskFuture
+
+        """
+        with self._lock:
+            future = self._futures.get(task_id)
+            if future is None:
+                future = self._futures[task_id] = TaskFuture(
+                    task_id, time.time() + timeout)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run)
+                self._thread.daemon = True
+                self._thread.start()
+        return future
+
+    def outstanding(self):
+        """Return how many tasks are being polled"""
+        with self._lock:
+            return len(self._futures)
+
+    def _run(self):
+        """Poll until no task is outstanding"""
+        while True:
+            with self._lock:
+                if not self._futures:
+                    self._thread = None
+                    return
+                futures = dict(self._futures)
+            try:
+                self._tick(futures)
+            except HTTPError as err:
+                if err.response is None or err.response.status_code >= 500:
+                    logger.warning('Failed to poll tasks: {0}'.format(err))
+                else:
+                    # The request itself is wrong, it will never succeed
+                    for future in futures.values():
+                        future.set_error(err)
+            except Exception as err:  # pylint:disable=broad-except
+                # Try again on the next tick, until the tasks time out
+                logger.warning('Failed to poll tasks: {0}'.format(err))
+            now = time.time()
+            for future in futures.values():
+                if not future.done() and now > future.deadline:
+                    future.set_error(TaskTimedOutError(
+                        'Timed out polling task {0}'.format(future.task_id)))
+            with self._lock:
+                for task_id, future in futures.items():
+                    if future.done():
+                        del self._futures[task_id]
+                if not self._futures:
+                    continue
+            time.sleep(self.poll_rate)
+
+    def _tick(self, futures):
+        """Check the tasks of ``futures`` with a single request"""
+        response = client.post(
+            entities.ForemanTask(self.server_config).path('bulk_search'),
+            {u'searches': [
+                {
+                    u'type': u'task',
+                    u'task_id': task_id,
+                    u'search_id': task_id,
+                }
+                for task_id in futures
+            ]},
+            auth=self.server_config.auth,
+            verify=self.server_config.verify,
+        )
+        self.requests += 1
+        response.raise_for_status()
+        for search in response.json():
+            future = futures.get(search['search_params']['search_id'])
+            if future is None:
+                continue
+            if not search['results']:
+                future.set_error(TaskFailedError(
+                    'Task {0} not found'.format(future.task_id)))
+                continue
+            task_info = search['results'][0]
+            if task_info['state'] not in PENDING_STATES:
+                future.set_result(task_info)
+
+
+def get_poller(server_config=None, poll_rate=None):
+    """Return the poller of ``server_config`` for the current process
+
+    :param nailgun.config.ServerConfig server_config: The server, the
+        default one if not given.
+    :param int poll_rate: Seconds between two ticks, defaults to
+        ``nailgun.entity_mixins.TASK_POLL_RATE``.
+    :rtype: TaskPoller
+
+    """
+    if server_config is None:
+        server_config = config.ServerConfig.get()
+    if poll_rate is None:
+        poll_rate = TASK_POLL_RATE
+    auth = server_config.auth
+    if isinstance(auth, list):
+        auth = tuple(auth)
+    key = (
+        os.getpid(),
+        server_config.url,
+        auth,
+        server_config.verify,
+        poll_rate,
+    )
+    with _pollers_lock:
+        poller = _pollers.get(key)
+        if poller is None:
+            poller = _pollers[key] = TaskPoller(server_config, poll_rate)
+    return poller
+
+
+def poll_tasks(task_ids, server_config=None, timeout=None):
+    """Wait for many tasks, polled together
+
+    :param list task_ids: The ids of the tasks.
+    :param nailgun.config.ServerConfig server_config: The server, the
+        default one if not given.
+    :param int timeout: Seconds to wait for each task, defaults to
+        ``nailgun.entity_mixins.TASK_TIMEOUT``.
+    :return: The information about each task, in the order of ``task_ids``.
+    :rtype: list
+    :raises: ``nailgun.entity_mixins.TaskTimedOutError`` or
+        ``nailgun.entity_mixins.TaskFailedError`` for the first task, in the
+        order of ``task_ids``, which timed out or failed. The other tasks are
+        still waited for.
+
+    """
+    if timeout is None:
+        timeout = TASK_TIMEOUT
+    poller = get_poller(server_config)
+    futures = [poller.submit(task_id, timeout) for task_id in task_ids]
+    error = None
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except (TaskFailedError, TaskTimedOutError) as err:
+            results.append(None)
+            if error is None:
+                error = err
+    if error is not None:
+        raise error
+    return results
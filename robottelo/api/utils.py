@@ -1,5 +1,5 @@
 """Module containing convenience functions for working with the API."""
-from nailgun import client
+from robottelo.api.pagination import DEFAULT_PER_PAGE, iter_pages
 from robottelo.common import helpers
 from robottelo import entities
 from urlparse import urljoin
@@ -13,6 +13,39 @@ class RepositoryErrataException(Exception):
     """Indicates that a repository's errata could not be fetched."""
 
 
+def iter_errata(repository_id, per_page=DEFAULT_PER_PAGE, prefetch=False):
+    """Iterate over the erratums of repository ``repository_id``, requesting
+    them one page at a time.
+
+    :param int repository_id: A repository ID.
+    :param int per_page: The number of erratums per page.
+    :param bool prefetch: Request the next page in the background, see
+        :func:`robottelo.api.pagination.iter_pages`.
+    :return: A generator of that repository's errata.
+    :raises robottelo.api.utils.RepositoryErrataException: If an error occurs
+        while fetching the requested repository's errata.
+
+    """
+    path = urljoin(
+        helpers.get_server_url(),
+        'katello/api/v2/repositories/{0}/errata'.format(repository_id)
+    )
+    for page in iter_pages(
+            path,
+            per_page=per_page,
+            prefetch=prefetch,
+            raise_for_status=False,
+            auth=helpers.get_server_credentials(),
+            verify=False):
+        if 'errors' in page.keys():
+            raise RepositoryErrataException(
+                'Error received after issuing GET to {0}. Error received: {1}'
+                ''.format(path, page['errors'])
+            )
+        for erratum in page['results']:
+            yield erratum
+
+
 def get_errata(repository_id):
     """Return all erratums belonging to repository ``repository_id``.
 
@@ -21,22 +54,41 @@ def get_errata(repository_id):
     :raises robottelo.api.utils.RepositoryErrataException: If an error occurs
         while fetching the requested repository's errata.
 
+    """
+    return list(iter_errata(repository_id))
+
+
+def iter_packages(repository_id, per_page=DEFAULT_PER_PAGE, prefetch=False):
+    """Iterate over the packages of repository ``repository_id``, requesting
+    them one page at a time.
+
+    :param int repository_id: A repository ID.
+    :param int per_page: The number of packages per page.
+    :param bool prefetch: Request the next page in the background, see
+        :func:`robottelo.api.pagination.iter_pages`.
+    :return: A generator of that repository's packages.
+    :raises robottelo.api.utils.RepositoryPackagesException: If an error occurs
+        while fetching the requested repository's packages.
+
     """
     path = urljoin(
         helpers.get_server_url(),
-        'katello/api/v2/repositories/{0}/errata'.format(repository_id)
+        'katello/api/v2/repositories/{0}/packages'.format(repository_id)
     )
-    response = client.get(
-        path,
-        auth=helpers.get_server_credentials(),
-        verify=False,
-    ).json()
-    if 'errors' in response.keys():
-        raise RepositoryErrataException(
-            'Error received after issuing GET to {0}. Error received: {1}'
-            ''.format(path, response['errors'])
-        )
-    return response['results']
+    for page in iter_pages(
+            path,
+            per_page=per_page,
+            prefetch=prefetch,
+            raise_for_status=False,
+            auth=helpers.get_server_credentials(),
+            verify=False):
+        if 'errors' in page.keys():
+            raise RepositoryPackagesException(
+                'Error received after issuing GET to {0}. Error received: {1}'
+                ''.format(path, page['errors'])
+            )
+        for package in page['results']:
+            yield package
 
 
 def get_packages(repository_id):
@@ -48,21 +100,7 @@ def get_packages(repository_id):
         while fetching the requested repository's packages.
 
     """
-    path = urljoin(
-        helpers.get_server_url(),
-        'katello/api/v2/repositories/{0}/packages'.format(repository_id)
-    )
-    response = client.get(
-        path,
-        auth=helpers.get_server_credentials(),
-        verify=False,
-    ).json()
-    if 'errors' in response.keys():
-        raise RepositoryPackagesException(
-            'Error received after issuing GET to {0}. Error received: {1}'
-            ''.format(path, response['errors'])
-        )
-    return response['results']
+    return list(iter_packages(repository_id))
 
 
 def status_code_error(path, desired, response):
@@ -3,12 +3,327 @@
 Generic base class for cli hammer commands
 """
 
+import collections
+import copy
 import logging
-
-from robottelo.common import conf, ssh
+import os
+import threading
+import time
+
+from contextlib import contextmanager
+from robottelo.cli.session import (
+    HammerSession, HammerSessionError, get_session, sessions_enabled)
+from robottelo.cli.shell import HammerShellError, get_shell, shell_enabled
+from robottelo.common import conf, shard, ssh
 from robottelo.common.helpers import info_dictionary
 
 
+def json_enabled():
+    """Tell whether ``main.hammer.json`` enables the JSON output mode.
+
+    In this mode the commands returning records request them as JSON instead
+    of CSV or human readable text. Values are typed (numbers, booleans, lists
+    and dictionaries) and keys are the same as in the other modes.
+
+    """
+    return conf.properties.get('main.hammer.json', '0') == '1'
+
+
+def cache_enabled():
+    """Tell whether ``main.hammer.cache`` enables the command cache.
+
+    See :class:`CommandCache`.
+
+    """
+    return conf.properties.get('main.hammer.cache', '0') == '1'
+
+
+#: The sub commands which do not change anything on the server and whose
+#: outputs can be cached.
+READ_ONLY_SUBCOMMANDS = frozenset((
+    'available-repositories',
+    'content-hosts',
+    'dump',
+    'facts',
+    'filter info',
+    'info',
+    'kinds',
+    'list',
+    'puppet-classes',
+    'puppet-module info',
+    'reports',
+    'sc-params',
+    'tasks',
+    'version info',
+    'version list',
+))
+#: Seconds a cached output is served, unless ``hammer.cache.ttl`` is set.
+CACHE_TTL = 60
+#: Maximum number of cached outputs, the least recently used go first.
+CACHE_MAX_SIZE = 1000
+
+
+class CommandCache(object):
+    """A read-through cache of the outputs of read only hammer commands.
+
+    The successful outputs of the :data:`READ_ONLY_SUBCOMMANDS` are kept per
+    user, command base, sub command, options and output format. Any other
+    command run against a command base, ``create``, ``update``, ``delete``,
+    ``add-*`` or ``remove-*`` for example, drops the outputs cached for it.
+    Commands given as plain strings drop all the cached outputs, since what
+    they change can not be told.
+
+    Cached outputs are copied on the way in and out, so callers can change
+    the results they get. Outputs inherited from a parent process are
+    dropped.
+
+    The cache is opt-in, enable it by setting ``hammer.cache=1`` in the
+    ``main`` section of the configuration file. Outputs are served for
+    :data:`CACHE_TTL` seconds, or ``hammer.cache.ttl`` if set.
+
+    """
+
+    def __init__(self, max_size=CACHE_MAX_SIZE):
+        self.max_size = max_size
+        #: Number of outputs served from the cache.
+        self.hits = 0
+        #: Number of cacheable commands which ran on the server.
+        self.misses = 0
+        #: Number of outputs dropped by a mutating command.
+        self.invalidations = 0
+        self._entries = collections.OrderedDict()
+        # Counters bumped on each invalidation, globally and per command
+        # base, so outputs read while a mutating command ran are not cached
+        self._epoch = 0
+        self._generations = collections.defaultdict(int)
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    @staticmethod
+    def key(command, user, output_format=None):
+        """Return the cache key of ``command``.
+
+        :return: A hashable key or ``None`` if ``command`` is not a read only
+            :class:`HammerCommand`.
+
+        """
+        if (not isinstance(command, HammerCommand) or
+                command.command_sub not in READ_ONLY_SUBCOMMANDS):
+            return None
+        options = tuple(sorted(
+            (name, value if value is True else unicode(value))
+            for name, value in command.options
+            if value is not None and value is not False
+        ))
+        return (
+            user,
+            command.command_base,
+            command.command_sub,
+            options,
+            output_format,
+        )
+
+    def _check_pid(self):
+        """Forget the outputs inherited from a parent process.
+
+        Must be called with the lock held.
+
+        """
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._entries.clear()
+            self._generations.clear()
+
+    def get(self, key):
+        """Return the cached result for ``key``.
+
+        :return: A tuple ``(result, generation)``. ``result`` is ``None`` on
+            a miss, pass ``generation`` to :meth:`put` along with the result
+            read from the server.
+
+        """
+        ttl = float(conf.properties.get('main.hammer.cache.ttl', CACHE_TTL))
+        with self._lock:
+            self._check_pid()
+            generation = (self._epoch, self._generations[key[1]])
+            entry = self._entries.pop(key, None)
+            if entry is not None and time.time() - entry[0] < ttl:
+                # Move it to the end, as the most recently used
+                self._entries[key] = entry
+                self.hits += 1
+                return copy.deepcopy(entry[1]), generation
+            self.misses += 1
+        return None, generation
+
+    def put(self, key, result, generation):
+        """Cache ``result`` under ``key`` if it is a successful one.
+
+        Nothing is cached if the command base was invalidated since
+        ``generation`` was returned by :meth:`get`.
+
+        """
+        if result.return_code != 0:
+            return
+        result = copy.deepcopy(result)
+        with self._lock:
+            self._check_pid()
+            if (self._epoch, self._generations[key[1]]) != generation:
+                return
+            self._entries[key] = (time.time(), result)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, command_base=None):
+        """Drop the outputs cached for ``command_base``, or all of them."""
+        with self._lock:
+            self._check_pid()
+            if command_base is None:
+                keys = list(self._entries)
+                self._epoch += 1
+            else:
+                keys = [key for key in self._entries if key[1] == command_base]
+                self._generations[command_base] += 1
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+
+    def clear(self):
+        """Drop all the cached outputs and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+            self.hits = self.misses = self.invalidations = 0
+
+    def stats(self):
+        """Return the counters and the number of cached outputs.
+
+        :rtype: dict
+
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'size': len(self._entries),
+            }
+
+
+class HammerCommand(unicode):
+    """An immutable hammer cli command, without the ``hammer`` executable
+
+    It is the command line itself, ``u'organization info --id="1"'`` for
+    example, and it keeps the parts it was built from: ``command_base``,
+    ``command_sub`` and ``options``, a tuple of ``(name, value)`` pairs.
+    Commands are built for each call, so the cli classes can be used from
+    many threads at the same time.
+
+    """
+    def __new__(cls, command_base, command_sub, options=None):
+        if options is None:
+            options = {}
+
+        tail = u''
+        for key, val in options.items():
+            if val is not None:
+                if val is True:
+                    tail += u' --{0}'.format(key)
+                elif val is not False:
+                    tail += u' --{0}="{1}"'.format(key, val)
+        self = super(HammerCommand, cls).__new__(cls, u'{0} {1} {2}'.format(
+            command_base,
+            command_sub,
+            tail.strip()
+        ))
+        self.__dict__.update(
+            command_base=command_base,
+            command_sub=command_sub,
+            options=tuple(options.items()),
+        )
+        return self
+
+    def __setattr__(self, name, value):
+        raise AttributeError('HammerCommand objects are immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('HammerCommand objects are immutable')
+
+
+class HammerPipeline(object):
+    """Hammer cli commands shipped to the server in a single round trip.
+
+    Use :meth:`Base.pipeline` to get one. Commands are queued by
+    :meth:`execute` and run as one remote script when the ``with`` block
+    exits, see :func:`robottelo.common.ssh.command_pipeline`. Their results
+    are then available, in order, from :attr:`results`::
+
+        with Base.pipeline(parallel=True) as pipe:
+            pipe.execute(HammerCommand('organization', 'list'), 'csv')
+            pipe.execute(HammerCommand('product', 'list', {
+                u'organization-id': org_id}), 'csv')
+        orgs, products = pipe.results
+
+    """
+
+    def __init__(self, cli_class, user, password, parallel=False,
+                 timeout=None):
+        self.cli_class = cli_class
+        self.user = user
+        self.password = password
+        self.parallel = parallel
+        self.timeout = timeout
+        self.commands = []
+        self.output_formats = []
+        #: The :class:`robottelo.common.ssh.SSHCommandResult` of each
+        #: command, ``None`` until the pipeline runs.
+        self.results = None
+
+    def execute(self, command, output_format=None):
+        """Queue the cli ``command``
+
+        :param command: A :class:`HammerCommand` or a command line, without
+            the ``hammer`` executable.
+        :param str output_format: The hammer output format.
+        :return: The position of the command result in :attr:`results`.
+        :rtype: int
+
+        """
+        if self.results is not None:
+            raise RuntimeError('The pipeline already ran')
+        self.commands.append(command)
+        self.output_formats.append(output_format)
+        return len(self.commands) - 1
+
+    def run(self):
+        """Run the queued commands and return their results
+
+        :rtype: list
+
+        """
+        if self.results is None:
+            self.results = ssh.command_pipeline(
+                [
+                    self.cli_class._hammer_command(
+                        command, self.user, self.password, output_format)
+                    for command, output_format
+                    in zip(self.commands, self.output_formats)
+                ],
+                output_formats=self.output_formats,
+                timeout=self.timeout,
+                parallel=self.parallel,
+            )
+            self.cli_class._invalidate_cache(self.commands)
+        return self.results
+
+
+#: The command cache shared by all the cli classes.
+command_cache = CommandCache()
+
+# Maps (cli class, username, password) to the class built by Base.with_user
+_user_classes = {}
+_user_classes_lock = threading.Lock()
+
+
 class Base(object):
     """
     @param command_base: base command of hammer.
@@ -66,7 +381,6 @@ class Base(object):
     @since: 27.Nov.2013
     """
     command_base = None  # each inherited instance should define this
-    command_sub = None  # specific to instance, like: create, update, etc
     command_requires_org = False  # True when command requires organization-id
 
     logger = logging.getLogger('robottelo')
@@ -77,9 +391,8 @@ class Base(object):
         Adds OS to record.
         """
 
-        cls.command_sub = 'add-operatingsystem'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command(options, 'add-operatingsystem'))
 
         return result
 
@@ -89,22 +402,27 @@ class Base(object):
         Creates a new record using the arguments passed via dictionary.
         """
 
-        cls.command_sub = 'create'
-
         if options is None:
             options = {}
 
         result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'create'),
+            output_format=cls._output_format()
+        )
+
+        # CSV output is a list of records, JSON output a single record
+        record = result.stdout
+        if not isinstance(record, dict):
+            record = record[0] if len(record) > 0 else {}
 
         # Extract new object ID if it was successfully created
-        if len(result.stdout) > 0 and 'id' in result.stdout[0]:
-            obj_id = result.stdout[0]['id']
+        if 'id' in record:
+            obj_id = record['id']
 
             # Fetch new object
             # Some Katello obj require the organization-id for subcommands
             info_options = {u'id': obj_id}
-            if cls.command_requires_org:
+            if cls._org_required('info'):
                 if 'organization-id' not in options:
                     raise Exception(
                         'organization-id option is required for {0}.create'
@@ -125,9 +443,7 @@ class Base(object):
         Deletes existing record.
         """
 
-        cls.command_sub = 'delete'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, 'delete'))
 
         return result
 
@@ -137,9 +453,8 @@ class Base(object):
         Deletes parameter from record.
         """
 
-        cls.command_sub = 'delete-parameter'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command(options, 'delete-parameter'))
 
         return result
 
@@ -149,9 +464,7 @@ class Base(object):
         Displays the content for existing partition table.
         """
 
-        cls.command_sub = 'dump'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, 'dump'))
 
         return result
 
@@ -184,9 +497,177 @@ class Base(object):
     @classmethod
     def execute(cls, command, user=None, password=None, output_format=None,
                 timeout=None):
-        """Executes the cli ``command`` on the server via ssh"""
+        """Executes the cli ``command`` on the server via ssh
+
+        If the hammer shell backend is enabled (see
+        :mod:`robottelo.cli.shell`) the command is run on the persistent
+        hammer shell of the current worker, falling back to a one-shot
+        ``hammer`` process if the shell gets out of sync.
+
+        If the command cache is enabled (see :class:`CommandCache`) read only
+        commands may be answered from it.
+
+        If hammer sessions are enabled (see :mod:`robottelo.cli.session`) the
+        command reuses the session of ``user``, which is refreshed and the
+        command run again if it expired.
+
+        """
+        user, password = cls._get_username_password(user, password)
+
+        if not cache_enabled():
+            return cls._execute(
+                command, user, password, output_format, timeout)
+
+        key = CommandCache.key(command, user, output_format)
+        if key is None:
+            result = cls._execute(
+                command, user, password, output_format, timeout)
+            command_cache.invalidate(getattr(command, 'command_base', None))
+            return result
+
+        result, generation = command_cache.get(key)
+        if result is None:
+            result = cls._execute(
+                command, user, password, output_format, timeout)
+            command_cache.put(key, result, generation)
+        return result
+
+    @classmethod
+    def _execute(cls, command, user, password, output_format, timeout):
+        """Executes the cli ``command`` on the server, bypassing the cache"""
+        if shell_enabled():
+            try:
+                return get_shell(user, password).run(
+                    command, output_format=output_format, timeout=timeout)
+            except HammerShellError as err:
+                cls.logger.warning(
+                    '{0}. Falling back to one-shot mode.'.format(err))
+
+        result = ssh.command(
+            cls._hammer_command(command, user, password, output_format),
+            output_format=output_format,
+            timeout=timeout
+        )
+        if sessions_enabled() and HammerSession.expired(result):
+            cls.logger.info(
+                'hammer session of {0} expired, logging in again'.format(user))
+            try:
+                get_session(user, password).login(force=True)
+            except HammerSessionError as err:
+                cls.logger.warning(err)
+                return result
+            result = ssh.command(
+                cls._hammer_command(command, user, password, output_format),
+                output_format=output_format,
+                timeout=timeout
+            )
+        return result
+
+    @classmethod
+    def execute_batch(cls, commands, user=None, password=None,
+                      output_format=None, timeout=None, max_parallel=None):
+        """Executes many cli ``commands`` at the same time on the server
+
+        The commands share a single SSH connection, see
+        :func:`robottelo.common.ssh.command_batch`. Use it for independent
+        commands, like looking up several entities.
+
+        :return: A list of :class:`robottelo.common.ssh.SSHCommandResult`, in
+            the same order as ``commands``.
+
+        """
+        user, password = cls._get_username_password(user, password)
+        results = ssh.command_batch(
+            [
+                cls._hammer_command(command, user, password, output_format)
+                for command in commands
+            ],
+            output_format=output_format,
+            timeout=timeout,
+            max_parallel=max_parallel,
+        )
+        cls._invalidate_cache(commands)
+        return results
+
+    @classmethod
+    def execute_stream(cls, command, user=None, password=None,
+                       output_format=None, timeout=None):
+        """Executes the cli ``command`` on the server streaming its output
+
+        Use it for commands with huge outputs, like ``fact list``. Combine it
+        with :func:`robottelo.common.helpers.csv_records` to get the records
+        of a CSV output one at a time.
+
+        :return: An iterable over the output lines, see
+            :class:`robottelo.common.ssh.SSHCommandStream`.
+
+        """
+        user, password = cls._get_username_password(user, password)
+        cls._invalidate_cache([command])
+        return ssh.command_stream(
+            cls._hammer_command(command, user, password, output_format),
+            timeout=timeout,
+            output_format=output_format
+        )
+
+    @classmethod
+    @contextmanager
+    def pipeline(cls, parallel=False, user=None, password=None,
+                 timeout=None):
+        """Collects cli commands to run them in a single round trip
+
+        The commands queued in the ``with`` block run when it exits, unless an
+        exception is raised. See :class:`HammerPipeline`.
+
+        :param bool parallel: Run the commands at the same time on the
+            server. Only use it for commands which do not depend on each
+            other.
+        :param int timeout: Seconds to wait for all the commands.
+
+        """
         user, password = cls._get_username_password(user, password)
+        pipeline = HammerPipeline(cls, user, password, parallel, timeout)
+        yield pipeline
+        pipeline.run()
+
+    @classmethod
+    def _invalidate_cache(cls, commands):
+        """Drop the cached outputs made stale by ``commands``
+
+        The batch and streaming modes do not use the command cache, but the
+        commands they run may change what is cached.
+
+        """
+        if not cache_enabled():
+            return
+        for command in commands:
+            if CommandCache.key(command, None) is None:
+                command_cache.invalidate(
+                    getattr(command, 'command_base', None))
+
+    @classmethod
+    def _hammer_command(cls, command, user, password, output_format=None):
+        """Build the full hammer command line to run on the server
+
+        The credentials are left out when the command can reuse a hammer
+        session, see :mod:`robottelo.cli.session`.
 
+        """
+        if sessions_enabled():
+            try:
+                session = get_session(user, password)
+            except HammerSessionError as err:
+                cls.logger.warning(
+                    '{0}. Passing the credentials instead.'.format(err))
+            else:
+                cmd = u'{0} LANG={1} hammer -v {2} {3}'.format(
+                    session.environment(),
+                    conf.properties['main.locale'],
+                    u'--output={0}'.format(output_format)
+                    if output_format else u'',
+                    command
+                )
+                return cmd.encode('utf-8')
         cmd = u'LANG={0} hammer -v -u {1} -p {2} {3} {4}'.format(
             conf.properties['main.locale'],
             user,
@@ -194,9 +675,7 @@ class Base(object):
             u'--output={0}'.format(output_format) if output_format else u'',
             command
         )
-
-        return ssh.command(
-            cmd.encode('utf-8'), output_format=output_format, timeout=timeout)
+        return cmd.encode('utf-8')
 
     @classmethod
     def exists(cls, options=None, search=None):
@@ -231,23 +710,62 @@ class Base(object):
         @param options: ID (sometimes name or id).
         """
 
-        cls.command_sub = 'info'
-
         if options is None:
             options = {}
 
-        if cls.command_requires_org and 'organization-id' not in options:
+        cls._shard_organization(options, 'info')
+        if cls._org_required('info') and 'organization-id' not in options:
             raise Exception(
                 'organization-id option is required for {0}.info'
                 .format(cls.__name__)
             )
 
-        result = cls.execute(cls._construct_command(options))
+        return cls._execute_info(options, 'info')
+
+    @classmethod
+    def _execute_info(cls, options, command_sub):
+        """Executes the ``info`` like ``command_sub`` sub command
+
+        :return: The command result, its ``stdout`` being a dictionary of the
+            record attributes.
+
+        """
+        return cls._info_result(cls.execute(
+            cls._construct_command(options, command_sub),
+            output_format=cls._info_output_format()
+        ))
+
+    @classmethod
+    def _info_output_format(cls):
+        """Return the output format of the ``info`` like sub commands
+
+        ``json`` if the JSON output mode is enabled, see :func:`json_enabled`,
+        ``None`` for the human readable output otherwise.
+
+        """
+        return 'json' if json_enabled() else None
+
+    @classmethod
+    def _info_result(cls, result):
+        """Turn the ``stdout`` of an ``info`` like command result into a
+        dictionary of the record attributes
+
+        """
+        if json_enabled():
+            return result
 
         # info_dictionary required to convert result.stdout to dic format
-        updated_result = info_dictionary(result)
+        return info_dictionary(result)
+
+    @classmethod
+    def _output_format(cls):
+        """Return the output format of the commands returning records
 
-        return updated_result
+        ``json`` if the JSON output mode is enabled, see :func:`json_enabled`,
+        ``csv`` otherwise.
+
+        """
+        return 'json' if json_enabled() else 'csv'
 
     @classmethod
     def list(cls, options=None, per_page=True):
@@ -256,22 +774,23 @@ class Base(object):
         @param options: ID (sometimes name works as well) to retrieve info.
         """
 
-        cls.command_sub = 'list'
-
         if options is None:
             options = {}
 
         if 'per-page' not in options and per_page:
             options[u'per-page'] = 10000
 
-        if cls.command_requires_org and 'organization-id' not in options:
+        cls._shard_organization(options, 'list')
+        if cls._org_required('list') and 'organization-id' not in options:
             raise Exception(
                 'organization-id option is required for {0}.list'
                 .format(cls.__name__)
             )
 
         result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'list'),
+            output_format=cls._output_format()
+        )
 
         return result
 
@@ -281,10 +800,10 @@ class Base(object):
         Lists all puppet classes.
         """
 
-        cls.command_sub = 'puppet-classes'
-
         result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'puppet-classes'),
+            output_format=cls._output_format()
+        )
 
         return result
 
@@ -294,9 +813,8 @@ class Base(object):
         Removes OS from record.
         """
 
-        cls.command_sub = 'remove-operatingsystem'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command(options, 'remove-operatingsystem'))
 
         return result
 
@@ -306,10 +824,10 @@ class Base(object):
         Lists all smart class parameters.
         """
 
-        cls.command_sub = 'sc-params'
-
         result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'sc-params'),
+            output_format=cls._output_format()
+        )
 
         return result
 
@@ -319,9 +837,7 @@ class Base(object):
         Creates or updates parameter for a record.
         """
 
-        cls.command_sub = 'set-parameter'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, 'set-parameter'))
 
         return result
 
@@ -331,10 +847,10 @@ class Base(object):
         Updates existing record.
         """
 
-        cls.command_sub = 'update'
-
         result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'update'),
+            output_format=cls._output_format()
+        )
 
         return result
 
@@ -345,37 +861,60 @@ class Base(object):
         if password is None:
             password = conf.properties['foreman.admin.password']
 
-        class Wrapper(cls):
-            """Wrapper class which defines the foreman admin username and
-            password to be used when executing any cli command.
+        key = (cls, username, password)
+        with _user_classes_lock:
+            wrapper = _user_classes.get(key)
+            if wrapper is None:
+                class Wrapper(cls):
+                    """Wrapper class which defines the foreman admin
+                    username and password to be used when executing any cli
+                    command.
 
-            """
-            foreman_admin_username = username
-            foreman_admin_password = password
+                    """
+                    foreman_admin_username = username
+                    foreman_admin_password = password
 
-        return Wrapper
+                wrapper = _user_classes[key] = Wrapper
+
+        return wrapper
 
     @classmethod
-    def _construct_command(cls, options=None):
-        """
-        Build a hammer cli command based on the options passed
+    def _construct_command(cls, options, command_sub):
+        """Build the hammer cli ``command_sub`` command with ``options``
+
+        :param dict options: The command options. ``True`` values are passed
+            as flags, ``None`` and ``False`` values are omitted.
+        :param str command_sub: The sub command, like ``create`` or
+            ``version info``.
+        :rtype: HammerCommand
+
         """
+        return HammerCommand(cls.command_base, command_sub, options)
 
-        tail = u''
+    @classmethod
+    def _shard_organization(cls, options, command_sub):
+        """Run ``command_sub`` in the shard organization if it requires an
+        organization and none is given, see :mod:`robottelo.common.shard`
 
-        if options is None:
-            options = {}
+        :param dict options: The command options, changed in place.
 
-        for key, val in options.items():
-            if val is not None:
-                if val is True:
-                    tail += u' --{0}'.format(key)
-                elif val is not False:
-                    tail += u' --{0}="{1}"'.format(key, val)
-        cmd = u'{0} {1} {2}'.format(
-            cls.command_base,
-            cls.command_sub,
-            tail.strip()
-        )
+        """
+        if (not cls._org_required(command_sub) or
+                'organization-id' in options):
+            return
+        worker_shard = shard.current()
+        if worker_shard is not None:
+            options[u'organization-id'] = worker_shard.org['id']
+
+    @classmethod
+    def _org_required(cls, command_sub):
+        """Tell whether ``command_sub`` requires the ``organization-id`` option
 
-        return cmd
+        Returns ``command_requires_org`` by default. Override it in
+        subclasses where only some sub commands require an organization, like
+        the entities which are created and read back by id: their ``create``
+        and ``info`` sub commands then run without the organization of the
+        worker shard.
+
+        """
+        return cls.command_requires_org
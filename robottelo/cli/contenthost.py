@@ -38,9 +38,9 @@ class ContentHost(Base):
         Lists async tasks for a content host
         """
 
-        cls.command_sub = 'tasks'
-
         result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'tasks'),
+            output_format=cls._output_format()
+        )
 
         return result
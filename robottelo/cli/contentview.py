@@ -33,7 +33,6 @@ Options::
 """
 
 from robottelo.cli.base import Base
-from robottelo.common.helpers import info_dictionary
 
 
 class ContentView(Base):
@@ -44,117 +43,102 @@ class ContentView(Base):
     @classmethod
     def add_repository(cls, options):
         """Associate repository to a selected CV."""
-        cls.command_sub = 'add-repository'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'add-repository'),
+            output_format=cls._output_format()
+        )
 
     @classmethod
     def add_version(cls, options):
         """Associate version to a selected CV."""
-        cls.command_sub = 'add-version'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'add-version'),
+            output_format=cls._output_format()
+        )
 
     @classmethod
     def publish(cls, options, timeout=None):
         """Publishes a new version of content-view."""
-        cls.command_sub = 'publish'
 
         # Publishing can take a while so try to wait a bit longer
         if timeout is None:
             timeout = 120
 
-        return cls.execute(cls._construct_command(options), timeout=timeout)
+        return cls.execute(
+            cls._construct_command(options, 'publish'), timeout=timeout)
 
     @classmethod
     def version_info(cls, options):
         """Provides version info related to content-view's version."""
-        cls.command_sub = 'version info'
 
         if options is None:
             options = {}
 
-        result = cls.execute(cls._construct_command(options))
-
-        # info_dictionary required to convert result.stdout
-        # to dictionary format
-        return info_dictionary(result)
+        return cls._execute_info(options, 'version info')
 
     @classmethod
     def puppet_module_add(cls, options):
         """Associate puppet_module to selected CV"""
-        cls.command_sub = 'puppet-module add'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'puppet-module add'),
+            output_format=cls._output_format()
+        )
 
     @classmethod
     def puppet_module_info(cls, options):
         """Provides puppet-module info related to content-view's version."""
-        cls.command_sub = 'puppet-module info'
 
         if options is None:
             options = {}
 
-        result = cls.execute(cls._construct_command(options))
-
-        # info_dictionary required to convert result.stdout
-        # to dictionary format
-        return info_dictionary(result)
+        return cls._execute_info(options, 'puppet-module info')
 
     @classmethod
     def filter_info(cls, options):
         """Provides filter info related to content-view's version."""
 
-        cls.command_sub = 'filter info'
-
         if options is None:
             options = {}
 
-        result = cls.execute(cls._construct_command(options))
-
-        # info_dictionary required to convert result.stdout
-        # to dictionary format
-        return info_dictionary(result)
+        return cls._execute_info(options, 'filter info')
 
     @classmethod
     def filter_create(cls, options):
         """Provides filter info related to content-view's version."""
-        cls.command_sub = 'filter create'
 
         if options is None:
             options = {}
 
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'filter create'))
 
     @classmethod
     def filter_rule_create(cls, options):
         """Provides filter info related to content-view's version."""
-        cls.command_sub = 'filter rule create'
 
         if options is None:
             options = {}
 
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command(options, 'filter rule create'))
 
     @classmethod
     def version_list(cls, options):
         """Lists content-view's versions."""
-        cls.command_sub = 'version list'
 
         if options is None:
             options = {}
 
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'version list'),
+            output_format=cls._output_format()
+        )
 
     @classmethod
     def version_promote(cls, options):
         """Promotes content-view version to next env."""
-        cls.command_sub = 'version promote'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'version promote'))
 
     @classmethod
     def version_destroy(cls, options):
         """Removes content-view version."""
-        cls.command_sub = 'version destroy'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'version destroy'))
@@ -158,8 +158,7 @@ class DockerContainer(Base):
                                                       Default: 100
 
         """
-        cls.command_sub = 'logs'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'logs'))
 
     @classmethod
     def start(cls, options=None):
@@ -177,8 +176,7 @@ class DockerContainer(Base):
             --name NAME                               Name to search by
 
         """
-        cls.command_sub = 'start'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'start'))
 
     @classmethod
     def status(cls, options=None):
@@ -196,8 +194,7 @@ class DockerContainer(Base):
             --name NAME                               Name to search by
 
         """
-        cls.command_sub = 'status'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'status'))
 
     @classmethod
     def stop(cls, options=None):
@@ -215,8 +212,7 @@ class DockerContainer(Base):
             --name NAME                               Name to search by
 
         """
-        cls.command_sub = 'stop'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'stop'))
 
 
 class DockerImage(Base):
@@ -4,9 +4,11 @@ Factory object creation for all CLI methods
 """
 
 import datetime
+import functools
 import logging
 import os
 import random
+import threading
 
 from fauxfactory import (
     gen_alphanumeric, gen_integer, gen_ipaddr,
@@ -40,7 +42,7 @@ from robottelo.cli.subnet import Subnet
 from robottelo.cli.syncplan import SyncPlan
 from robottelo.cli.template import Template
 from robottelo.cli.user import User
-from robottelo.common import ssh
+from robottelo.common import registry, shard, ssh
 from robottelo.common.constants import (
     FAKE_1_YUM_REPO,
     FOREMAN_PROVIDERS,
@@ -49,7 +51,7 @@ from robottelo.common.constants import (
     TEMPLATE_TYPES,
 )
 from robottelo.common.decorators import cacheable
-from robottelo.common.helpers import update_dictionary
+from robottelo.common.helpers import CSVTable, update_dictionary
 from tempfile import mkstemp
 
 logger = logging.getLogger(__name__)
@@ -57,6 +59,30 @@ logger = logging.getLogger(__name__)
 ORG_KEYS = ['organization', 'organization-id', 'organization-label']
 CONTENT_VIEW_KEYS = ['content-view', 'content-view-id']
 LIFECYCLE_KEYS = ['lifecycle-environment', 'lifecycle-environment-id']
+#: How many entities :func:`make_many` creates per remote execution.
+BULK_BATCH_SIZE = 50
+
+#: The kind of the entities created by the cli classes, when it is not the
+#: cli class name, see :func:`robottelo.common.registry.track`.
+RESOURCE_KINDS = {
+    'ContentHost': 'System',
+    'DockerContainer': 'AbstractDockerContainer',
+    'Medium': 'Media',
+    'OperatingSys': 'OperatingSystem',
+    'Org': 'Organization',
+    'Proxy': 'SmartProxy',
+    'Template': 'ConfigTemplate',
+}
+# The options naming the entity a new entity belongs to, and its kind
+_PARENT_OPTIONS = (
+    (u'product-id', 'Product'),
+    (u'organization-id', 'Organization'),
+)
+
+# While make_many plans a bulk creation create_object collects the
+# (cli_object, options) pairs of the entities in ``plans`` instead of
+# creating them.
+_bulk = threading.local()
 
 
 class CLIFactoryError(Exception):
@@ -72,6 +98,62 @@ def _format_error_msg(msg):
     return u'\n'.join(['  {0}'.format(line) for line in msg.split('\n')])
 
 
+def _delete_object(cli_object, object_id):
+    """Delete the ``cli_object`` entity ``object_id``
+
+    :raise robottelo.common.registry.ResourceNotFound: If the entity does not
+        exist anymore.
+    :raise robottelo.cli.factory.CLIFactoryError: If the entity cannot be
+        deleted.
+
+    """
+    result = cli_object.delete({u'id': object_id})
+    if result.return_code != 0:
+        if 'not found' in (result.stderr or u'').lower():
+            raise registry.ResourceNotFound(object_id)
+        raise CLIFactoryError(
+            'Failed to delete {0} {1}:\n{2}'.format(
+                cli_object.__name__,
+                object_id,
+                _format_error_msg(result.stderr),
+            )
+        )
+
+
+def _track_object(cli_object, options, record):
+    """Record the entity created for deletion, see
+    :mod:`robottelo.common.registry`
+
+    """
+    if not isinstance(record, dict) or 'id' not in record:
+        return
+    parent = None
+    for option, kind in _PARENT_OPTIONS:
+        if options.get(option):
+            parent = (kind, options[option])
+            break
+    registry.track(
+        RESOURCE_KINDS.get(cli_object.__name__, cli_object.__name__),
+        record['id'],
+        functools.partial(_delete_object, cli_object, record['id']),
+        parent
+    )
+
+
+def _shard_organization(options):
+    """Return a copy of ``options`` pointing to the shard organization if
+    sharding is enabled and no organization is given, see
+    :mod:`robottelo.common.shard`
+
+    """
+    worker_shard = shard.current()
+    if worker_shard is None:
+        return options
+    sharded_options = {u'organization-id': None}
+    sharded_options.update(options or {})
+    return worker_shard.apply_defaults(sharded_options)
+
+
 def create_object(cli_object, options, values):
     """
     Creates <object> with dictionary of arguments.
@@ -87,6 +169,13 @@ def create_object(cli_object, options, values):
 
     """
     update_dictionary(options, values)
+    worker_shard = shard.current()
+    if worker_shard is not None:
+        worker_shard.apply_defaults(options)
+    plans = getattr(_bulk, 'plans', None)
+    if plans is not None:
+        plans.append((cli_object, options))
+        return None
     result = cli_object.create(options)
 
     # If the object is not created, raise exception, stop the show.
@@ -102,9 +191,10 @@ def create_object(cli_object, options, values):
 
     # Sometimes we get a list with a dictionary and not
     # a dictionary.
-    if type(result.stdout) is list and len(result.stdout) > 0:
+    if isinstance(result.stdout, (list, CSVTable)) and len(result.stdout) > 0:
         result.stdout = result.stdout[0]
 
+    _track_object(cli_object, options, result.stdout)
     return result.stdout
 
 
@@ -132,6 +222,7 @@ def make_activation_key(options=None):
                                                           key have unlimited
                                                           content hosts
     """
+    options = _shard_organization(options)
     # Organization Name, Label or ID is a required field.
     if (
             not options or
@@ -284,6 +375,7 @@ def make_content_view(options=None):
         -h, --help                    print help
 
     """
+    options = _shard_organization(options)
     # Organization ID is a required field.
     if not options or not options.get('organization-id', None):
         raise CLIFactoryError('Please provide a valid ORG ID.')
@@ -319,6 +411,7 @@ def make_gpg_key(options=None):
         --organization-label ORGANIZATION_LABEL Organization label to search by
         -h, --help                    print help
     """
+    options = _shard_organization(options)
     # Organization ID is a required field.
     if not options or not options.get('organization-id', None):
         raise CLIFactoryError('Please provide a valid ORG ID.')
@@ -497,6 +590,7 @@ def make_product(options=None):
         --sync-plan-id SYNC_PLAN_ID             Plan numeric identifier
         -h, --help                              print help
     """
+    options = _shard_organization(options)
     # Organization ID is a required field.
     if not options or not options.get('organization-id', None):
         raise CLIFactoryError('Please provide a valid ORG ID.')
@@ -540,6 +634,9 @@ def make_proxy(options=None):
     }
 
     if options is None or 'url' not in options:
+        if getattr(_bulk, 'plans', None) is not None:
+            raise CLIFactoryError(
+                'Provide the url option to create proxies in bulk')
         newport = random.randint(9191, 49090)
         try:
             with default_url_on_new_port(9090, newport) as url:
@@ -710,6 +807,7 @@ def make_sync_plan(options=None):
         -h, --help                              print help
 
     """
+    options = _shard_organization(options)
     # Organization ID is a required field.
     if not options or not options.get('organization-id', None):
         raise CLIFactoryError('Please provide a valid ORG ID.')
@@ -775,6 +873,7 @@ def make_content_host(options=None):
         -h, --help                                          print help
 
     """
+    options = _shard_organization(options)
     # Organization ID is a required field.
     if not options:
         raise CLIFactoryError('Please provide required parameters')
@@ -997,6 +1096,7 @@ def make_host_collection(options=None):
          -h, --help                                       print help
 
     """
+    options = _shard_organization(options)
     # Organization ID is required
     if not options or not options.get('organization-id', None):
         raise CLIFactoryError('Please provide a valid ORGANIZATION_ID.')
@@ -1460,6 +1560,7 @@ def make_lifecycle_environment(options=None):
         -h, --help                  print help
 
     """
+    options = _shard_organization(options)
     # Organization Name, Label or ID is a required field.
     if (
             not options or
@@ -1540,3 +1641,130 @@ def make_template(options=None):
     # End - Special handling for template factory
 
     return create_object(Template, args, options)
+
+
+def make_many(factory, count, options=None, batch_size=BULK_BATCH_SIZE):
+    """Creates ``count`` entities with the ``factory`` function in bulk
+
+    The factory runs as usual, generating the default values, but the
+    ``create`` commands are collected and run ``batch_size`` at a time as a
+    single remote execution, see :meth:`robottelo.cli.base.Base.pipeline`.
+    The created entities are then read back with another remote execution per
+    batch instead of one ``info`` command each.
+
+    :param factory: A ``make_*`` function of this module.
+    :param int count: How many entities to create.
+    :param dict options: The options passed to each ``factory`` call.
+    :param int batch_size: How many entities to create per remote execution.
+    :raise robottelo.cli.factory.CLIFactoryError: Raise an exception if an
+        entity cannot be created. The entities created before, the other
+        entities of its batch included, are tracked for deletion by
+        :mod:`robottelo.common.registry` like the others.
+    :rtype: list
+    :return: A list with the dictionaries ``factory`` would have returned.
+
+    """
+    _bulk.plans = []
+    try:
+        for _ in range(count):
+            factory(dict(options or {}))
+        plans = _bulk.plans
+    finally:
+        _bulk.plans = None
+    if not plans:
+        return []
+
+    cli_object = plans[0][0]
+    if (cli_object._org_required('info') and
+            any('organization-id' not in plan[1] for plan in plans)):
+        raise CLIFactoryError(
+            'organization-id option is required to create {0} in bulk'
+            .format(cli_object.__name__)
+        )
+
+    entities = []
+    for start in range(0, len(plans), batch_size):
+        batch = [plan[1] for plan in plans[start:start + batch_size]]
+        with cli_object.pipeline() as pipeline:
+            for create_options in batch:
+                pipeline.execute(
+                    cli_object._construct_command(create_options, 'create'),
+                    cli_object._output_format()
+                )
+
+        records = []
+        error = None
+        for create_options, result in zip(batch, pipeline.results):
+            if result.return_code != 0:
+                logger.debug(result.stderr)  # Show why creation failed.
+                if error is None:
+                    error = CLIFactoryError(
+                        'Failed to create %s with %r data due to:\n%s' % (
+                            cli_object.__name__,
+                            create_options,
+                            _format_error_msg(result.stderr),
+                        )
+                    )
+                records.append(None)
+                continue
+            # CSV output is a list of records, JSON output a single record
+            record = result.stdout
+            if not isinstance(record, dict):
+                record = record[0] if len(record) > 0 else {}
+            records.append(record)
+        if error is not None:
+            # Track the siblings of the failed entity before giving up
+            for create_options, record in zip(batch, records):
+                if record is not None:
+                    _track_object(cli_object, create_options, record)
+            raise error
+
+        # Read back the entities which got an id, in parallel
+        read_back = {}
+        with cli_object.pipeline(parallel=True) as pipeline:
+            for index, (create_options, record) in enumerate(
+                    zip(batch, records)):
+                if 'id' not in record:
+                    continue
+                info_options = {u'id': record['id']}
+                if cli_object._org_required('info'):
+                    info_options[u'organization-id'] = (
+                        create_options[u'organization-id'])
+                read_back[pipeline.execute(
+                    cli_object._construct_command(info_options, 'info'),
+                    cli_object._info_output_format()
+                )] = index
+        for position, result in enumerate(pipeline.results):
+            result = cli_object._info_result(result)
+            # stdout should be a dictionary containing the object
+            if len(result.stdout) > 0:
+                records[read_back[position]] = result.stdout
+
+        for create_options, record in zip(batch, records):
+            _track_object(cli_object, create_options, record)
+        entities.extend(records)
+
+    return entities
+
+
+def _make_many(factory):
+    """Return a function creating many entities with ``factory``"""
+    def make_entities(count, options=None, batch_size=BULK_BATCH_SIZE):
+        """Creates ``count`` entities in bulk, see :func:`make_many`"""
+        return make_many(factory, count, options, batch_size)
+    make_entities.__name__ = '{0}_many'.format(factory.__name__)
+    make_entities.__doc__ = (
+        'Creates ``count`` entities with :func:`{0}` in bulk, see '
+        ':func:`make_many`'.format(factory.__name__)
+    )
+    return make_entities
+
+
+make_activation_key_many = _make_many(make_activation_key)
+make_content_host_many = _make_many(make_content_host)
+make_host_collection_many = _make_many(make_host_collection)
+make_lifecycle_environment_many = _make_many(make_lifecycle_environment)
+make_org_many = _make_many(make_org)
+make_product_many = _make_many(make_product)
+make_repository_many = _make_many(make_repository)
+make_user_many = _make_many(make_user)
@@ -0,0 +1,204 @@
+# -*- encoding: utf-8 -*-
+"""Declarative fixtures built on top of :mod:`robottelo.cli.factory`.
+
+Tests name the entities they need and the builder creates them along with the
+entities they depend on, the independent ones at the same time::
+
+    fixtures = build_fixtures(
+        'repository',
+        'activation_key',
+        repository={u'url': FAKE_1_YUM_REPO},
+    )
+    fixtures.repository['id'], fixtures.org['id']
+
+Here ``org`` is created first, then ``product`` and ``activation_key``
+concurrently, then ``repository``. The dependencies of each kind of fixture
+are listed in :data:`FACTORY_DEPENDENCIES`. Use :class:`FixtureGraph`
+directly for more control, like many fixtures of the same kind::
+
+    fixture_graph = FixtureGraph()
+    fixture_graph.add('org')
+    fixture_graph.add('product')
+    fixture_graph.add('other_product', 'product', {u'name': u'other'})
+    fixtures = fixture_graph.build()
+
+"""
+import collections
+import logging
+import time
+
+from robottelo.cli import factory
+from robottelo.cli.factory import CLIFactoryError
+from robottelo.common import graph
+
+logger = logging.getLogger(__name__)
+
+#: Maps each kind of fixture to the options its factory requires and the kind
+#: of the fixture whose ``id`` fills them.
+FACTORY_DEPENDENCIES = {
+    'activation_key': {u'organization-id': 'org'},
+    'content_host': {
+        u'organization-id': 'org',
+        u'content-view-id': 'content_view',
+        u'lifecycle-environment-id': 'lifecycle_environment',
+    },
+    'content_view': {u'organization-id': 'org'},
+    'gpg_key': {u'organization-id': 'org'},
+    'host_collection': {u'organization-id': 'org'},
+    'lifecycle_environment': {u'organization-id': 'org'},
+    'product': {u'organization-id': 'org'},
+    'repository': {u'product-id': 'product'},
+    'sync_plan': {u'organization-id': 'org'},
+}
+
+
+class Fixtures(dict):
+    """The created fixtures, available as items or attributes"""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+class FixtureGraph(object):
+    """A set of fixtures and their dependencies
+
+    :param int max_workers: How many fixtures to create at the same time.
+
+    """
+
+    def __init__(self, max_workers=graph.DEFAULT_MAX_WORKERS):
+        self.max_workers = max_workers
+        #: Maps each fixture name to its kind, options and dependencies.
+        self.nodes = {}
+        self._order = []
+        #: Maps each created fixture, in completion order, to the seconds its
+        #: creation took. Filled by :meth:`build`.
+        self.timings = None
+        #: The seconds :meth:`build` took.
+        self.elapsed = None
+
+    def add(self, name, kind=None, options=None, depends=None):
+        """Add the fixture ``name``
+
+        :param str name: The fixture name.
+        :param str kind: The fixture kind, the name of a ``make_*`` factory
+            without the ``make_`` prefix. Defaults to ``name``.
+        :param dict options: The options passed to the factory.
+        :param dict depends: Maps options to the name of the fixture whose
+            ``id`` fills them. Defaults to the options of
+            :data:`FACTORY_DEPENDENCIES`, filled by the fixtures named after
+            their kind. Options given in ``options`` are not filled.
+
+        """
+        if kind is None:
+            kind = name
+        if not hasattr(factory, 'make_{0}'.format(kind)):
+            raise CLIFactoryError('Unknown fixture kind {0}'.format(kind))
+        if options is None:
+            options = {}
+        if depends is None:
+            depends = FACTORY_DEPENDENCIES.get(kind, {})
+        depends = dict(
+            (option, dependency) for option, dependency in depends.items()
+            if option not in options
+        )
+        if name not in self.nodes:
+            self._order.append(name)
+        self.nodes[name] = (kind, options, depends)
+
+    def _complete(self):
+        """Add the fixtures depended on but not added, with default options"""
+        index = 0
+        while index < len(self._order):
+            _, _, depends = self.nodes[self._order[index]]
+            for dependency in depends.values():
+                if dependency not in self.nodes:
+                    self.add(dependency)
+            index += 1
+
+    def build(self):
+        """Create the fixtures
+
+        :rtype: Fixtures
+        :raise robottelo.cli.factory.CLIFactoryError: Raise an exception if
+            a fixture cannot be created, once the fixtures being created at
+            that time are done. Fixtures depending on the failed ones are not
+            created.
+
+        """
+        self._complete()
+        fixtures = Fixtures()
+
+        def create(name):
+            """Create the fixture ``name``"""
+            kind, options, depends = self.nodes[name]
+            options = dict(options)
+            for option, dependency in depends.items():
+                options[option] = fixtures[dependency]['id']
+            entity = getattr(factory, 'make_{0}'.format(kind))(options)
+            fixtures[name] = entity
+            return entity
+
+        start = time.time()
+        outcome = graph.run(
+            collections.OrderedDict(
+                (name, self.nodes[name][2].values()) for name in self._order
+            ),
+            create,
+            self.max_workers
+        )
+        self.timings = outcome.timings
+        self.elapsed = time.time() - start
+        logger.info(self.report())
+        if outcome.errors:
+            raise CLIFactoryError(
+                'Failed to create fixtures {0}{1}:\n{2}'.format(
+                    ', '.join(sorted(outcome.errors)),
+                    ' (skipped {0})'.format(', '.join(outcome.skipped))
+                    if outcome.skipped else '',
+                    '\n'.join(
+                        '{0}: {1}'.format(name, error)
+                        for name, error in sorted(outcome.errors.items())
+                    )
+                )
+            )
+        return fixtures
+
+    def report(self):
+        """Return a summary of the time spent creating each fixture
+
+        :rtype: str
+
+        """
+        if not self.timings:
+            return 'No fixture created'
+        return (
+            'Fixtures created in {0:.2f}s ({1:.2f}s sequentially): {2}'
+        ).format(
+            self.elapsed,
+            sum(self.timings.values()),
+            ', '.join(
+                '{0} {1:.2f}s'.format(name, elapsed)
+                for name, elapsed in self.timings.items()
+            )
+        )
+
+
+def build_fixtures(*names, **options):
+    """Create the fixtures ``names`` and the ones they depend on
+
+    :param names: The fixtures kinds, see :meth:`FixtureGraph.add`.
+    :param options: Maps fixture names to the options of their factory.
+    :rtype: Fixtures
+
+    """
+    fixture_graph = FixtureGraph()
+    for name in names:
+        fixture_graph.add(name, options=options.get(name))
+    for name in options:
+        if name not in fixture_graph.nodes:
+            fixture_graph.add(name, options=options[name])
+    return fixture_graph.build()
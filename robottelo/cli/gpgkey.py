@@ -35,29 +35,27 @@ class GPGKey(Base):
         Gets information for GPG Key
         """
 
-        cls.command_sub = 'info'
+        return cls._execute_info(options, 'info')
 
-        result = cls.execute(
-            cls._construct_command(options), output_format='csv')
-
-        # Need to rebuild the returned object
-        # First check for content key
-        # id, name, content, organization, repositories
-
-        if len(result.stdout) > 0:
-            key_record = {}
-
-            # First item should contain most fields
-            key_record = result.stdout.pop(0)
-            if 'organization' not in key_record:
-                raise ValueError('Could not find GPG Key')
-
-            # Remaining items belong to content
+    @classmethod
+    def _info_output_format(cls):
+        """GPG Keys are shown in CSV or JSON, see ``Base._output_format``"""
+        return cls._output_format()
 
-            for item in result.stdout:
-                for _, val in item.items():
-                    key_record['content'] += val
-            # Update stdout with dictionary
-            result.stdout = key_record
+    @classmethod
+    def _info_result(cls, result):
+        """Extract the GPG Key record of an ``info`` command result"""
+        # The key content spans many lines, the CSV parser joins them back
+        # into a single record with id, name, content, organization and
+        # repositories. JSON output is that record.
+        if len(result.stdout) == 0:
+            return result
+        key_record = result.stdout
+        if not isinstance(key_record, dict):
+            key_record = key_record[0]
+        if 'organization' not in key_record:
+            raise ValueError('Could not find GPG Key')
+        # Update stdout with dictionary
+        result.stdout = key_record
 
         return result
@@ -57,10 +57,11 @@ class Host(Base):
             --search SEARCH               filter results
             -h, --help                    print help
         """
-        cls.command_sub = 'facts'
 
         result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'facts'),
+            output_format=cls._output_format()
+        )
 
         facts = []
 
@@ -83,9 +84,7 @@ class Host(Base):
             -h, --help                    print help
         """
 
-        cls.command_sub = 'puppetrun'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, 'puppetrun'))
 
         return result
 
@@ -103,9 +102,7 @@ class Host(Base):
             -h, --help                    print help
         """
 
-        cls.command_sub = 'reboot'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, 'reboot'))
 
         return result
 
@@ -127,10 +124,10 @@ class Host(Base):
             -h, --help                    print help
         """
 
-        cls.command_sub = 'reports'
-
         result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'reports'),
+            output_format=cls._output_format()
+        )
 
         reports = []
 
@@ -153,9 +150,7 @@ class Host(Base):
             -h, --help                    print help
         """
 
-        cls.command_sub = 'start'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, 'start'))
 
         return result
 
@@ -173,9 +168,7 @@ class Host(Base):
             -h, --help                    print help
         """
 
-        cls.command_sub = 'status'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, 'status'))
 
         return result
 
@@ -194,8 +187,6 @@ class Host(Base):
             -h, --help                    print help
         """
 
-        cls.command_sub = 'stop'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, 'stop'))
 
         return result
@@ -38,16 +38,15 @@ class HostCollection(Base):
         """
         Associate a content-host
         """
-        cls.command_sub = 'add-content-host'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'add-content-host'))
 
     @classmethod
     def remove_content_host(cls, options=None):
         """
         Remove a content-host
         """
-        cls.command_sub = 'remove-content-host'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(
+            cls._construct_command(options, 'remove-content-host'))
 
     @classmethod
     def content_hosts(cls, options=None):
@@ -66,6 +65,7 @@ class HostCollection(Base):
             --organization-id ORGANIZATION_ID
             --organization-label Organization label to search by
         """
-        cls.command_sub = 'content-hosts'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'content-hosts'),
+            output_format=cls._output_format()
+        )
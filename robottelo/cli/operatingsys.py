@@ -45,9 +45,8 @@ class OperatingSys(Base):
         Adds existing architecture to OS.
         """
 
-        cls.command_sub = 'add-architecture'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command(options, 'add-architecture'))
 
         return result
 
@@ -57,9 +56,8 @@ class OperatingSys(Base):
         Adds existing template to OS.
         """
 
-        cls.command_sub = 'add-config-template '
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command(options, 'add-config-template '))
 
         return result
 
@@ -69,9 +67,7 @@ class OperatingSys(Base):
         Adds existing partitioning table to OS.
         """
 
-        cls.command_sub = 'add-ptable'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, 'add-ptable'))
 
         return result
 
@@ -81,9 +77,8 @@ class OperatingSys(Base):
         Removes architecture from OS.
         """
 
-        cls.command_sub = 'remove-architecture'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command(options, 'remove-architecture'))
 
         return result
 
@@ -93,9 +88,8 @@ class OperatingSys(Base):
         Removes template from OS.
         """
 
-        cls.command_sub = 'remove-config-template'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command(options, 'remove-config-template'))
 
         return result
 
@@ -105,8 +99,6 @@ class OperatingSys(Base):
         Removes partitioning table from OS.
         """
 
-        cls.command_sub = 'remove-ptable '
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, 'remove-ptable '))
 
         return result
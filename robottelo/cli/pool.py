@@ -0,0 +1,313 @@
+# -*- encoding: utf-8 -*-
+"""Pools of pre-created entities.
+
+Creating an organization is one of the slowest Foreman operations, yet most
+tests start by creating a throwaway one. A pool keeps fresh entities ready,
+created in the background, and hands them out instantly::
+
+    from robottelo.cli import pool
+
+    org = pool.take('org')
+
+Each entity is handed out once, so tests can change it at will. Taking an
+entity makes the pool create another one in the background.
+
+Pools are opt-in, set ``pool.size`` in the ``main`` section of the
+configuration file to the number of entities to keep ready, and
+``pool.size.<kind>`` to override it for a kind. With a size of ``0``, the
+default, :func:`take` creates the entity when called. The pool of a kind is
+started by the first :func:`take` or by :func:`start`. The unused entities are
+deleted when the process exits, see :func:`robottelo.common.worker.at_exit`.
+The entities handed out are tracked by
+:mod:`robottelo.common.registry`, the entities waiting in a pool are not.
+
+The ``org``, ``lifecycle_environment`` and ``product`` kinds are available,
+the latter two being created in an organization of their own. Use
+:func:`register` to add other kinds.
+
+"""
+import collections
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+
+from robottelo.cli import factory
+from robottelo.cli.org import Org
+from robottelo.common import conf, registry, worker
+
+logger = logging.getLogger(__name__)
+
+#: Seconds to wait before creating an entity again after a failure.
+RETRY_DELAY = 5
+#: Seconds to wait for the background thread when a pool is closed.
+CLOSE_TIMEOUT = 60
+
+# Maps the kinds of entities to a (create, delete, resource_kind) tuple
+_kinds = {}
+# Maps (pid, kind) to an EntityPool instance
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class EntityPool(object):
+    """A pool of entities created in the background
+
+    :param create: A function called without arguments which creates an
+        entity and returns it.
+    :param delete: A function called with an unused entity when the pool is
+        closed, to delete it.
+    :param int size: How many entities to keep ready.
+
+    """
+
+    def __init__(self, create, delete=None, size=0):
+        self.create = create
+        self.delete = delete
+        self.size = size
+        #: How many entities were handed out from the pool.
+        self.hits = 0
+        #: How many entities were created when taken, the pool being empty.
+        self.misses = 0
+        self._ready = collections.deque()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = None
+
+    def start(self):
+        """Start filling the pool in the background, unless already done"""
+        with self._condition:
+            if self._thread is not None or self._closed or self.size < 1:
+                return
+            self._thread = threading.Thread(target=self._fill)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def take(self):
+        """Return a fresh entity
+
+        The entity is created at once if none is ready.
+
+        """
+        self.start()
+        with self._condition:
+            if self._ready:
+                self.hits += 1
+                # Wake the background thread up to replace the entity
+                self._condition.notify()
+                return self._ready.popleft()
+            self.misses += 1
+        return self.create()
+
+    def _fill(self):
+        """Create entities until the pool is full, then wait for takers"""
+        while True:
+            with self._condition:
+                while not self._closed and len(self._ready) >= self.size:
+                    self._condition.wait()
+                if self._closed:
+                    return
+            try:
+                entity = self.create()
+            except Exception as err:  # pylint:disable=broad-except
+                logger.warning(
+                    'Failed to create a pool entity: {0}'.format(err))
+                time.sleep(RETRY_DELAY)
+                continue
+            with self._condition:
+                if self._closed:
+                    # Too late, close already deleted the unused entities
+                    self._delete(entity)
+                    return
+                self._ready.append(entity)
+
+    def _delete(self, entity):
+        """Delete an unused ``entity``, if the pool knows how to"""
+        if self.delete is None:
+            return
+        try:
+            self.delete(entity)
+        except Exception as err:  # pylint:disable=broad-except
+            logger.warning(
+                'Failed to delete a pool entity: {0}'.format(err))
+
+    def close(self):
+        """Stop filling the pool and delete the entities not handed out"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(CLOSE_TIMEOUT)
+        with self._condition:
+            unused, self._ready = list(self._ready), collections.deque()
+        for entity in unused:
+            self._delete(entity)
+
+    def stats(self):
+        """Return the pool counters
+
+        :return: A dictionary with the ``hits`` and ``misses`` counters and
+            the number of entities ``ready``.
+
+        """
+        with self._condition:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'ready': len(self._ready),
+            }
+
+
+def register(kind, create, delete=None, resource_kind=None):
+    """Make the ``kind`` entities available from :func:`take`
+
+    :param str kind: The name of the kind of entities.
+    :param create: A function called without arguments which creates an
+        entity and returns it.
+    :param delete: A function called with an unused entity at exit, to delete
+        it.
+    :param str resource_kind: The kind the entities handed out are tracked
+        as, see :func:`robottelo.common.registry.track`. They are not tracked
+        if not set or without ``delete``.
+
+    """
+    _kinds[kind] = (create, delete, resource_kind)
+
+
+def _untracked(create):
+    """Return a function calling ``create`` without tracking the entities"""
+    def untracked_create():
+        """Call ``create`` in a ``registry.untracked`` block"""
+        with registry.registry.untracked():
+            return create()
+    return untracked_create
+
+
+def pool_size(kind):
+    """Return the size of the ``kind`` pool
+
+    ``main.pool.size.<kind>`` if set, ``main.pool.size`` otherwise.
+
+    :rtype: int
+
+    """
+    return int(conf.properties.get(
+        'main.pool.size.{0}'.format(kind),
+        conf.properties.get('main.pool.size', 0)
+    ))
+
+
+def get_pool(kind):
+    """Return the ``kind`` pool of the current process
+
+    :rtype: EntityPool
+    :raises KeyError: If ``kind`` is not registered.
+
+    """
+    key = (os.getpid(), kind)
+    with _pools_lock:
+        entity_pool = _pools.get(key)
+        if entity_pool is None:
+            create, delete = _kinds[kind][:2]
+            entity_pool = _pools[key] = EntityPool(
+                _untracked(create), delete, pool_size(kind))
+    worker.at_exit(close_pools, worker.POOL_PRIORITY)
+    return entity_pool
+
+
+def start(*kinds):
+    """Start filling the ``kinds`` pools in the background"""
+    for kind in kinds:
+        get_pool(kind).start()
+
+
+def take(kind):
+    """Return a fresh ``kind`` entity
+
+    :param str kind: The kind of entity, like ``org``.
+
+    """
+    entity = get_pool(kind).take()
+    _, delete, resource_kind = _kinds[kind]
+    if resource_kind is not None and delete is not None:
+        registry.track(
+            resource_kind, entity['id'], functools.partial(delete, entity))
+    return entity
+
+
+def close_pools():
+    """Close the pools of the current process, see :meth:`EntityPool.close`"""
+    with _pools_lock:
+        keys = [key for key in _pools if key[0] == os.getpid()]
+        pools = [_pools.pop(key) for key in keys]
+    for entity_pool in pools:
+        entity_pool.close()
+
+
+def _make_org():
+    """Create an organization with the CLI factory"""
+    return factory.make_org()
+
+
+def _delete_org_by(option, value):
+    """Delete the organization whose ``option`` is ``value``
+
+    :raise robottelo.common.registry.ResourceNotFound: If the organization
+        does not exist anymore.
+    :raise robottelo.cli.factory.CLIFactoryError: If the organization cannot
+        be deleted.
+
+    """
+    result = Org.delete({option: value})
+    if result.return_code != 0:
+        if 'not found' in (result.stderr or u'').lower():
+            raise registry.ResourceNotFound(value)
+        raise factory.CLIFactoryError(
+            u'Failed to delete Org {0}:\n{1}'.format(value, result.stderr))
+
+
+def _delete_org(org):
+    """Delete the organization ``org``"""
+    _delete_org_by(u'id', org['id'])
+
+
+def _make_in_org(factory_name):
+    """Return a function creating an entity in an organization of its own"""
+    def make():
+        """Create an organization and an entity in it
+
+        The organization is not tracked, so it is deleted here if the entity
+        cannot be created.
+
+        """
+        org = factory.make_org()
+        try:
+            return getattr(factory, factory_name)(
+                {u'organization-id': org['id']})
+        except Exception:
+            exc_info = sys.exc_info()
+            try:
+                _delete_org(org)
+            except Exception:  # pylint:disable=broad-except
+                logger.exception(
+                    'Failed to delete Org {0}'.format(org['id']))
+            raise exc_info[0], exc_info[1], exc_info[2]
+    return make
+
+
+def _delete_org_of(entity):
+    """Delete the organization of ``entity`` and so ``entity``"""
+    _delete_org_by(u'name', entity['organization'])
+
+
+register('org', _make_org, _delete_org, 'Organization')
+register(
+    'lifecycle_environment',
+    _make_in_org('make_lifecycle_environment'),
+    _delete_org_of,
+    'LifecycleEnvironment'
+)
+register('product', _make_in_org('make_product'), _delete_org_of, 'Product')
@@ -72,5 +72,4 @@ class Proxy(Base):
     @classmethod
     def importclasses(cls, options=None):
         """Import puppet classes from puppet proxy."""
-        cls.command_sub = 'import-classes'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'import-classes'))
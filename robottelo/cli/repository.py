@@ -32,26 +32,9 @@ class Repository(Base):
     command_requires_org = True
 
     @classmethod
-    def create(cls, options=None):
-        cls.command_requires_org = False
-
-        try:
-            result = super(Repository, cls).create(options)
-        finally:
-            cls.command_requires_org = True
-
-        return result
-
-    @classmethod
-    def info(cls, options=None):
-        cls.command_requires_org = False
-
-        try:
-            result = super(Repository, cls).info(options)
-        finally:
-            cls.command_requires_org = True
-
-        return result
+    def _org_required(cls, command_sub):
+        """Only the sub commands other than ``create`` and ``info``"""
+        return command_sub not in ('create', 'info')
 
     @classmethod
     def synchronize(cls, options):
@@ -59,17 +42,18 @@ class Repository(Base):
         Synchronizes a repository.
         """
 
-        cls.command_sub = 'synchronize'
-
         result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'synchronize'),
+            output_format=cls._output_format()
+        )
 
         return result
 
     @classmethod
     def upload_content(cls, options):
         """Upload content to repository."""
-        cls.command_sub = 'upload-content'
         result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'upload-content'),
+            output_format=cls._output_format()
+        )
         return result
@@ -0,0 +1,181 @@
+# -*- encoding: utf-8 -*-
+"""Authenticated hammer sessions.
+
+Passing ``-u`` and ``-p`` to every ``hammer`` command makes Foreman
+authenticate each of them, which is slow with external authentication
+sources such as LDAP. This module logs each user in once per worker with
+``hammer auth login`` and lets the following commands reuse the session
+cookie hammer keeps.
+
+Hammer stores the session in the home directory of the user running it, so
+each worker and user gets its own home directory on the server, under
+:data:`SESSIONS_ROOT`, holding a configuration file which enables sessions.
+
+Sessions are opt-in, enable them by setting ``hammer.sessions=1`` in the
+``main`` section of the configuration file. They need hammer 0.5 or later.
+:meth:`robottelo.cli.base.Base.execute` logs in again and retries once when
+a session expires. A failed login is remembered: the commands of the user
+pass the credentials instead, without trying to log in again. The sessions
+are closed when the worker exits, see :func:`robottelo.common.worker.at_exit`.
+
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+
+from robottelo.common import conf, ssh, worker
+
+logger = logging.getLogger(__name__)
+
+#: Directory on the server holding the sessions home directories.
+SESSIONS_ROOT = u'/tmp/robottelo-hammer-sessions'
+#: Matches the errors hammer reports when a session is missing or expired.
+#: Wrong credentials are not session errors, logging in again cannot help.
+SESSION_ERROR_REGEX = re.compile(
+    r'session has expired|missing credentials', re.IGNORECASE)
+# The hammer configuration enabling sessions
+_SESSION_CONFIG = u':foreman:\n  :use_sessions: true\n'
+
+# Maps (pid, username, password) to a HammerSession instance
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+class HammerSessionError(Exception):
+    """Indicates that logging in with ``hammer auth login`` failed."""
+
+
+def sessions_enabled():
+    """Tell whether ``main.hammer.sessions`` enables hammer sessions."""
+    return conf.properties.get('main.hammer.sessions', '0') == '1'
+
+
+class HammerSession(object):
+    """The hammer session of a user on the server.
+
+    :param str username: The user to log in.
+    :param str password: The user password.
+
+    """
+
+    def __init__(self, username, password):
+        self.username = username
+        self.password = password
+        digest = hashlib.sha1(
+            u'{0}:{1}'.format(username, password).encode('utf-8')
+        ).hexdigest()[:12]
+        #: The home directory of the session on the server.
+        self.home = u'{0}/{1}-{2}'.format(SESSIONS_ROOT, os.getpid(), digest)
+        self.logged_in = False
+        #: The error of the last failed login, ``None`` if it succeeded.
+        self.error = None
+        # Whether the home directory may exist on the server
+        self._created = False
+        self._lock = threading.Lock()
+
+    def login(self, force=False):
+        """Log the user in, unless already done.
+
+        :param bool force: Log in again even if it was already done, to
+            refresh an expired session, or if it failed.
+        :raises HammerSessionError: If hammer fails to log the user in, or
+            failed the last time and ``force`` is not set.
+
+        """
+        with self._lock:
+            if not force:
+                if self.logged_in:
+                    return
+                if self.error is not None:
+                    raise HammerSessionError(self.error)
+            self._created = True
+            config_dir = u'{0}/.hammer/cli.modules.d'.format(self.home)
+            result = ssh.command(
+                u'mkdir -p {0} && chmod 700 {1} && '
+                u'printf "{2}" > {0}/robottelo_sessions.yml && '
+                u'HOME={1} LANG={3} hammer auth login basic -u {4} -p {5}'
+                .format(
+                    config_dir,
+                    self.home,
+                    _SESSION_CONFIG.replace(u'\n', u'\\n'),
+                    conf.properties['main.locale'],
+                    self.username,
+                    self.password,
+                ).encode('utf-8')
+            )
+            if result.return_code != 0:
+                self.logged_in = False
+                self.error = u'Failed to log {0} in: {1}'.format(
+                    self.username, result.stderr)
+                raise HammerSessionError(self.error)
+            self.logged_in = True
+            self.error = None
+            logger.info(
+                'Started hammer session for user {0}'.format(self.username))
+
+    def environment(self):
+        """Return the environment variables making hammer use the session.
+
+        :rtype: unicode
+
+        """
+        return u'HOME={0}'.format(self.home)
+
+    @staticmethod
+    def expired(result):
+        """Tell whether ``result`` failed because the session expired.
+
+        :param result: A :class:`robottelo.common.ssh.SSHCommandResult`.
+
+        """
+        return (
+            result.return_code != 0 and
+            SESSION_ERROR_REGEX.search(
+                u''.join(result.stderr or u'')) is not None
+        )
+
+    def close(self):
+        """Log the user out and remove the session home directory."""
+        with self._lock:
+            if not self._created:
+                return
+            command = u'rm -rf {0}'.format(self.home)
+            if self.logged_in:
+                command = u'HOME={0} hammer auth logout; {1}'.format(
+                    self.home, command)
+            self.logged_in = False
+            self._created = False
+            try:
+                ssh.command(command.encode('utf-8'))
+            except Exception as err:  # pylint:disable=broad-except
+                logger.debug('Failed to close hammer session: {0}'.format(
+                    err))
+
+
+def get_session(username, password):
+    """Return the hammer session of the current worker for the given user.
+
+    The session is logged in, see :meth:`HammerSession.login`.
+
+    :rtype: HammerSession
+
+    """
+    key = (os.getpid(), username, password)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _sessions[key] = HammerSession(username, password)
+    worker.at_exit(close_sessions, worker.SESSION_PRIORITY)
+    session.login()
+    return session
+
+
+def close_sessions():
+    """Close all hammer sessions opened by the current worker."""
+    with _sessions_lock:
+        keys = [key for key in _sessions if key[0] == os.getpid()]
+        sessions = [_sessions.pop(key) for key in keys]
+    for session in sessions:
+        session.close()
@@ -0,0 +1,233 @@
+# -*- encoding: utf-8 -*-
+"""Persistent ``hammer shell`` execution backend.
+
+Running ``hammer`` once per command means that every command pays the Ruby
+interpreter boot, the apipie cache load and the authentication. This module
+keeps a long-lived ``hammer shell`` process per worker and per user over a
+single SSH channel and feeds it one command at a time.
+
+The backend is opt-in, enable it by setting ``hammer.shell=1`` in the ``main``
+section of the configuration file. :meth:`robottelo.cli.base.Base.execute`
+falls back to the one-shot mode whenever the shell gets out of sync. The
+shells are closed when the worker exits, see
+:func:`robottelo.common.worker.at_exit`.
+
+Each command output is framed by the shell prompt: whatever is received on
+stdout until the next prompt is the command's output. ``hammer shell`` does
+not report exit codes, so a command is considered failed when it writes
+anything to stderr. Because of that the shell runs without the ``-v`` flag,
+which leaves only error messages on stderr.
+
+"""
+import logging
+import os
+import paramiko
+import select
+import socket
+import threading
+import time
+
+from robottelo.common import conf, limiter, ssh, worker
+
+logger = logging.getLogger(__name__)
+
+#: The prompt printed by ``hammer shell`` when it is ready for a command.
+PROMPT = u'hammer> '
+#: Seconds to wait for the shell to start.
+START_TIMEOUT = 60
+#: Seconds to wait for stderr data after the prompt was received.
+STDERR_GRACE_TIME = 0.05
+
+# Maps (pid, username, password) to a HammerShell instance
+_shells = {}
+_shells_lock = threading.Lock()
+
+
+class HammerShellError(Exception):
+    """Indicates that the hammer shell is broken or out of sync."""
+
+
+def shell_enabled():
+    """Tell whether ``main.hammer.shell`` enables the hammer shell backend."""
+    return conf.properties.get('main.hammer.shell', '0') == '1'
+
+
+class HammerShell(object):
+    """A long-lived ``hammer shell`` process running on the server.
+
+    Commands are serialized, so a shell can be shared by many threads but it
+    will run a single command at a time. Each command takes a slot of the
+    ``ssh`` limiter, see :mod:`robottelo.common.limiter`.
+
+    """
+
+    def __init__(self, username, password, hostname=None):
+        self.username = username
+        self.password = password
+        self.hostname = hostname
+        self._client = None
+        self._channel = None
+        self._lock = threading.Lock()
+
+    @property
+    def started(self):
+        """Tell whether the shell process is up and ready."""
+        return (
+            self._channel is not None and
+            not self._channel.closed and
+            not self._channel.exit_status_ready()
+        )
+
+    def start(self):
+        """Open the SSH channel and wait for the first prompt."""
+        self._client = ssh.connect(hostname=self.hostname)
+        self._channel = self._client.get_transport().open_session()
+        self._channel.exec_command(
+            u'LANG={0} hammer -u {1} -p {2} shell'.format(
+                conf.properties['main.locale'],
+                self.username,
+                self.password,
+            ).encode('utf-8')
+        )
+        self._read_until_prompt(START_TIMEOUT)
+        logger.info(
+            'Started hammer shell for user {0}'.format(self.username))
+
+    def close(self):
+        """Terminate the shell process and close the SSH connection."""
+        if self._channel is not None:
+            try:
+                if not self._channel.closed:
+                    self._channel.sendall('exit\n')
+                self._channel.close()
+            except (socket.error, EOFError):
+                pass
+        if self._client is not None:
+            self._client.close()
+        self._channel = self._client = None
+
+    def _read_until_prompt(self, timeout):
+        """Read stdout and stderr until the prompt is received.
+
+        :return: A tuple ``(stdout, stderr)`` with the raw data received before
+            the prompt.
+        :raises HammerShellError: If the prompt is not received before
+            ``timeout`` seconds or the shell dies.
+
+        """
+        prompt = PROMPT.encode('utf-8')
+        stdout = []
+        stderr = []
+        deadline = time.time() + timeout
+        tail = ''
+        while not tail.endswith(prompt):
+            if self._channel.exit_status_ready():
+                raise HammerShellError('hammer shell exited unexpectedly')
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise HammerShellError(
+                    'Timed out waiting for the hammer shell prompt')
+            if self._channel.recv_stderr_ready():
+                stderr.append(self._channel.recv_stderr(4096))
+            if self._channel.recv_ready():
+                data = self._channel.recv(4096)
+                stdout.append(data)
+                tail = (tail + data)[-len(prompt):]
+            elif self._channel.eof_received:
+                # Nothing more will arrive
+                raise HammerShellError('hammer shell exited unexpectedly')
+            else:
+                # The channel is readable once stdout or stderr data arrives
+                select.select([self._channel], [], [], remaining)
+        # stdout and stderr are different streams on the server side, give
+        # some time to error messages which may arrive after the prompt.
+        time.sleep(STDERR_GRACE_TIME)
+        while self._channel.recv_stderr_ready():
+            stderr.append(self._channel.recv_stderr(4096))
+        stdout = ''.join(stdout)
+        return stdout[:-len(prompt)], ''.join(stderr)
+
+    def _discard_leftovers(self):
+        """Discard the output left over by the previous command.
+
+        Error messages may arrive after :data:`STDERR_GRACE_TIME`, they must
+        not be taken for the ones of the next command.
+
+        """
+        while self._channel.recv_ready():
+            self._channel.recv(4096)
+        stderr = []
+        while self._channel.recv_stderr_ready():
+            stderr.append(self._channel.recv_stderr(4096))
+        if stderr:
+            logger.warning(
+                'Discarded late hammer shell errors: %s', ''.join(stderr))
+
+    def run(self, command, output_format=None, timeout=None):
+        """Run ``command`` on the shell.
+
+        :param str command: The hammer command, without the ``hammer`` prefix.
+        :param str output_format: The hammer output format.
+        :param int timeout: Seconds to wait for the command to finish. Defaults
+            to 120 seconds as :func:`robottelo.common.ssh.command` does.
+        :rtype: robottelo.common.ssh.SSHCommandResult
+        :raises HammerShellError: If the shell is out of sync. The shell is
+            closed and should not be used anymore.
+
+        """
+        if timeout is None:
+            timeout = 120
+        if isinstance(command, unicode):
+            command = command.encode('utf-8')
+        if '\n' in command:
+            raise HammerShellError(
+                'Multiline commands are not supported by the hammer shell')
+        if output_format:
+            command = '--output={0} {1}'.format(output_format, command)
+
+        with self._lock, limiter.limit('ssh'):
+            try:
+                if not self.started:
+                    self.start()
+                self._discard_leftovers()
+                logger.debug('>>> [hammer shell] %s', command)
+                self._channel.sendall(command + '\n')
+                stdout, stderr = self._read_until_prompt(timeout)
+                # Some readline implementations echo the input line back when
+                # not attached to a terminal.
+                if stdout.startswith(command + '\n'):
+                    stdout = stdout[len(command) + 1:]
+            except (HammerShellError, socket.error, EOFError,
+                    paramiko.SSHException):
+                self.close()
+                raise HammerShellError(
+                    'hammer shell out of sync while running: {0}'
+                    .format(command)
+                )
+
+        return ssh.command_result(
+            stdout, stderr, 1 if stderr.strip() else 0, output_format)
+
+
+def get_shell(username, password):
+    """Return the hammer shell of the current worker for the given user.
+
+    :rtype: HammerShell
+
+    """
+    key = (os.getpid(), username, password)
+    with _shells_lock:
+        shell = _shells.get(key)
+        if shell is None:
+            shell = _shells[key] = HammerShell(username, password)
+    worker.at_exit(close_shells, worker.SHELL_PRIORITY)
+    return shell
+
+
+def close_shells():
+    """Close all hammer shells opened by the current worker."""
+    with _shells_lock:
+        keys = [key for key in _shells if key[0] == os.getpid()]
+        shells = [_shells.pop(key) for key in keys]
+    for shell in shells:
+        shell.close()
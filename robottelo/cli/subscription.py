@@ -36,9 +36,7 @@ class Subscription(Base):
         Upload a subscription manifest
         """
 
-        cls.command_sub = 'upload'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(cls._construct_command(options, 'upload'))
 
         return result
 
@@ -48,9 +46,8 @@ class Subscription(Base):
         Deletes a subscription manifest
         """
 
-        cls.command_sub = 'delete-manifest'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command(options, 'delete-manifest'))
 
         return result
 
@@ -60,14 +57,12 @@ class Subscription(Base):
         Refreshes a subscription manifest
         """
 
-        cls.command_sub = 'refresh-manifest'
-
-        result = cls.execute(cls._construct_command(options))
+        result = cls.execute(
+            cls._construct_command(options, 'refresh-manifest'))
 
         return result
 
     @classmethod
     def manifest_history(cls, options=None):
         """Provided history for subscription manifest"""
-        cls.command_sub = 'manifest-history'
-        return cls.execute(cls._construct_command(options))
+        return cls.execute(cls._construct_command(options, 'manifest-history'))
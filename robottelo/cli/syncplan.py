@@ -30,23 +30,6 @@ class SyncPlan(Base):
     command_requires_org = True
 
     @classmethod
-    def create(cls, options=None):
-        cls.command_requires_org = False
-
-        try:
-            result = super(SyncPlan, cls).create(options)
-        finally:
-            cls.command_requires_org = True
-
-        return result
-
-    @classmethod
-    def info(cls, options=None):
-        cls.command_requires_org = False
-
-        try:
-            result = super(SyncPlan, cls).info(options)
-        finally:
-            cls.command_requires_org = True
-
-        return result
+    def _org_required(cls, command_sub):
+        """Only the sub commands other than ``create`` and ``info``"""
+        return command_sub not in ('create', 'info')
@@ -38,10 +38,10 @@ class Template(Base):
         Returns list of types of templates.
         """
 
-        cls.command_sub = 'kinds'
-
         result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'kinds'),
+            output_format=cls._output_format()
+        )
 
         kinds = []
 
@@ -56,10 +56,10 @@ class Template(Base):
         Adds operating system, requires "id" and "operatingsystem-id".
         """
 
-        cls.command_sub = 'add-operatingsystem'
-
         result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'add-operatingsystem'),
+            output_format=cls._output_format()
+        )
 
         return result
 
@@ -69,9 +69,9 @@ class Template(Base):
         Remove operating system, requires "id" and "operatingsystem-id".
         """
 
-        cls.command_sub = 'remove-operatingsystem'
-
         result = cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'remove-operatingsystem'),
+            output_format=cls._output_format()
+        )
 
         return result
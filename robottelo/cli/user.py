@@ -33,13 +33,15 @@ class User(Base):
     @classmethod
     def add_role(cls, options=None):
         """Add a role to a user."""
-        cls.command_sub = 'add-role'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'add-role'),
+            output_format=cls._output_format()
+        )
 
     @classmethod
     def remove_role(cls, options=None):
         """Remove a role from user."""
-        cls.command_sub = 'remove-role'
         return cls.execute(
-            cls._construct_command(options), output_format='csv')
+            cls._construct_command(options, 'remove-role'),
+            output_format=cls._output_format()
+        )
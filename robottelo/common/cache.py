@@ -0,0 +1,315 @@
+# -*- encoding: utf-8 -*-
+"""Caches for the objects created by the factories.
+
+:func:`robottelo.common.decorators.cacheable` stores the objects created with
+``cached=True`` in the cache returned by :func:`get_object_cache`, keyed by the
+factory and its options, see :func:`cache_key`. Two backends are available,
+chosen by ``object_cache`` in the ``main`` section of the configuration file:
+
+``memory``
+    The default. Objects are shared by the tests run by the same process.
+
+``shared``
+    Objects are stored in a SQLite database under the application root,
+    :data:`SHARED_CACHE_PATH`, so all the processes of a run, like the nose
+    ``--processes`` workers, share them. A lock file per key makes sure a
+    single process creates each object. The objects are scoped to the run,
+    see :data:`robottelo.common.worker.RUN_ID`: the objects of the previous
+    runs, likely deleted since, are dropped.
+
+Both backends keep up to ``object_cache.size`` objects, evicting the least
+recently used ones, and drop the objects older than ``object_cache.ttl``
+seconds. The ``memory`` backend keeps them until they are evicted by default,
+the ``shared`` one :data:`DEFAULT_SHARED_TTL` seconds.
+
+"""
+import collections
+import cPickle as pickle
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from contextlib import contextmanager
+from robottelo.common import conf, get_app_root, worker
+
+logger = logging.getLogger(__name__)
+
+#: How many objects are cached by default.
+DEFAULT_SIZE = 128
+#: Seconds to keep the objects of the ``shared`` backend by default.
+DEFAULT_SHARED_TTL = 3600
+#: The database of the ``shared`` backend.
+SHARED_CACHE_PATH = os.path.join(
+    get_app_root(), 'data', 'object_cache', 'objects.sqlite')
+
+# The cache returned by get_object_cache and the configuration it was built
+# with
+_object_cache = None
+_object_cache_config = None
+_object_cache_lock = threading.Lock()
+
+
+def _normalize(value):
+    """Return ``value`` in a canonical form
+
+    Options are passed to hammer as strings, so scalars are turned into
+    unicode strings. ``None`` values are omitted by hammer, so they are
+    dropped from dictionaries.
+
+    """
+    if isinstance(value, dict):
+        return dict(
+            (_normalize(key), _normalize(item))
+            for key, item in value.items() if item is not None
+        )
+    if isinstance(value, (set, frozenset)):
+        return sorted(_normalize(item) for item in value)
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        return value.decode('utf-8')
+    return unicode(value)
+
+
+def cache_key(name, options):
+    """Return the cache key of the object created by ``name`` with ``options``
+
+    Options which would produce the same object, like ``{u'id': 1}`` and
+    ``{'id': '1', 'name': None}``, give the same key.
+
+    :param str name: The name of the factory.
+    :param dict options: The factory options.
+    :rtype: str
+
+    """
+    return '{0}:{1}'.format(
+        name, json.dumps(_normalize(options or {}), sort_keys=True))
+
+
+class MemoryCache(object):
+    """A cache of the objects of the current process
+
+    :param int size: How many objects to keep.
+    :param int ttl: Seconds to keep each object, ``0`` to keep them until they
+        are evicted.
+
+    """
+
+    def __init__(self, size=DEFAULT_SIZE, ttl=0):
+        self.size = size
+        self.ttl = ttl
+        self._objects = collections.OrderedDict()
+        self._lock = threading.Lock()
+        # Maps the keys being locked to a [lock, number of users] list
+        self._key_locks = {}
+
+    def get(self, key):
+        """Return the object cached for ``key`` or ``None``"""
+        with self._lock:
+            entry = self._objects.pop(key, None)
+            if entry is None:
+                return None
+            created, value = entry
+            if self.ttl and time.time() - created > self.ttl:
+                return None
+            # Mark as most recently used
+            self._objects[key] = entry
+            return value
+
+    def put(self, key, value):
+        """Cache ``value`` for ``key``"""
+        with self._lock:
+            self._objects.pop(key, None)
+            self._objects[key] = (time.time(), value)
+            while len(self._objects) > self.size:
+                self._objects.popitem(last=False)
+
+    def clear(self):
+        """Drop all the cached objects"""
+        with self._lock:
+            self._objects.clear()
+
+    @contextmanager
+    def lock(self, key):
+        """Hold the lock of ``key``
+
+        Use it around the lookup and the creation of an object so that
+        concurrent threads create it once. The lock is dropped once no
+        thread uses it.
+
+        """
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._key_locks[key]
+
+
+class SharedCache(object):
+    """A cache of objects shared by processes through a SQLite database
+
+    Objects are pickled. The database and the lock files are created in the
+    directory of ``path``. Only the objects of the run ``run_id`` are seen,
+    the objects of the other runs are dropped.
+
+    :param str path: The database path. Defaults to
+        :data:`SHARED_CACHE_PATH`.
+    :param int size: How many objects to keep.
+    :param int ttl: Seconds to keep each object, ``0`` to keep them until they
+        are evicted.
+    :param str run_id: The run the objects belong to. Defaults to
+        :data:`robottelo.common.worker.RUN_ID`.
+
+    """
+
+    def __init__(self, path=None, size=DEFAULT_SIZE, ttl=DEFAULT_SHARED_TTL,
+                 run_id=None):
+        if path is None:
+            path = SHARED_CACHE_PATH
+        if run_id is None:
+            run_id = worker.RUN_ID
+        self.path = path
+        self.size = size
+        self.ttl = ttl
+        self.run_id = run_id
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                # Created by another process meanwhile
+                if not os.path.isdir(directory):
+                    raise
+        with self._connect() as connection:
+            # The objects table of the former releases was not run scoped
+            connection.execute('DROP TABLE IF EXISTS objects')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS run_objects ('
+                'run TEXT, key TEXT, value BLOB, created REAL, used REAL, '
+                'PRIMARY KEY (run, key))'
+            )
+            connection.execute(
+                'DELETE FROM run_objects WHERE run != ?', (run_id,))
+
+    def _connect(self):
+        """Open a connection to the database
+
+        Connections are not shared, they cannot be used by many threads nor
+        after a fork. Used as a context manager the connection commits.
+
+        """
+        return sqlite3.connect(self.path, timeout=60)
+
+    def get(self, key):
+        """Return the object cached for ``key`` or ``None``"""
+        with self._connect() as connection:
+            row = connection.execute(
+                'SELECT value, created FROM run_objects '
+                'WHERE run = ? AND key = ?',
+                (self.run_id, key)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            now = time.time()
+            if self.ttl and now - created > self.ttl:
+                connection.execute(
+                    'DELETE FROM run_objects WHERE run = ? AND key = ?',
+                    (self.run_id, key)
+                )
+                return None
+            connection.execute(
+                'UPDATE run_objects SET used = ? WHERE run = ? AND key = ?',
+                (now, self.run_id, key)
+            )
+        return pickle.loads(str(value))
+
+    def put(self, key, value):
+        """Cache ``value`` for ``key``"""
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO run_objects VALUES (?, ?, ?, ?, ?)',
+                (
+                    self.run_id,
+                    key,
+                    sqlite3.Binary(pickle.dumps(value, 2)),
+                    now,
+                    now,
+                )
+            )
+            connection.execute(
+                'DELETE FROM run_objects WHERE run = ? AND key NOT IN ('
+                'SELECT key FROM run_objects WHERE run = ? '
+                'ORDER BY used DESC LIMIT ?)',
+                (self.run_id, self.run_id, self.size)
+            )
+
+    def clear(self):
+        """Drop all the cached objects"""
+        with self._connect() as connection:
+            connection.execute(
+                'DELETE FROM run_objects WHERE run = ?', (self.run_id,))
+
+    @contextmanager
+    def lock(self, key):
+        """Hold the lock of ``key``
+
+        Use it around the lookup and the creation of an object so that
+        concurrent threads and processes create it once.
+
+        """
+        lock_path = os.path.join(
+            os.path.dirname(self.path),
+            '{0}.lock'.format(hashlib.sha1(u'{0}:{1}'.format(
+                self.run_id, key).encode('utf-8')).hexdigest())
+        )
+        with open(lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def get_object_cache():
+    """Return the object cache configured by ``main.object_cache``
+
+    The cache is built again when the configuration changes.
+
+    :rtype: MemoryCache or SharedCache
+
+    """
+    global _object_cache, _object_cache_config  # pylint:disable=W0603
+    backend = conf.properties.get('main.object_cache', 'memory')
+    config = (
+        backend,
+        int(conf.properties.get('main.object_cache.size', DEFAULT_SIZE)),
+        int(conf.properties.get(
+            'main.object_cache.ttl',
+            DEFAULT_SHARED_TTL if backend == 'shared' else 0
+        )),
+    )
+    with _object_cache_lock:
+        if _object_cache is None or config != _object_cache_config:
+            backend, size, ttl = config
+            if backend == 'shared':
+                _object_cache = SharedCache(size=size, ttl=ttl)
+            else:
+                _object_cache = MemoryCache(size=size, ttl=ttl)
+            _object_cache_config = config
+            logger.debug('Using the {0} object cache'.format(backend))
+        return _object_cache
@@ -12,8 +12,10 @@ except ImportError:
 
 from ddt import data as ddt_data
 from functools import wraps
-from robottelo.common import conf
+from robottelo.common import conf, registry
+from robottelo.common.cache import SharedCache, cache_key, get_object_cache
 from robottelo.common.constants import NOT_IMPLEMENTED
+from robottelo.common.shard import namespace
 from xml.parsers.expat import ExpatError, errors
 from xmlrpclib import Fault
 
@@ -21,7 +23,6 @@ from xmlrpclib import Fault
 BUGZILLA_URL = "https://bugzilla.redhat.com/xmlrpc.cgi"
 BUGZILLA_OPEN_BUG_STATUSES = ('NEW', 'ASSIGNED', 'POST', 'MODIFIED')
 REDMINE_URL = 'http://projects.theforeman.org'
-OBJECT_CACHE = {}
 
 # A dict mapping bug IDs to python-bugzilla bug objects.
 _bugzilla = {}
@@ -61,7 +62,18 @@ def stubbed(reason=None):
 
 
 def cacheable(func):
-    """Decorator that makes an optional object cache available"""
+    """Decorator that makes an optional object cache available
+
+    Calling the decorated factory with ``cached=True`` returns the object
+    created the first time it was called with the same options, see
+    :mod:`robottelo.common.cache`.
+
+    The cached objects outlive the scope of the test creating them, so
+    :mod:`robottelo.common.registry` deletes them with the ``session`` scope
+    of the process. The objects of a shared cache are used by other
+    processes too and are not tracked.
+
+    """
 
     @wraps(func)
     def cacheable_function(options=None, cached=False):
@@ -69,12 +81,30 @@ def cacheable(func):
         This is the function being returned.
         Requires input function's name start with 'make_'
         """
-        object_key = func.__name__.replace('make_', '')
-        if cached is True and object_key in OBJECT_CACHE:
-            return OBJECT_CACHE[object_key]
-        new_object = func(options)
-        if cached is True:
-            OBJECT_CACHE[object_key] = new_object
+        if cached is not True:
+            return func(options)
+        object_cache = get_object_cache()
+        shard_name = namespace()
+        # Objects of different servers, or of different shards, must not be
+        # mixed in a shared cache
+        object_key = cache_key(
+            u'{0}@{1}{2}'.format(
+                func.__name__.replace('make_', ''),
+                conf.properties.get('main.server.hostname'),
+                u'/{0}'.format(shard_name) if shard_name else u'',
+            ),
+            options
+        )
+        with object_cache.lock(object_key):
+            new_object = object_cache.get(object_key)
+            if new_object is None:
+                if isinstance(object_cache, SharedCache):
+                    scope = registry.registry.untracked()
+                else:
+                    scope = registry.registry.session()
+                with scope:
+                    new_object = func(options)
+                object_cache.put(object_key, new_object)
         return new_object
 
     return cacheable_function
@@ -0,0 +1,249 @@
+# -*- encoding: utf-8 -*-
+"""Run tasks depending on each other, concurrently where possible.
+
+A graph is described by a dictionary mapping each node to the nodes it depends
+on::
+
+    dependencies = {
+        'org': (),
+        'product': ('org',),
+        'lifecycle_environment': ('org',),
+        'repository': ('product',),
+    }
+    outcome = run(dependencies, create)
+
+:func:`run` calls ``create`` for each node once all the nodes it depends on
+are done. ``product`` and ``lifecycle_environment`` are then created at the
+same time.
+
+"""
+import collections
+import inspect
+import logging
+import Queue
+import time
+
+from multiprocessing.pool import ThreadPool
+from nailgun import entity_mixins
+
+logger = logging.getLogger(__name__)
+
+#: How many nodes :func:`run` processes at the same time by default.
+DEFAULT_MAX_WORKERS = 4
+
+#: The outcome of :func:`run`. ``results`` maps the nodes processed to the
+#: value returned for them and ``errors`` maps the failed nodes to the
+#: exception raised. ``skipped`` lists the nodes not processed because a node
+#: they depend on failed. ``timings`` maps the nodes, in completion order, to
+#: the seconds spent on them.
+GraphOutcome = collections.namedtuple(
+    'GraphOutcome', ('results', 'errors', 'skipped', 'timings'))
+
+
+class GraphError(Exception):
+    """Indicates that a dependency graph is not valid."""
+
+
+def topological_order(dependencies):
+    """Return the nodes of a graph, each one after the nodes it depends on
+
+    The order of the independent nodes is stable: they come in the order of
+    ``dependencies`` if it is ordered.
+
+    :param dict dependencies: Maps each node to an iterable of the nodes it
+        depends on.
+    :rtype: list
+    :raises GraphError: If a node depends on an unknown node or if the graph
+        has a cycle.
+
+    """
+    for node, node_dependencies in dependencies.items():
+        for dependency in node_dependencies:
+            if dependency not in dependencies:
+                raise GraphError(
+                    '{0} depends on unknown node {1}'.format(node, dependency))
+    order = []
+    # 1 while visiting a node, 2 once visited
+    states = {}
+    for root in dependencies:
+        if root in states:
+            continue
+        stack = [(root, iter(dependencies[root]))]
+        states[root] = 1
+        while stack:
+            node, remaining = stack[-1]
+            for dependency in remaining:
+                state = states.get(dependency)
+                if state == 1:
+                    raise GraphError(
+                        'Dependency cycle between {0} and {1}'.format(
+                            node, dependency))
+                if state is None:
+                    states[dependency] = 1
+                    stack.append(
+                        (dependency, iter(dependencies[dependency])))
+                    break
+            else:
+                stack.pop()
+                states[node] = 2
+                order.append(node)
+    return order
+
+
+def reverse(dependencies):
+    """Return the graph of the dependents of each node
+
+    :param dict dependencies: Maps each node to an iterable of the nodes it
+        depends on.
+    :return: A dictionary mapping each node to a list of the nodes depending
+        on it.
+
+    """
+    dependents = collections.OrderedDict(
+        (node, []) for node in dependencies)
+    for node, node_dependencies in dependencies.items():
+        for dependency in node_dependencies:
+            dependents[dependency].append(node)
+    return dependents
+
+
+def run(dependencies, function, max_workers=DEFAULT_MAX_WORKERS):
+    """Call ``function`` for each node once the nodes it depends on are done
+
+    Up to ``max_workers`` nodes are processed at the same time, on threads. A
+    node whose ``function`` call raises an exception is failed and the nodes
+    depending on it, directly or not, are skipped. The other nodes are still
+    processed.
+
+    :param dict dependencies: Maps each node to an iterable of the nodes it
+        depends on.
+    :param function: Called with each node, its return value is the result
+        of the node.
+    :param int max_workers: How many nodes to process at the same time.
+    :rtype: GraphOutcome
+    :raises GraphError: If the graph is not valid, see
+        :func:`topological_order`.
+
+    """
+    pending = collections.OrderedDict(
+        (node, set(dependencies[node]))
+        for node in topological_order(dependencies)
+    )
+    outcome = GraphOutcome({}, {}, [], collections.OrderedDict())
+    done = Queue.Queue()
+
+    def process(node):
+        """Call ``function`` for ``node`` and queue the outcome"""
+        start = time.time()
+        try:
+            value, error = function(node), None
+        except Exception as err:  # pylint:disable=broad-except
+            logger.debug('{0} failed'.format(node), exc_info=True)
+            value, error = None, err
+        done.put((node, value, error, time.time() - start))
+
+    pool = ThreadPool(max(1, max_workers))
+    running = 0
+    try:
+        while pending or running:
+            for node, node_dependencies in pending.items():
+                if node_dependencies.issubset(outcome.results):
+                    del pending[node]
+                    pool.apply_async(process, (node,))
+                    running += 1
+            if not running:
+                break
+            node, value, error, elapsed = done.get()
+            running -= 1
+            outcome.timings[node] = elapsed
+            if error is None:
+                outcome.results[node] = value
+                continue
+            outcome.errors[node] = error
+            # Skip the nodes depending on the failed one, directly or not
+            failed = set([node])
+            for other in topological_order(dependencies):
+                if other in pending and pending[other] & failed:
+                    del pending[other]
+                    outcome.skipped.append(other)
+                    failed.add(other)
+    finally:
+        pool.close()
+        pool.join()
+    return outcome
+
+
+def _reachable(dependencies, start):
+    """Return the nodes reachable from ``start``, ``start`` included"""
+    stack = [start]
+    seen = set(stack)
+    while stack:
+        node = stack.pop()
+        for dependency in dependencies.get(node, ()):
+            if dependency not in seen:
+                seen.add(dependency)
+                stack.append(dependency)
+    return seen
+
+
+def transitive_closure(dependencies):
+    """Return the nodes each node depends on, directly or not
+
+    :param dict dependencies: Maps each node to an iterable of the nodes it
+        depends on.
+    :return: A dictionary mapping each node to a set of nodes.
+
+    """
+    return dict(
+        (node, _reachable(dependencies, node) - set([node]))
+        for node in dependencies
+    )
+
+
+def entity_relationships(module):
+    """Return the relationships between the entities defined in ``module``
+
+    :param module: A module defining ``nailgun.entity_mixins.Entity``
+        subclasses, like :mod:`robottelo.entities`.
+    :return: A dictionary mapping each entity class name to a list of
+        ``(field_name, entity_name, required)`` tuples, one per field
+        referencing another entity.
+
+    """
+    relationships = {}
+    for name, klass in inspect.getmembers(module, inspect.isclass):
+        if not issubclass(klass, entity_mixins.Entity):
+            continue
+        relationships[name] = [
+            (field_name, field.entity, field.required)
+            for field_name, field in sorted(klass.get_fields().items())
+            if isinstance(field, (entity_mixins.OneToOneField,
+                                  entity_mixins.OneToManyField))
+        ]
+    return relationships
+
+
+def entity_dependencies(module):
+    """Return the dependency graph of the entities defined in ``module``
+
+    An entity depends on the entities its fields reference. The graph has no
+    cycles: all the relationships of required fields are kept, the other
+    ones are dropped if they would close a cycle.
+
+    :param module: See :func:`entity_relationships`.
+    :return: A dictionary mapping each entity class name to a set of the
+        names of the entities it depends on.
+
+    """
+    relationships = entity_relationships(module)
+    dependencies = dict((name, set()) for name in relationships)
+    for required in (True, False):
+        for name in sorted(relationships):
+            for _, entity_name, field_required in relationships[name]:
+                if (field_required is not required or
+                        entity_name == name or
+                        entity_name not in dependencies or
+                        name in _reachable(dependencies, entity_name)):
+                    continue
+                dependencies[name].add(entity_name)
+    return dependencies
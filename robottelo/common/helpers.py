@@ -3,6 +3,10 @@
 Several helper methods and functions.
 """
 
+import collections
+import copy
+import csv
+import json
 import logging
 import os
 import re
@@ -210,23 +214,194 @@ def generate_strings_list(len1=None, remove_str=None, bug_id=None):
     return list(strings.values())
 
 
+def _csv_rows(lines):
+    """Generate the list of values of each CSV record of ``lines``.
+
+    Empty lines are skipped. Quoted values may contain commas, escaped quotes
+    (``""``) and line breaks.
+
+    """
+    reader = csv.reader(line.encode('utf-8') + '\n' for line in lines)
+    for values in reader:
+        if values:
+            yield [value.decode('utf-8') for value in values]
+
+
+def _csv_keys(headers):
+    """Return the dictionary keys matching the CSV ``headers``."""
+    return [header.replace(' ', '-').lower() for header in headers]
+
+
+class CSVTable(collections.Sequence):
+    """A CSV output of Hammer CLI stored column by column.
+
+    It behaves as a read only list of dictionaries, one per record, keyed by
+    the lower cased, dash separated, header names. Values are stored once per
+    column, which uses a fraction of the memory a list of dictionaries needs
+    for big outputs. The dictionaries are built on demand: the ones accessed
+    by index are kept afterwards, so they can be updated, while iterating
+    builds throwaway dictionaries for the records never accessed by index.
+
+    :meth:`find` looks records up by the value of a column, ``id`` or ``name``
+    for example, using an index built on the first lookup.
+
+    """
+    # Marks the values missing from records shorter than the header
+    _missing = object()
+
+    def __init__(self, keys, rows=()):
+        self.keys = list(keys)
+        self._columns = [[] for _ in self.keys]
+        self._length = 0
+        for values in rows:
+            for column, value in izip(self._columns, values):
+                column.append(value)
+            for column in self._columns[len(values):]:
+                column.append(self._missing)
+            self._length += 1
+        self._records = {}
+        self._indexes = {}
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('CSVTable index out of range')
+        record = self._records.get(index)
+        if record is None:
+            record = self._records[index] = self._record(index)
+        return record
+
+    def __iter__(self):
+        for index in range(self._length):
+            record = self._records.get(index)
+            yield self._record(index) if record is None else record
+
+    def _record(self, index):
+        """Build the dictionary of the record at ``index``."""
+        return dict(
+            (key, column[index])
+            for key, column in izip(self.keys, self._columns)
+            if column[index] is not self._missing
+        )
+
+    def __eq__(self, other):
+        if isinstance(other, (list, tuple, CSVTable)):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def __deepcopy__(self, memo):
+        # Values are immutable and columns are never changed, so they can be
+        # shared. Only the records built so far, which may be updated, are
+        # copied.
+        table = CSVTable.__new__(CSVTable)
+        table.keys = list(self.keys)
+        table._columns = self._columns
+        table._length = self._length
+        table._records = copy.deepcopy(self._records, memo)
+        table._indexes = {}
+        return table
+
+    def column(self, key):
+        """Return the list of values of the column ``key``.
+
+        :raises KeyError: If there is no such column.
+
+        """
+        try:
+            column = self._columns[self.keys.index(key)]
+        except ValueError:
+            raise KeyError(key)
+        return [value for value in column if value is not self._missing]
+
+    def find(self, key, value):
+        """Return the first record whose ``key`` column equals ``value``.
+
+        :return: The record dictionary or ``None`` if there is no such record.
+
+        """
+        index = self._indexes.get(key)
+        if index is None:
+            index = self._indexes[key] = {}
+            if key in self.keys:
+                column = self._columns[self.keys.index(key)]
+                for position in range(self._length - 1, -1, -1):
+                    index[column[position]] = position
+        position = index.get(value)
+        return None if position is None else self[position]
+
+
 def csv_to_dictionary(data):
+    """Converts CSV data from Hammer CLI to a list of dictionaries.
+
+    :param data: An iterable of unicode lines, the first non empty one being
+        the header. It is consumed one line at a time and left unchanged.
+    :return: A list like table of dictionaries keyed by the lower cased, dash
+        separated, header names.
+    :rtype: CSVTable
+
     """
-    Converts CSV data from Hammer CLI and returns a python dictionary.
+    rows = _csv_rows(data)
+    headers = next(rows, [])
+    return CSVTable(_csv_keys(headers), rows)
+
+
+def _json_object(pairs):
+    """Build a dictionary from the JSON object ``pairs``, see
+    :func:`json_to_dictionary`.
+
     """
+    return dict((key.replace(' ', '-').lower(), value) for key, value in pairs)
 
-    records = []
 
-    items = data
-    headers = items.pop(0)
-    dic_values = [item.split(',') for item in items if len(item) > 0]
+def json_to_dictionary(data):
+    """Converts JSON data from Hammer CLI to python objects.
 
-    dic_keys = [x.replace(' ', '-').lower() for x in headers.split(',')]
+    Values keep their JSON types: numbers, booleans, nested lists and
+    dictionaries. Object keys are lower cased and dash separated, as
+    :func:`csv_to_dictionary` does with the CSV headers.
+
+    :param str data: The JSON document.
+    :return: A dictionary for ``info`` like commands, a list of dictionaries
+        for ``list`` like commands.
+
+    """
+    return json.loads(data, object_pairs_hook=_json_object)
 
-    for value in dic_values:
-        records.append(dict(izip(dic_keys, value)))
 
-    return records
+def csv_records(lines):
+    """Generate a dictionary per CSV record from Hammer CLI output ``lines``.
+
+    Unlike :func:`csv_to_dictionary` the records are not kept, so it can be
+    fed by :func:`robottelo.common.ssh.command_stream` without holding the
+    whole output in memory::
+
+        stream = ssh.command_stream(cmd, output_format='csv')
+        for record in csv_records(stream):
+            ...
+
+    :param lines: An iterable of unicode lines, the first non empty one being
+        the header.
+    :return: A generator of dictionaries keyed by the lower cased, dash
+        separated, header names.
+
+    """
+    rows = _csv_rows(lines)
+    keys = _csv_keys(next(rows, []))
+    for values in rows:
+        yield dict(izip(keys, values))
 
 
 def escape_search(term):
@@ -255,87 +430,120 @@ def update_dictionary(default, updates):
     return default
 
 
+_INFO_NUMBERED_KEY = re.compile(r'(\d+)\)\s*')
+_INFO_NUMBERED_VALUE = re.compile(r'\d+\)\s+(.+)$')
+# Maps the hammer labels to dictionary keys, there are few distinct labels
+_INFO_KEYS = {}
+_INFO_KEYS_MAX_SIZE = 2000
+
+
+def _info_key(label):
+    """Return the dictionary key for the hammer ``label``."""
+    key = _INFO_KEYS.get(label)
+    if key is None:
+        key = label.lstrip().replace(' ', '-').lower()
+        if len(_INFO_KEYS) < _INFO_KEYS_MAX_SIZE:
+            _INFO_KEYS[label] = key
+    return key
+
+
 def info_dictionary(result):
+    """Convert the output of a hammer ``info`` command to a dictionary.
+
+    ``result.stdout`` must be the list of output lines, it is replaced by a
+    dictionary and ``result`` is returned. The lines are parsed in a single
+    pass, for example::
+
+        Name:        zoo
+        Product:
+            ID:      1
+        Content:
+         1) Repo Name: repo1
+            Types:
+                1) bugfix
+        Modules:
+         1) module1
+
+    is converted to::
+
+        {
+            'name': 'zoo',
+            'product': {'id': '1'},
+            'content': [{'repo-name': 'repo1', 'types': ['bugfix']}],
+            'modules': ['module1'],
+        }
+
+    Keys are lowercased and their spaces replaced by dashes. Properties
+    without a value hold the more indented lines below them: a dictionary for
+    ``key: value`` or ``key => value`` lines, a list for numbered entries or
+    lines without any separator.
+
     """
-    Function for converting result to dictionary, from info function in base..
-    """
-    # info dictionary
-    r = {}
-    sub_prop = None  # stores name of the last group of sub-properties
-    sub_num = None  # is not None when list of properties
+    info = {}
+    # Each frame is an (indent, parent, key) tuple: the lines indented deeper
+    # than indent belong to parent[key].
+    stack = []
 
     for line in result.stdout:
-        # skip empty lines
         if line == '':
             continue
-        if line.startswith(' '):  # sub-properties are indented
-            # values are separated by ':' or '=>'
-            if line.find(':') != -1:
-                key, value = line.lstrip().split(":", 1)
-            elif line.find('=>') != -1:
-                key, value = line.lstrip().split(" =>", 1)
+        if line[0] != ' ' or not stack:
+            key, value = line.lstrip(' ').split(':', 1)
+            key = _info_key(key)
+            value = value.lstrip()
+            if value == '':
+                info[key] = {}
+                stack = [(0, info, key)]
             else:
-                key = value = None
-
-            if key is None and value is None:
-                # Parse single attribute collection properties
-                # Template
-                #  1) template1
-                #  2) template2
-                #
-                # or
-                # Template
-                #  template1
-                #  template2
-                match = re.match(r'\d+\)\s+(.+)$', line.lstrip())
-
-                if match is None:
-                    match = re.match(r'(.*)$', line.lstrip())
-
-                value = match.group(1)
+                info[key] = value
+                stack = []
+            continue
 
-                if isinstance(r[sub_prop], dict):
-                    r[sub_prop] = []
+        text = line.lstrip(' ')
+        indent = len(line) - len(text)
+        while stack[-1][0] >= indent:
+            stack.pop()
+        _, parent, parent_key = stack[-1]
+        container = parent[parent_key]
+
+        if ':' in text:
+            key, value = text.split(':', 1)
+        elif '=>' in text:
+            key, _, value = text.partition(' =>')
+        else:
+            # Single attribute collection, numbered or not
+            if type(container) is not list:
+                container = parent[parent_key] = []
+            match = text[:1].isdigit() and _INFO_NUMBERED_VALUE.match(text)
+            container.append(match.group(1) if match else text)
+            continue
 
-                r[sub_prop].append(value)
+        if key[0].isdigit():
+            match = _INFO_NUMBERED_KEY.match(key)
+            if match is not None:
+                # A new item of a collection of properties
+                if (int(match.group(1)) == 1 or
+                        type(container) is not list):
+                    container = parent[parent_key] = []
+                container.append({})
+                stack.append((indent, container, len(container) - 1))
+                indent += match.end()
+                key = key[match.end():]
+        if type(container) is not dict:
+            if type(container) is not list:
+                container = parent[parent_key] = {}
             else:
-                # some properties have many numbered values
-                # Example:
-                # Content:
-                #  1) Repo Name: repo1
-                #     URL:       /custom/4f84fc90-9ffa-...
-                #  2) Repo Name: puppet1
-                #     URL:       /custom/4f84fc90-9ffa-...
-                starts_with_number = re.match(r'(\d+)\)', key)
-                if starts_with_number:
-                    sub_num = int(starts_with_number.group(1))
-                    # no. 1) we need to change dict() to list()
-                    if sub_num == 1:
-                        r[sub_prop] = []
-                    # remove number from key
-                    key = re.sub(r'\d+\)', '', key)
-                    # append empty dict to array
-                    r[sub_prop].append({})
-
-                key = key.lstrip().replace(' ', '-').lower()
-
-                # add value to dictionary
-                if sub_num is not None:
-                    r[sub_prop][-1][key] = value.lstrip()
-                else:
-                    r[sub_prop][key] = value.lstrip()
-        else:
-            sub_num = None  # new property implies no sub property
-            key, value = line.lstrip().split(":", 1)
-            key = key.lstrip().replace(' ', '-').lower()
-            if value.lstrip() == '':  # 'key:' no value, new sub-property
-                sub_prop = key
-                r[sub_prop] = {}
-            else:  # 'key: value' line
-                r[key] = value.lstrip()
+                if not container or type(container[-1]) is not dict:
+                    container.append({})
+                container = container[-1]
+
+        key = _info_key(key)
+        value = container[key] = value.lstrip()
+        if value == '':
+            stack.append((indent, container, key))
 
     # update result
-    result.stdout = r
+    result.stdout = info
 
     return result
 
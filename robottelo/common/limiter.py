@@ -0,0 +1,445 @@
+# -*- encoding: utf-8 -*-
+"""Adaptive limits on the operations running at the same time on the server.
+
+Parallel runs can saturate the server: its queues grow, latency climbs and
+commands end up hitting their timeout. A limiter caps the operations of a
+kind, SSH commands or API calls, which run at the same time, and adapts the
+cap to how the server copes (additive increase, multiplicative decrease):
+
+* each operation completed in time while the cap was reached raises the cap
+  by ``1 / cap``, that is by one operation per round of operations;
+* an operation which fails, or which takes more than ``limiter.latency``
+  seconds, halves the cap. Only one decrease happens per congestion event:
+  the operations started before the last decrease do not decrease it again.
+
+The cap and the operations running are shared by all the processes of a run,
+like the nose ``--processes`` workers, through a state file per limiter
+locked with ``flock``, see :data:`robottelo.common.worker.RUN_ID`. The slots
+of the processes which died are given back.
+
+Operations wait for a slot when the cap is reached::
+
+    with limit('ssh'):
+        run_the_command()
+
+The commands of :mod:`robottelo.common.ssh` and of the hammer shell, and the
+functions of :mod:`robottelo.api.client`, used by :mod:`robottelo.entities`,
+are limited with the ``ssh`` and ``api`` limiters. A pipeline of commands
+takes a single slot, its latency is the one of its slowest command.
+:func:`stats` reports the current caps and queue depths.
+
+Limiting is opt-in, set ``limiter`` to ``1`` in the ``main`` section of the
+configuration file. ``limiter.initial``, ``limiter.max`` and
+``limiter.latency`` change the initial cap, the maximum cap and the latency
+threshold. Suffix them with the limiter name, like ``limiter.max.ssh``, to
+change them for one limiter only.
+
+"""
+import errno
+import fcntl
+import functools
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from contextlib import contextmanager
+from robottelo.common import conf, worker
+
+logger = logging.getLogger(__name__)
+
+#: The initial cap of operations running at the same time.
+DEFAULT_INITIAL = 4
+#: The maximum cap of operations running at the same time.
+DEFAULT_MAXIMUM = 32
+#: The latency, in seconds, above which the server is deemed congested.
+DEFAULT_LATENCY = 60
+#: The factor applied to the cap when the server is congested.
+DECREASE_FACTOR = 0.5
+#: The weight of the last operation in the average latency.
+LATENCY_WEIGHT = 0.1
+#: Seconds between two checks for a slot given back by another process.
+POLL_INTERVAL = 0.05
+#: The directory of the state files shared by the processes of a run.
+STATE_DIRECTORY = tempfile.gettempdir()
+
+# Maps (pid, name) to an AdaptiveLimiter instance
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter_enabled():
+    """Tell whether ``main.limiter`` enables the limiters"""
+    return conf.properties.get('main.limiter', '0') == '1'
+
+
+def _setting(name, key, default):
+    """Return ``main.limiter.<key>.<name>`` if set, ``main.limiter.<key>``
+    otherwise
+
+    """
+    return float(conf.properties.get(
+        'main.limiter.{0}.{1}'.format(key, name),
+        conf.properties.get('main.limiter.{0}'.format(key), default)
+    ))
+
+
+def _state_path(name):
+    """Return the path of the state file of the ``name`` limiter of the
+    current run
+
+    """
+    return os.path.join(
+        STATE_DIRECTORY,
+        'robottelo-limiter-{0}-{1}.json'.format(worker.RUN_ID, name)
+    )
+
+
+def _alive(pid):
+    """Tell whether the process ``pid`` is running"""
+    try:
+        os.kill(int(pid), 0)
+    except OSError as err:
+        return err.errno == errno.EPERM
+    return True
+
+
+def _add(counts, pid, value):
+    """Add ``value`` to the count of ``pid`` in ``counts``, dropping it once
+    it reaches zero
+
+    """
+    counts[pid] = counts.get(pid, 0) + value
+    if counts[pid] <= 0:
+        del counts[pid]
+
+
+class AdaptiveLimiter(object):
+    """Cap the operations running at the same time, adapting the cap
+
+    The cap, the operations running and waiting and the decreases are shared
+    by the processes using the same state file, the other counters are the
+    ones of the current process.
+
+    :param str name: The name of the limiter, for the reports.
+    :param int initial: The initial cap.
+    :param int maximum: The maximum cap.
+    :param float latency: The latency, in seconds, above which an operation
+        counts as a congestion signal.
+    :param int minimum: The minimum cap.
+    :param str path: The state file. Defaults to the file of the ``name``
+        limiter of the current run.
+
+    """
+
+    def __init__(self, name, initial=DEFAULT_INITIAL, maximum=DEFAULT_MAXIMUM,
+                 latency=DEFAULT_LATENCY, minimum=1, path=None):
+        self.name = name
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.latency = latency
+        self.initial = float(min(max(initial, self.minimum), self.maximum))
+        self.path = _state_path(name) if path is None else path
+        #: The operations of the current process waiting for a slot.
+        self.queued = 0
+        #: The most operations which waited for a slot at the same time.
+        self.max_queued = 0
+        #: The operations completed, failed ones included.
+        self.completed = 0
+        #: The operations failed.
+        self.failed = 0
+        #: The average latency of the operations, in seconds.
+        self.average_latency = None
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def _state(self):
+        """Yield the shared state, saved when the block ends
+
+        The state file is locked meanwhile. ``holders`` and ``waiting`` map
+        the process ids to their operations running and waiting for a slot,
+        the dead processes are dropped.
+
+        """
+        with open(self.path, 'a+') as state_file:
+            fcntl.flock(state_file, fcntl.LOCK_EX)
+            try:
+                state_file.seek(0)
+                data = state_file.read()
+                if data:
+                    state = json.loads(data)
+                else:
+                    state = {
+                        'limit': self.initial,
+                        'holders': {},
+                        'waiting': {},
+                        'last_decrease': 0,
+                        'decreases': 0,
+                    }
+                for counts in (state['holders'], state['waiting']):
+                    for pid in list(counts):
+                        if not _alive(pid):
+                            del counts[pid]
+                yield state
+                state_file.seek(0)
+                state_file.truncate()
+                state_file.write(json.dumps(state))
+                state_file.flush()
+            finally:
+                fcntl.flock(state_file, fcntl.LOCK_UN)
+
+    @property
+    def limit(self):
+        """The current cap, a float growing by fractions of operation"""
+        with self._state() as state:
+            return state['limit']
+
+    def acquire(self, blocking=True):
+        """Wait for a slot and take it
+
+        :param bool blocking: Whether to wait for a slot, ``None`` is
+            returned at once if none is free otherwise.
+        :return: The time the operation starts, to give to :meth:`release`.
+
+        """
+        pid = str(os.getpid())
+        waiting = False
+        with self._condition:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+        try:
+            while True:
+                with self._state() as state:
+                    if sum(state['holders'].values()) < int(state['limit']):
+                        _add(state['holders'], pid, 1)
+                        if waiting:
+                            _add(state['waiting'], pid, -1)
+                            waiting = False
+                        return time.time()
+                    if not blocking:
+                        return None
+                    if not waiting:
+                        _add(state['waiting'], pid, 1)
+                        waiting = True
+                # The other processes give their slots back unnoticed
+                with self._condition:
+                    self._condition.wait(POLL_INTERVAL)
+        finally:
+            if waiting:
+                with self._state() as state:
+                    _add(state['waiting'], pid, -1)
+            with self._condition:
+                self.queued -= 1
+
+    def release(self, start, failed=False, elapsed=None):
+        """Give a slot back and adapt the cap to the operation outcome
+
+        :param float start: The value returned by :meth:`acquire`.
+        :param bool failed: Whether the operation failed because of the
+            server, like a timeout or an HTTP 5XX response.
+        :param float elapsed: The latency of the operation, the time since
+            ``start`` by default.
+
+        """
+        now = time.time()
+        if elapsed is None:
+            elapsed = now - start
+        with self._state() as state:
+            limit = state['limit']
+            # Whether the cap was reached, growing it is useless otherwise
+            saturated = (
+                sum(state['holders'].values()) >= int(limit) or
+                bool(state['waiting'])
+            )
+            _add(state['holders'], str(os.getpid()), -1)
+            if failed or elapsed > self.latency:
+                if start >= state['last_decrease']:
+                    state['limit'] = max(
+                        self.minimum, limit * DECREASE_FACTOR)
+                    state['last_decrease'] = now
+                    state['decreases'] += 1
+                    logger.info(
+                        'Server congested, {0} limit lowered to {1}'.format(
+                            self.name, int(state['limit'])))
+            elif saturated:
+                state['limit'] = min(self.maximum, limit + 1 / limit)
+        with self._condition:
+            self.completed += 1
+            if self.average_latency is None:
+                self.average_latency = elapsed
+            else:
+                self.average_latency += (
+                    elapsed - self.average_latency) * LATENCY_WEIGHT
+            if failed:
+                self.failed += 1
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """Run the ``with`` block in a slot
+
+        The operation fails if the block raises an exception. Set the
+        ``failed`` attribute of the object bound by ``as`` to fail it
+        otherwise, and its ``elapsed`` attribute to override its latency.
+        Call its ``release`` method to give the slot back before the end of
+        the block.
+
+        """
+        outcome = _Outcome()
+        outcome.start = self.acquire()
+        outcome.limiter = self
+        try:
+            yield outcome
+        except GeneratorExit:
+            # A generator holding the slot was closed, the server is fine
+            raise
+        except BaseException:
+            outcome.failed = True
+            raise
+        finally:
+            outcome.release()
+
+    def stats(self):
+        """Return the limiter counters
+
+        :return: A dictionary with the current ``limit``, the operations
+            ``in_flight`` in all the processes and ``queued`` in the current
+            one, and the ``max_queued``, ``completed``, ``failed``,
+            ``decreases`` and ``average_latency`` counters.
+
+        """
+        with self._state() as state:
+            shared = {
+                'limit': int(state['limit']),
+                'in_flight': sum(state['holders'].values()),
+                'decreases': state['decreases'],
+            }
+        with self._condition:
+            shared.update({
+                'queued': self.queued,
+                'max_queued': self.max_queued,
+                'completed': self.completed,
+                'failed': self.failed,
+                'average_latency': self.average_latency,
+            })
+        return shared
+
+
+class _Outcome(object):
+    """The outcome of an operation run by :meth:`AdaptiveLimiter.slot`"""
+    #: Whether the operation failed.
+    failed = False
+    #: The latency of the operation, the time the slot was held if ``None``.
+    elapsed = None
+    #: The time the operation started.
+    start = None
+    #: The limiter holding the slot, ``None`` once it is given back.
+    limiter = None
+
+    def release(self):
+        """Give the slot back, the operation being done with the server"""
+        if self.limiter is not None:
+            limiter, self.limiter = self.limiter, None
+            limiter.release(self.start, self.failed, self.elapsed)
+
+
+def get_limiter(name):
+    """Return the ``name`` limiter of the current process
+
+    :rtype: AdaptiveLimiter
+
+    """
+    key = (os.getpid(), name)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = _limiters[key] = AdaptiveLimiter(
+                name,
+                initial=int(_setting(name, 'initial', DEFAULT_INITIAL)),
+                maximum=int(_setting(name, 'max', DEFAULT_MAXIMUM)),
+                latency=_setting(name, 'latency', DEFAULT_LATENCY),
+            )
+    worker.at_exit(_log_stats, worker.REPORT_PRIORITY)
+    return limiter
+
+
+@contextmanager
+def limit(name):
+    """Run the ``with`` block in a slot of the ``name`` limiter
+
+    Nothing is limited if ``main.limiter`` is not set, see
+    :meth:`AdaptiveLimiter.slot`.
+
+    """
+    if not limiter_enabled():
+        outcome = _Outcome()
+        outcome.start = time.time()
+        yield outcome
+        return
+    with get_limiter(name).slot() as outcome:
+        yield outcome
+
+
+def limit_http(name, function):
+    """Return ``function``, an HTTP client function, limited by the ``name``
+    limiter
+
+    HTTP 429 and 5XX responses fail the operation.
+
+    """
+    if getattr(function, 'limiter', None) is not None:
+        return function
+
+    @functools.wraps(function)
+    def limited_function(*args, **kwargs):
+        """Call ``function`` in a slot of the limiter"""
+        with limit(name) as outcome:
+            response = function(*args, **kwargs)
+            status_code = getattr(response, 'status_code', None)
+            if status_code is not None and (
+                    status_code == 429 or status_code >= 500):
+                outcome.failed = True
+            return response
+
+    limited_function.limiter = name
+    return limited_function
+
+
+def stats():
+    """Return the counters of the limiters of the current process
+
+    :return: A dictionary mapping the limiter names to their
+        :meth:`AdaptiveLimiter.stats`.
+
+    """
+    with _limiters_lock:
+        limiters = [
+            limiter for (pid, _), limiter in _limiters.items()
+            if pid == os.getpid()
+        ]
+    return dict((limiter.name, limiter.stats()) for limiter in limiters)
+
+
+def _log_stats():
+    """Log the counters of the limiters when the process exits"""
+    for name, counters in sorted(stats().items()):
+        logger.info('Limiter {0}: {1}'.format(name, ', '.join(
+            '{0}={1}'.format(key, value)
+            for key, value in sorted(counters.items())
+        )))
+
+
+def _remove_state():
+    """Remove the state files of the run when the process starting it exits"""
+    for path in glob.glob(_state_path('*')):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+if worker.owns_run():
+    worker.at_exit(_remove_state, worker.RUN_STATE_PRIORITY)
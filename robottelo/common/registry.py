@@ -0,0 +1,359 @@
+# -*- encoding: utf-8 -*-
+"""Registry of the entities created by the tests, and their teardown.
+
+:mod:`robottelo.cli.factory` and :mod:`robottelo.entities` record every entity
+they create with :func:`track`. The entities are grouped by scope and deleted
+when their scope ends, in reverse dependency order: repositories before their
+product, products before their organization and so on. Independent entities
+are deleted at the same time.
+
+The order comes from the relationships between the entities of
+:mod:`robottelo.entities`, see
+:func:`robottelo.common.graph.entity_dependencies`, and from the ``parent`` of
+each tracked entity.
+
+Tracking is opt-in, set ``cleanup`` in the ``main`` section of the
+configuration file to the scope whose entities are deleted when it ends:
+
+``class``
+    Entities are deleted after each test case class.
+
+``module``
+    Entities are deleted after the test case classes of each module.
+
+``session``
+    Entities are deleted when the process exits, nose ``--processes``
+    workers included, see :func:`robottelo.common.worker.at_exit`.
+
+:class:`robottelo.test.TestCase` opens and closes the scopes with
+:func:`start_class` and :func:`finish_class`. Each teardown
+logs a summary, see :class:`TeardownReport`. ``cleanup.workers`` sets how
+many entities are deleted at the same time, 4 by default.
+
+"""
+import collections
+import logging
+import os
+import threading
+import time
+
+from contextlib import contextmanager
+from robottelo.common import conf, graph, worker
+
+logger = logging.getLogger(__name__)
+
+#: The scopes accepted by ``main.cleanup``.
+SCOPES = ('class', 'module', 'session')
+
+#: An entity tracked for deletion. ``kind`` is the name of its class in
+#: :mod:`robottelo.entities`, like ``Organization``, ``parent`` a ``(kind,
+#: id)`` tuple or ``None`` and ``delete`` a function called without arguments
+#: to delete it.
+Resource = collections.namedtuple(
+    'Resource', ('kind', 'id', 'parent', 'delete'))
+
+
+class ResourceNotFound(Exception):
+    """Raised by the delete functions when the entity is already gone."""
+
+
+def cleanup_scope():
+    """Return the scope set by ``main.cleanup``, ``None`` if not set"""
+    scope = conf.properties.get('main.cleanup', 'none')
+    return scope if scope in SCOPES else None
+
+
+class TeardownReport(object):
+    """The outcome of a teardown
+
+    :param str scope: The name of the scope torn down.
+
+    """
+
+    def __init__(self, scope):
+        self.scope = scope
+        #: The resources deleted.
+        self.deleted = []
+        #: The resources already gone.
+        self.missing = []
+        #: Maps the resources which could not be deleted to the error.
+        self.failed = {}
+        #: The seconds the teardown took.
+        self.elapsed = 0
+
+    def __str__(self):
+        kinds = collections.Counter(
+            resource.kind for resource in self.deleted)
+        return (
+            'Teardown of {0}: deleted {1} entities ({2}), {3} already gone, '
+            '{4} failed{5} in {6:.2f}s'.format(
+                self.scope,
+                len(self.deleted),
+                ', '.join(
+                    '{0} {1}'.format(count, kind)
+                    for kind, count in sorted(kinds.items())
+                ) or 'none',
+                len(self.missing),
+                len(self.failed),
+                ''.join(
+                    '\n  {0} {1}: {2}'.format(resource.kind, resource.id, err)
+                    for resource, err in self.failed.items()
+                ),
+                self.elapsed,
+            )
+        )
+
+
+class ResourceRegistry(object):
+    """Record the entities created and delete them by scope
+
+    The outermost scope, ``session``, is always open.
+
+    :param kind_dependencies: A function returning a dictionary mapping the
+        kinds of entities to the kinds they depend on. Defaults to the
+        dependencies of the entities of :mod:`robottelo.entities`.
+
+    """
+
+    def __init__(self, kind_dependencies=None):
+        self._kind_dependencies = kind_dependencies
+        self._dependencies = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._pid = os.getpid()
+        # A list of (name, resources) tuples, the innermost scope last
+        self._scopes = [('session', [])]
+
+    def _check_pid(self):
+        """Forget the resources tracked by the parent of a forked process"""
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._scopes = [('session', [])]
+
+    def track(self, kind, resource_id, delete, parent=None):
+        """Record an entity in the current scope
+
+        Nothing is recorded if ``main.cleanup`` is not set or in a
+        :meth:`untracked` block. The entity is recorded in the ``session``
+        scope in a :meth:`session` block.
+
+        :param str kind: The entity kind, like ``Organization``.
+        :param resource_id: The entity id.
+        :param delete: A function called without arguments to delete the
+            entity. It raises :class:`ResourceNotFound` if the entity is
+            already gone.
+        :param tuple parent: The ``(kind, id)`` of the entity this one
+            belongs to, if any.
+
+        """
+        if cleanup_scope() is None or getattr(self._local, 'paused', False):
+            return
+        # Ids are strings in CSV outputs and integers in JSON outputs
+        if parent is not None:
+            parent = (parent[0], unicode(parent[1]))
+        in_session = getattr(self._local, 'session', False)
+        with self._lock:
+            self._check_pid()
+            self._scopes[0 if in_session else -1][1].append(
+                Resource(kind, unicode(resource_id), parent, delete))
+        worker.at_exit(_close_registry, worker.REGISTRY_PRIORITY)
+
+    @contextmanager
+    def untracked(self):
+        """Do not record the entities created by the current thread"""
+        paused = getattr(self._local, 'paused', False)
+        self._local.paused = True
+        try:
+            yield
+        finally:
+            self._local.paused = paused
+
+    @contextmanager
+    def session(self):
+        """Record the entities created by the current thread in the
+        ``session`` scope
+
+        Use it for the entities outliving the current scope, like the
+        objects of :func:`robottelo.common.decorators.cacheable`.
+
+        """
+        in_session = getattr(self._local, 'session', False)
+        self._local.session = True
+        try:
+            yield
+        finally:
+            self._local.session = in_session
+
+    @property
+    def scope(self):
+        """The name of the current scope"""
+        with self._lock:
+            self._check_pid()
+            return self._scopes[-1][0]
+
+    def push_scope(self, name):
+        """Open the scope ``name``, nested in the current one"""
+        with self._lock:
+            self._check_pid()
+            self._scopes.append((name, []))
+
+    def pop_scope(self):
+        """Close the current scope and delete its entities
+
+        Closing the ``session`` scope deletes its entities and leaves it open.
+
+        :rtype: TeardownReport
+
+        """
+        with self._lock:
+            self._check_pid()
+            if len(self._scopes) > 1:
+                name, resources = self._scopes.pop()
+            else:
+                name, resources = self._scopes[0]
+                self._scopes[0] = (name, [])
+        return self.teardown(name, resources)
+
+    def close(self):
+        """Close all the scopes, deleting their entities"""
+        while True:
+            with self._lock:
+                last = len(self._scopes) == 1
+            self.pop_scope()
+            if last:
+                return
+
+    def dependencies(self):
+        """Return the dependencies between the kinds of entities
+
+        :return: A dictionary mapping each kind to a set of the kinds it
+            depends on, directly or not.
+
+        """
+        if self._dependencies is None:
+            if self._kind_dependencies is None:
+                # robottelo.entities records the entities it creates with
+                # this module, so it is imported once needed only.
+                from robottelo import entities
+                dependencies = graph.entity_dependencies(entities)
+            else:
+                dependencies = self._kind_dependencies()
+            self._dependencies = graph.transitive_closure(dependencies)
+        return self._dependencies
+
+    def teardown(self, name, resources):
+        """Delete ``resources`` in reverse dependency order
+
+        A resource is deleted once the resources depending on it were
+        processed, even if their deletion failed: deleting an organization
+        deletes what it contains anyway.
+
+        :param str name: The name of the scope torn down, for the report.
+        :param list resources: The :data:`Resource` to delete.
+        :rtype: TeardownReport
+
+        """
+        report = TeardownReport(name)
+        if not resources:
+            return report
+        start = time.time()
+        kind_dependencies = self.dependencies()
+        nodes = collections.OrderedDict()
+        for resource in resources:
+            nodes.setdefault((resource.kind, resource.id), resource)
+        # A resource waits for the resources depending on it: its children
+        # and, through a (None, kind) barrier node per kind, the resources of
+        # the kinds depending on its kind.
+        kinds = set(kind for kind, _ in nodes)
+        dependents = collections.defaultdict(set)
+        for kind in kinds:
+            for other in kinds:
+                if kind in kind_dependencies.get(other, ()):
+                    dependents[kind].add((None, other))
+        deletion_graph = collections.OrderedDict()
+        for key, resource in nodes.items():
+            deletion_graph[key] = set(dependents[resource.kind])
+        for kind in kinds:
+            deletion_graph[(None, kind)] = set(
+                key for key in nodes if key[0] == kind)
+        for key, resource in nodes.items():
+            if resource.parent in nodes:
+                deletion_graph[resource.parent].add(key)
+        lock = threading.Lock()
+
+        def delete(key):
+            """Delete the resource ``key`` and record the outcome"""
+            resource = nodes.get(key)
+            if resource is None:
+                # A barrier node
+                return
+            try:
+                resource.delete()
+            except ResourceNotFound:
+                with lock:
+                    report.missing.append(resource)
+            except Exception as err:  # pylint:disable=broad-except
+                with lock:
+                    report.failed[resource] = err
+            else:
+                with lock:
+                    report.deleted.append(resource)
+
+        graph.run(
+            deletion_graph,
+            delete,
+            int(conf.properties.get(
+                'main.cleanup.workers', graph.DEFAULT_MAX_WORKERS))
+        )
+        report.elapsed = time.time() - start
+        logger.info(str(report))
+        return report
+
+
+#: The registry used by the factories and the entities.
+registry = ResourceRegistry()
+
+
+def track(kind, resource_id, delete, parent=None):
+    """Record an entity in the current scope, see
+    :meth:`ResourceRegistry.track`
+
+    """
+    registry.track(kind, resource_id, delete, parent)
+
+
+def start_class(test_class):
+    """Open the scope of ``test_class`` as ``main.cleanup`` says
+
+    A scope per class is opened with the ``class`` cleanup scope, a scope per
+    module with the ``module`` one. The scope of the previous module is
+    closed when a class of another module starts.
+
+    """
+    scope = cleanup_scope()
+    current = registry.scope
+    if scope == 'class':
+        if current.startswith('class:'):
+            # The previous class did not close its scope
+            registry.pop_scope()
+        registry.push_scope('class:{0}.{1}'.format(
+            test_class.__module__, test_class.__name__))
+    elif scope == 'module':
+        name = 'module:{0}'.format(test_class.__module__)
+        if current != name:
+            if current.startswith('module:'):
+                registry.pop_scope()
+            registry.push_scope(name)
+
+
+def finish_class(test_class):
+    """Close the scope of ``test_class`` opened by :func:`start_class`"""
+    if registry.scope == 'class:{0}.{1}'.format(
+            test_class.__module__, test_class.__name__):
+        registry.pop_scope()
+
+
+def _close_registry():
+    """Delete the entities left when the process exits"""
+    if cleanup_scope() is not None:
+        registry.close()
@@ -0,0 +1,190 @@
+# -*- encoding: utf-8 -*-
+"""Per worker organization and location, for parallel test runs.
+
+The workers of a parallel run, like ``make test-foreman-cli-threaded``, share
+the server: the default organization and location, the entities found by a
+search and the fixed names used by some tests. A shard gives each worker an
+organization and a location of its own:
+
+* the CLI factories create entities in the shard organization when no
+  organization is given, and in the shard location when they accept
+  locations and none is given;
+* the ``list`` and ``info`` commands which require an organization search in
+  the shard organization when none is given;
+* :meth:`Shard.name` prefixes fixed names with the shard name;
+* the shard organization and location, and so what was created in them, are
+  deleted when the worker exits, see :func:`robottelo.common.worker.at_exit`.
+
+:class:`robottelo.test.TestCase` exposes the shard of the worker as
+``shard``. Sharding is opt-in, set ``shard`` to ``1`` in the ``main`` section
+of the configuration file.
+
+"""
+import logging
+import os
+import threading
+
+from fauxfactory import gen_alphanumeric
+from robottelo.common import conf, registry, worker
+
+logger = logging.getLogger(__name__)
+
+#: The prefix of the shard names.
+SHARD_PREFIX = u'robottelo-shard'
+
+#: The options of the CLI commands naming an organization.
+ORGANIZATION_OPTIONS = (
+    u'organization',
+    u'organization-id',
+    u'organization-ids',
+    u'organization-label',
+    u'organizations',
+)
+#: The options of the CLI commands naming a location.
+LOCATION_OPTIONS = (
+    u'location',
+    u'location-id',
+    u'location-ids',
+    u'locations',
+)
+
+# Maps the pid to the shard of the process
+_shards = {}
+_shards_lock = threading.Lock()
+
+
+def sharding_enabled():
+    """Tell whether ``main.shard`` enables the per worker shards"""
+    return conf.properties.get('main.shard', '0') == '1'
+
+
+class Shard(object):
+    """The organization and location of a worker
+
+    Both are created on first use.
+
+    :param str name: The name of the shard, of its organization and of its
+        location.
+
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._org = None
+        self._location = None
+
+    def _setup(self):
+        """Create the shard organization and location, unless already done"""
+        with self._lock:
+            if self._org is not None:
+                return
+            # The CLI factories use this module, so they are imported once
+            # needed only.
+            from robottelo.cli.factory import make_location, make_org
+            from robottelo.cli.location import Location
+            # The shard entities are deleted by close, with what they contain
+            with registry.registry.untracked():
+                org = make_org({u'name': self.name, u'label': self.name})
+                location = make_location({u'name': self.name})
+            Location.add_organization({
+                u'id': location['id'],
+                u'organization-id': org['id'],
+            })
+            self._org, self._location = org, location
+            logger.info('Created shard {0}'.format(self.name))
+
+    @property
+    def org(self):
+        """The shard organization, as returned by the CLI factory"""
+        self._setup()
+        return self._org
+
+    @property
+    def location(self):
+        """The shard location, as returned by the CLI factory"""
+        self._setup()
+        return self._location
+
+    def name_for(self, name):
+        """Return ``name`` prefixed with the shard name
+
+        Use it for the names which are not random, to avoid collisions
+        between workers.
+
+        """
+        return u'{0}-{1}'.format(self.name, name)
+
+    def apply_defaults(self, options):
+        """Point ``options`` to the shard organization and location
+
+        Only the options set to ``None`` are changed, and only if none of the
+        options naming an organization, or a location, are set.
+
+        :param dict options: The options of a CLI command, changed in place.
+        :return: ``options``.
+
+        """
+        for names, entity in (
+                (ORGANIZATION_OPTIONS, 'org'),
+                (LOCATION_OPTIONS, 'location')):
+            present = [name for name in names if name in options]
+            if not present or any(options[name] for name in present):
+                continue
+            entity_id = getattr(self, entity)['id']
+            for name in present:
+                if name.endswith(u'-id') or name.endswith(u'-ids'):
+                    options[name] = entity_id
+        return options
+
+    def close(self):
+        """Delete the shard organization and location"""
+        with self._lock:
+            org, location = self._org, self._location
+            self._org = self._location = None
+        if org is None:
+            return
+        from robottelo.cli.location import Location
+        from robottelo.cli.org import Org
+        for cli_object, entity in ((Org, org), (Location, location)):
+            result = cli_object.delete({u'id': entity['id']})
+            if result.return_code != 0:
+                logger.warning('Failed to delete shard {0} {1}: {2}'.format(
+                    cli_object.__name__, self.name, result.stderr))
+
+
+def current():
+    """Return the shard of the current process
+
+    :return: A :class:`Shard`, ``None`` if sharding is not enabled.
+
+    """
+    if not sharding_enabled():
+        return None
+    pid = os.getpid()
+    with _shards_lock:
+        shard = _shards.get(pid)
+        if shard is None:
+            shard = _shards[pid] = Shard(u'{0}-{1}-{2}'.format(
+                SHARD_PREFIX, pid, gen_alphanumeric(6).lower()))
+            worker.at_exit(close_shard, worker.SHARD_PRIORITY)
+    return shard
+
+
+def namespace():
+    """Return the name of the shard of the current process, ``None`` if
+    sharding is not enabled
+
+    Unlike :attr:`Shard.org`, it does not create anything on the server.
+
+    """
+    shard = current()
+    return shard.name if shard is not None else None
+
+
+def close_shard():
+    """Delete the shard of the current process, see :meth:`Shard.close`"""
+    with _shards_lock:
+        shard = _shards.pop(os.getpid(), None)
+    if shard is not None:
+        shard.close()
@@ -2,14 +2,20 @@
 Utility module to handle the shared ssh connection
 """
 
-import json
+import atexit
+import codecs
 import logging
+import os
 import re
+import select
+import socket
 import sys
+import threading
+import time
 
 from contextlib import contextmanager
-from robottelo.common import conf
-from robottelo.common.helpers import csv_to_dictionary
+from robottelo.common import conf, limiter
+from robottelo.common.helpers import csv_to_dictionary, json_to_dictionary
 
 try:
     import paramiko
@@ -19,6 +25,22 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Escape codes for colors displayed in the output
+_COLOR_REGEX = re.compile(r'\x1b\[\d\d?m')
+
+#: Seconds an idle pooled connection is kept before being closed.
+POOL_MAX_IDLE_TIME = 300
+#: Maximum number of idle connections kept per host, port, username and key.
+POOL_MAX_SIZE = 8
+#: Interval, in seconds, of the keepalive packets sent on pooled connections.
+POOL_KEEPALIVE_INTERVAL = 30
+#: Default number of channels :func:`command_batch` opens at the same time.
+#: OpenSSH allows 10 sessions per connection by default (``MaxSessions``).
+BATCH_MAX_PARALLEL = 8
+#: Seconds :func:`command_batch` waits between checks for the exit status of
+#: the commands whose output is complete.
+BATCH_EXIT_STATUS_INTERVAL = 0.005
+
 
 class SSHCommandResult(object):
     """Structure that returns in all ssh commands results."""
@@ -34,7 +56,7 @@ class SSHCommandResult(object):
             if output_format == 'csv':
                 self.stdout = csv_to_dictionary(stdout) if stdout else {}
             if output_format == 'json':
-                self.stdout = json.loads(stdout) if stdout else None
+                self.stdout = json_to_dictionary(stdout) if stdout else None
 
 
 def _call_paramiko_sshclient():
@@ -48,6 +70,54 @@ def _call_paramiko_sshclient():
     return paramiko.SSHClient()
 
 
+def _ssh_port(hostname):
+    """Return the SSH port to use when connecting to ``hostname``.
+
+    :rtype: int
+
+    """
+    if hostname == conf.properties.get('main.server.hostname'):
+        return int(conf.properties.get('main.server.ssh.port') or 22)
+    return 22
+
+
+def connect(hostname=None, username=None, key_filename=None, timeout=10):
+    """Return a new ssh connection which is not managed by the pool.
+
+    The arguments are handled the same way :func:`_get_connection` does. The
+    caller is responsible for closing the connection.
+
+    The connection to ``main.server.hostname`` is made to the port set on
+    ``main.server.ssh.port``, if any. Other hosts are reached on port 22.
+
+    :return: An SSH connection.
+    :rtype: paramiko.SSHClient
+
+    """
+    if hostname is None:
+        hostname = conf.properties['main.server.hostname']
+    if username is None:
+        username = conf.properties['main.server.ssh.username']
+    if key_filename is None:
+        key_filename = conf.properties['main.server.ssh.key_private']
+
+    client = _call_paramiko_sshclient()
+    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    client.connect(
+        hostname=hostname,
+        port=_ssh_port(hostname),
+        username=username,
+        key_filename=key_filename,
+        timeout=timeout
+    )
+    transport = client.get_transport()
+    if transport is not None:
+        # Commands are sent as several small packets, do not let Nagle's
+        # algorithm hold them waiting for the server delayed ACKs.
+        transport.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return client
+
+
 @contextmanager
 def _get_connection(
         hostname=None, username=None, key_filename=None, timeout=10):
@@ -77,21 +147,7 @@ def _get_connection(
     :rtype: paramiko.SSHClient
 
     """
-    if hostname is None:
-        hostname = conf.properties['main.server.hostname']
-    if username is None:
-        username = conf.properties['main.server.ssh.username']
-    if key_filename is None:
-        key_filename = conf.properties['main.server.ssh.key_private']
-
-    client = _call_paramiko_sshclient()
-    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-    client.connect(
-        hostname=hostname,
-        username=username,
-        key_filename=key_filename,
-        timeout=timeout
-    )
+    client = connect(hostname, username, key_filename, timeout)
 
     client_id = hex(id(client))
     try:
@@ -103,6 +159,276 @@ def _get_connection(
         logger.info('Destroyed Paramiko client {0}'.format(client_id))
 
 
+def _connection_is_active(client):
+    """Tell whether the transport of ``client`` is still usable.
+
+    :param paramiko.SSHClient client: The client to check.
+    :rtype: bool
+
+    """
+    transport = client.get_transport()
+    return transport is not None and transport.is_active()
+
+
+class SSHConnectionPool(object):
+    """A thread and process safe pool of ``paramiko.SSHClient`` objects.
+
+    Idle connections are kept per host, port, username and key, and are handed
+    out again by :meth:`acquire`, so consecutive commands to the same host do
+    not pay a full TCP, key exchange and authentication handshake.
+
+    Connections are checked out exclusively, which means that a connection is
+    never shared by two threads at the same time. Connections inherited from a
+    parent process (for example when nose forks its ``--processes`` workers)
+    are never reused because their sockets are shared with the parent.
+
+    """
+
+    def __init__(self, max_idle_time=None, max_size=None,
+                 keepalive_interval=None):
+        self.max_idle_time = (
+            POOL_MAX_IDLE_TIME if max_idle_time is None else max_idle_time)
+        self.max_size = POOL_MAX_SIZE if max_size is None else max_size
+        self.keepalive_interval = (
+            POOL_KEEPALIVE_INTERVAL
+            if keepalive_interval is None else keepalive_interval
+        )
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        # Maps a connection key to a list of ``(client, last_used)`` tuples
+        self._idle = {}
+
+    def _check_pid(self):
+        """Forget about connections created by another process.
+
+        The connections are not closed since closing them would also
+        disconnect the parent process session. Must be called holding
+        ``self._lock``.
+
+        """
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._idle = {}
+
+    def acquire(self, hostname, username, key_filename, timeout=10):
+        """Return a healthy connection for the given key.
+
+        An idle connection is reused if available, otherwise a new connection
+        is established.
+
+        :return: A tuple ``(client, reused)`` where ``reused`` tells whether
+            the connection was taken from the pool.
+        :rtype: tuple
+
+        """
+        key = (hostname, _ssh_port(hostname), username, key_filename)
+        now = time.time()
+        reusable = None
+        stale = []
+        with self._lock:
+            self._check_pid()
+            idle = self._idle.get(key, [])
+            while idle and reusable is None:
+                client, last_used = idle.pop()
+                if (now - last_used <= self.max_idle_time and
+                        _connection_is_active(client)):
+                    reusable = client
+                else:
+                    stale.append(client)
+        for client in stale:
+            self._close(client)
+        if reusable is not None:
+            logger.debug(
+                'Reusing pooled Paramiko client {0}'.format(hex(id(reusable))))
+            return reusable, True
+
+        client = connect(hostname, username, key_filename, timeout)
+        transport = client.get_transport()
+        if transport is not None and self.keepalive_interval:
+            transport.set_keepalive(self.keepalive_interval)
+        logger.info(
+            'Instantiated pooled Paramiko client {0}'.format(hex(id(client))))
+        return client, False
+
+    def release(self, client, hostname, username, key_filename):
+        """Give ``client`` back to the pool so it can be reused."""
+        key = (hostname, _ssh_port(hostname), username, key_filename)
+        with self._lock:
+            self._check_pid()
+            idle = self._idle.setdefault(key, [])
+            if (len(idle) < self.max_size and
+                    _connection_is_active(client)):
+                idle.append((client, time.time()))
+                return
+        self._close(client)
+
+    def discard(self, client):
+        """Close ``client`` instead of giving it back to the pool."""
+        self._close(client)
+
+    def evict(self, hostname=None):
+        """Close idle connections.
+
+        :param str hostname: If provided only idle connections to this host are
+            closed, otherwise all idle connections are closed.
+
+        """
+        with self._lock:
+            self._check_pid()
+            keys = [
+                key for key in self._idle
+                if hostname is None or key[0] == hostname
+            ]
+            clients = []
+            for key in keys:
+                clients.extend(client for client, _ in self._idle.pop(key))
+        for client in clients:
+            self._close(client)
+
+    @staticmethod
+    def _close(client):
+        """Close ``client`` ignoring errors from an already broken link."""
+        client_id = hex(id(client))
+        try:
+            client.close()
+        except (paramiko.SSHException, socket.error, EOFError) as err:
+            logger.debug('Error closing Paramiko client {0}: {1}'.format(
+                client_id, err))
+        logger.info('Destroyed pooled Paramiko client {0}'.format(client_id))
+
+
+#: The :class:`SSHConnectionPool` shared by the functions of this module.
+_pool = SSHConnectionPool()
+atexit.register(_pool.evict)
+
+
+def _pooling_enabled():
+    """Tell whether ``main.server.ssh.pooling`` enables connection pooling.
+
+    Pooling is enabled by default and can be disabled by setting
+    ``server.ssh.pooling=0`` in the ``main`` section of the configuration file.
+
+    """
+    return conf.properties.get('main.server.ssh.pooling', '1') != '0'
+
+
+@contextmanager
+def _get_pooled_connection(
+        hostname=None, username=None, key_filename=None, timeout=10):
+    """Yield an ssh connection object taken from the connection pool.
+
+    Behaves like :func:`_get_connection` but, when the caller is done with the
+    connection, it is given back to the pool instead of being closed. If the
+    caller raises any error the connection is considered broken and is closed.
+
+    Yield a tuple ``(client, reused)``, where ``reused`` tells whether the
+    connection was already used before, so callers can retry with a fresh
+    connection if a reused one turns out to be stale.
+
+    If pooling is disabled with ``main.server.ssh.pooling=0`` a new connection
+    is created and closed for every call.
+
+    :return: A tuple with an SSH connection and a flag telling whether it was
+        reused.
+    :rtype: tuple
+
+    """
+    if hostname is None:
+        hostname = conf.properties['main.server.hostname']
+    if username is None:
+        username = conf.properties['main.server.ssh.username']
+    if key_filename is None:
+        key_filename = conf.properties['main.server.ssh.key_private']
+
+    if not _pooling_enabled():
+        with _get_connection(
+                hostname, username, key_filename, timeout) as connection:
+            yield connection, False
+        return
+
+    client, reused = _pool.acquire(hostname, username, key_filename, timeout)
+    try:
+        yield client, reused
+    except BaseException:
+        # The link may be broken or have unread data on it, so do not risk
+        # giving a dirty connection back to the pool.
+        _pool.discard(client)
+        raise
+    else:
+        _pool.release(client, hostname, username, key_filename)
+
+
+class _Attempt(object):
+    """An attempt of :func:`_on_pooled_connection` to run a function"""
+    #: Whether the function sent a command, it is not retried then.
+    sent = False
+
+
+def _on_pooled_connection(hostname, function):
+    """Call ``function`` with a pooled connection to ``hostname``.
+
+    A pooled connection may have been dropped by the server while idle, in
+    that case using it fails and ``function`` is called again with another
+    connection. ``function`` is called with the connection and an
+    :class:`_Attempt` whose ``sent`` attribute it sets once it sent a
+    command: it is never called again after that.
+
+    :return: What ``function`` returns.
+
+    """
+    while True:
+        attempt = _Attempt()
+        reused = False
+        try:
+            with _get_pooled_connection(hostname=hostname) as (
+                    connection, reused):
+                return function(connection, attempt)
+        except (paramiko.SSHException, socket.error, EOFError):
+            if attempt.sent or not reused:
+                raise
+            logger.info('Stale pooled connection, reconnecting')
+
+
+@contextmanager
+def _pooled_channel(hostname, cmd):
+    """Yield a channel running ``cmd`` on a pooled connection to
+    ``hostname``.
+
+    Like :func:`_on_pooled_connection`, another connection is tried when a
+    reused one fails before the command is sent. The channel is closed on
+    exit.
+
+    """
+    while True:
+        attempt = _Attempt()
+        reused = False
+        try:
+            with _get_pooled_connection(hostname=hostname) as (
+                    connection, reused):
+                channel = connection.get_transport().open_session()
+                try:
+                    channel.exec_command(cmd)
+                    attempt.sent = True
+                    yield channel
+                finally:
+                    channel.close()
+                return
+        except (paramiko.SSHException, socket.error, EOFError):
+            if attempt.sent or not reused:
+                raise
+            logger.info('Stale pooled connection, reconnecting')
+
+
+def close_connections(hostname=None):
+    """Close the pooled connections.
+
+    :param str hostname: If provided only the connections to this host are
+        closed, otherwise all pooled connections are closed.
+
+    """
+    _pool.evict(hostname)
+
+
 def upload_file(local_file, remote_file=None):
     """
     Uploads a remote file to a normal server or
@@ -115,7 +441,7 @@ def upload_file(local_file, remote_file=None):
         remote_file = local_file
 
     if not remote:
-        with _get_connection() as connection:
+        with _get_pooled_connection() as (connection, _):
             sftp = connection.open_sftp()
             sftp.put(local_file, remote_file)
             sftp.close()
@@ -128,7 +454,7 @@ def download_file(remote_file, local_file=None):
     if local_file is None:
         local_file = remote_file
 
-    with _get_connection() as connection:
+    with _get_pooled_connection() as (connection, _):
         sftp = connection.open_sftp()
         sftp.get(remote_file, local_file)
         sftp.close()
@@ -139,27 +465,458 @@ def command(cmd, hostname=None, output_format=None, timeout=None):
     Executes SSH command(s) on remote hostname.
     Defaults to main.server.hostname.
     """
+    stdout, stderr, errorcode = _command_output(cmd, hostname, timeout)
+    return command_result(stdout, stderr, errorcode, output_format)
+
+
+def _command_output(cmd, hostname=None, timeout=None, limited=True):
+    """Executes SSH command on remote hostname and return its raw output.
 
+    :param bool limited: Whether to run the command in a slot of the ``ssh``
+        limiter, see :mod:`robottelo.common.limiter`. Unset it when the
+        caller takes the slot itself.
+    :return: A tuple ``(stdout, stderr, return_code)``.
+
+    """
     # Set a default timeout of 120 seconds
     if timeout is None:
         timeout = 120
 
-    # Variable to hold results returned from the command
-    stdout = stderr = errorcode = None
-
-    # Remove escape code for colors displayed in the output
-    regex = re.compile(r'\x1b\[\d\d?m')
-
     hostname = hostname or conf.properties['main.server.hostname']
 
     logger.debug(">>> [%s] %s", hostname, cmd)
 
-    with _get_connection(hostname=hostname) as connection:
+    def run(connection, attempt):
+        """Run the command on ``connection``"""
         _, stdout, stderr = connection.exec_command(cmd, timeout)
+        attempt.sent = True
         errorcode = stdout.channel.recv_exit_status()
-        stdout = stdout.read()
-        stderr = stderr.read()
+        return stdout.read(), stderr.read(), errorcode
+
+    if not limited:
+        return _on_pooled_connection(hostname, run)
+    with limiter.limit('ssh'):
+        return _on_pooled_connection(hostname, run)
+
+
+def command_pipeline(cmds, hostname=None, output_formats=None, timeout=None,
+                     parallel=False):
+    """Executes many SSH commands on remote hostname as a single script.
+
+    The commands are shipped in one remote shell script, so they pay a
+    single round trip instead of one per command. Each command runs in its
+    own subshell, with its stdout, stderr, exit status and start and end
+    times saved to a temporary directory and sent back in sections delimited
+    by a random marker.
+
+    The script takes a single slot of the ``ssh`` limiter, with the duration
+    of its slowest command as latency, see :mod:`robottelo.common.limiter`.
+
+    :param list cmds: The commands to execute.
+    :param list output_formats: The output format of each command, see
+        :func:`command`. Defaults to no format for all of them.
+    :param int timeout: Seconds to wait for the whole script. Defaults to 120.
+    :param bool parallel: Run the commands at the same time, in the
+        background, instead of one after the other. Only use it for commands
+        which do not depend on each other.
+    :return: A list of :class:`SSHCommandResult`, in the same order as
+        ``cmds``.
+    :rtype: list
 
+    """
+    if output_formats is None:
+        output_formats = [None] * len(cmds)
+    if not cmds:
+        return []
+
+    marker = '==robottelo-{0}=='.format(os.urandom(8).encode('hex'))
+    script = ['d=$(mktemp -d) || exit 1']
+    for index, cmd in enumerate(cmds):
+        if isinstance(cmd, unicode):
+            cmd = cmd.encode('utf-8')
+        # The line break keeps a trailing comment from eating the redirections
+        run = (
+            't=$(date +%s.%N); ( {1}\n) >"$d/{0}.out" 2>"$d/{0}.err"; '
+            'echo $? >"$d/{0}.rc"; echo "$t $(date +%s.%N)" >"$d/{0}.time"'
+        ).format(index, cmd)
+        script.append('{{ {0}; }} &'.format(run) if parallel else run)
+    if parallel:
+        script.append('wait')
+    script.append(
+        'for i in $(seq 0 {0}); do'
+        ' for s in out err rc time; do'
+        ' printf "\\n{1} %s %s\\n" "$s" "$i"; cat "$d/$i.$s";'
+        ' done;'
+        ' done'.format(len(cmds) - 1, marker)
+    )
+    script.append('rm -rf "$d"')
+
+    with limiter.limit('ssh') as outcome:
+        stdout, stderr, errorcode = _command_output(
+            '\n'.join(script), hostname, timeout, limited=False)
+
+        # Each section starts with "\n<marker> <stream> <index>\n"
+        sections = {}
+        durations = []
+        for section in stdout.split('\n{0} '.format(marker))[1:]:
+            header, _, data = section.partition('\n')
+            header = tuple(header.split(' ', 1))
+            sections[header] = data
+            if header[0] == 'time':
+                try:
+                    start, end = [float(time_) for time_ in data.split()]
+                except ValueError:
+                    # date does not support %N on some systems
+                    continue
+                durations.append(end - start)
+        if durations:
+            outcome.elapsed = max(durations)
+
+    results = []
+    for index, output_format in enumerate(output_formats):
+        index = str(index)
+        try:
+            return_code = int(sections[('rc', index)].strip())
+        except (KeyError, ValueError):
+            # The script failed before the command could run
+            results.append(SSHCommandResult(
+                [], stderr or 'Pipeline failed with exit status {0}'.format(
+                    errorcode), -1))
+            continue
+        results.append(command_result(
+            sections.get(('out', index), ''),
+            sections.get(('err', index), ''),
+            return_code,
+            output_format
+        ))
+    return results
+
+
+def _read_channel(channel, stdout, stderr):
+    """Move the data available on ``channel`` to ``stdout`` and ``stderr``.
+
+    Data must be consumed while the command is running, otherwise the remote
+    command blocks once the channel window is full.
+
+    :return: Whether some data was read.
+    :rtype: bool
+
+    """
+    received = False
+    while channel.recv_ready():
+        stdout.append(channel.recv(32768))
+        received = True
+    while channel.recv_stderr_ready():
+        stderr.append(channel.recv_stderr(32768))
+        received = True
+    return received
+
+
+def command_batch(cmds, hostname=None, output_format=None, timeout=None,
+                  max_parallel=None):
+    """Run many commands at the same time over a single SSH connection.
+
+    Every command runs on its own channel of the same transport. At most
+    ``max_parallel`` commands run at the same time, the remaining ones are
+    started as soon as a running command finishes.
+
+    A failure of a command does not affect the other ones. Commands that could
+    not be run or that did not finish in time have a ``return_code`` of ``-1``
+    and the reason on ``stderr``.
+
+    :param list cmds: The commands to run.
+    :param str hostname: The host to run the commands on. Defaults to
+        ``main.server.hostname``.
+    :param str output_format: The output format of all commands, see
+        :func:`command`.
+    :param int timeout: Seconds each command is allowed to run. Defaults to
+        120 seconds.
+    :param int max_parallel: The maximum number of commands running at the
+        same time. Defaults to :data:`BATCH_MAX_PARALLEL`.
+    :return: A list of :class:`SSHCommandResult`, in the same order as
+        ``cmds``.
+    :rtype: list
+
+    """
+    if timeout is None:
+        timeout = 120
+    if max_parallel is None:
+        max_parallel = BATCH_MAX_PARALLEL
+    hostname = hostname or conf.properties['main.server.hostname']
+
+    batch = _Batch(cmds, hostname, output_format, timeout, max_parallel)
+    # A stale pooled connection fails before the first command is sent, the
+    # batch then starts over on another connection
+    _on_pooled_connection(hostname, batch.run)
+    return batch.results
+
+
+class _Batch(object):
+    """The commands of :func:`command_batch` and their results
+
+    Each command takes a slot of the ``ssh`` limiter. A slot is only waited
+    for while no command of the batch runs, the batch would wait for itself
+    otherwise.
+
+    """
+
+    def __init__(self, cmds, hostname, output_format, timeout, max_parallel):
+        self.cmds = cmds
+        self.hostname = hostname
+        self.output_format = output_format
+        self.timeout = timeout
+        self.max_parallel = max_parallel
+        self.results = [None] * len(cmds)
+        # The indexes of the commands to run, the last one first
+        self.pending = list(reversed(range(len(cmds))))
+        # Maps a command index to a (channel, deadline, stdout, stderr,
+        # start) tuple
+        self.running = {}
+        self.limiter = None
+        if limiter.limiter_enabled():
+            self.limiter = limiter.get_limiter('ssh')
+
+    def run(self, connection, attempt):
+        """Run the pending commands on ``connection``
+
+        :param attempt: The :class:`_Attempt` of
+            :func:`_on_pooled_connection`.
+
+        """
+        transport = connection.get_transport()
+        try:
+            while self.pending or self.running:
+                self._start(transport, attempt)
+                if not self._collect() and self.running:
+                    self._wait()
+        finally:
+            # Only left when the connection failed
+            for index, item in self.running.items():
+                self._release(item[4], failed=True)
+                del self.running[index]
+
+    def _release(self, start, failed=False):
+        """Give the slot taken at ``start`` back, if any"""
+        if start is not None:
+            self.limiter.release(start, failed)
+
+    def _start(self, transport, attempt):
+        """Start pending commands, up to ``max_parallel``"""
+        while self.pending and len(self.running) < self.max_parallel:
+            index = self.pending[-1]
+            start = None
+            if self.limiter is not None:
+                start = self.limiter.acquire(blocking=not self.running)
+                if start is None:
+                    return
+            logger.debug(">>> [%s] %s", self.hostname, self.cmds[index])
+            try:
+                channel = transport.open_session()
+                channel.exec_command(self.cmds[index])
+            except paramiko.ChannelException as err:
+                self._release(start, failed=True)
+                if not self.running:
+                    self.pending.pop()
+                    self.results[index] = SSHCommandResult(
+                        stderr=str(err), return_code=-1)
+                    continue
+                # The server refused another session, wait for the running
+                # commands and never go beyond that again.
+                logger.info(
+                    'Server refused channel, lowering max_parallel to '
+                    '{0}'.format(len(self.running))
+                )
+                self.max_parallel = len(self.running)
+                return
+            except BaseException:
+                self._release(start, failed=True)
+                raise
+            self.pending.pop()
+            attempt.sent = True
+            self.running[index] = (
+                channel, time.time() + self.timeout, [], [], start)
+
+    def _collect(self):
+        """Read the output of the running commands and store the results of
+        the finished ones
+
+        :return: Whether some data was read.
+
+        """
+        received = False
+        for index, (channel, deadline, stdout, stderr, start) in list(
+                self.running.items()):
+            received |= _read_channel(channel, stdout, stderr)
+            if channel.exit_status_ready():
+                # Read whatever is left once the server closes the channel
+                while (not channel.eof_received and
+                       not channel.closed and
+                       time.time() < deadline):
+                    _read_channel(channel, stdout, stderr)
+                    select.select(
+                        [channel], [], [], max(0, deadline - time.time()))
+                _read_channel(channel, stdout, stderr)
+                self.results[index] = command_result(
+                    ''.join(stdout),
+                    ''.join(stderr),
+                    channel.recv_exit_status(),
+                    self.output_format,
+                )
+                channel.close()
+                del self.running[index]
+                self._release(start)
+            elif time.time() > deadline:
+                channel.close()
+                del self.running[index]
+                self._release(start, failed=True)
+                self.results[index] = SSHCommandResult(
+                    stderr='Timed out after {0} seconds: {1}'.format(
+                        self.timeout, self.cmds[index]),
+                    return_code=-1,
+                )
+        return received
+
+    def _wait(self):
+        """Wait until a running command sends data, finishes or times out"""
+        running = self.running.values()
+        timeout = max(0, min(item[1] for item in running) - time.time())
+        # A channel at EOF stays readable, the exit status is polled instead
+        channels = [
+            item[0] for item in running
+            if not item[0].eof_received and not item[0].closed
+        ]
+        if len(channels) < len(running):
+            timeout = min(timeout, BATCH_EXIT_STATUS_INTERVAL)
+        if (self.pending and self.limiter is not None and
+                len(self.running) < self.max_parallel):
+            # Another process may give a slot back meanwhile
+            timeout = min(timeout, limiter.POLL_INTERVAL)
+        select.select(channels, [], [], timeout)
+
+
+class SSHCommandStream(object):
+    """Iterate over the output lines of a command as they are received.
+
+    Lines are decoded, stripped of colors and filtered from Rails traffic
+    information the same way :func:`command` does, but they are never held in
+    memory all together, which keeps memory usage flat for huge outputs.
+
+    ``return_code`` and ``stderr`` are available once the iteration finishes.
+    Stopping the iteration early closes the channel. A stream can be iterated
+    only once.
+
+    """
+    def __init__(self, cmd, hostname=None, timeout=None, output_format=None):
+        self.cmd = cmd
+        self.hostname = hostname or conf.properties['main.server.hostname']
+        self.output_format = output_format
+        self.timeout = 120 if timeout is None else timeout
+        self.return_code = None
+        self.stderr = None
+        self._started = False
+
+    def __iter__(self):
+        if self._started:
+            raise RuntimeError('A command stream can be iterated only once')
+        self._started = True
+        return self._lines()
+
+    def _chunks(self):
+        """Yield the decoded chunks of stdout as they arrive.
+
+        stdout and stderr are both drained as soon as data arrives, a command
+        filling the channel window of either one would block otherwise.
+
+        :raises socket.timeout: If no data arrives for ``timeout`` seconds.
+
+        The command takes a slot of the ``ssh`` limiter until its first
+        output or its EOF arrives, with the time that took as latency: the
+        caller may spend long on the lines, running other commands meanwhile,
+        and that time is not the server's.
+
+        """
+        decoder = codecs.getincrementaldecoder('utf-8')('replace')
+        stderr = []
+        logger.debug(">>> [%s] %s", self.hostname, self.cmd)
+        with limiter.limit('ssh') as outcome, _pooled_channel(
+                self.hostname, self.cmd) as channel:
+            while True:
+                # All the data is buffered once the EOF is received
+                eof = channel.eof_received or channel.closed
+                stdout = []
+                _read_channel(channel, stdout, stderr)
+                if outcome.elapsed is None and (stdout or eof):
+                    outcome.elapsed = time.time() - outcome.start
+                    outcome.release()
+                if stdout:
+                    yield decoder.decode(''.join(stdout))
+                elif eof:
+                    break
+                elif not select.select([channel], [], [], self.timeout)[0]:
+                    raise socket.timeout(
+                        'No output for {0} seconds: {1}'.format(
+                            self.timeout, self.cmd))
+            yield decoder.decode('', final=True)
+            self.return_code = channel.recv_exit_status()
+            _read_channel(channel, [], stderr)
+        # Ignore stderr on success, as command does
+        if self.return_code == 0:
+            self.stderr = []
+        else:
+            self.stderr = _COLOR_REGEX.sub('', ''.join(stderr))
+
+    def _lines(self):
+        """Yield the cleaned up output lines."""
+        # The chunks of the line being received, joined once it ends
+        pending = []
+        for chunk in self._chunks():
+            if u'\n' not in chunk:
+                pending.append(chunk)
+                continue
+            lines = chunk.split(u'\n')
+            pending.append(lines[0])
+            lines[0] = u''.join(pending)
+            pending = [lines.pop()]
+            for line in lines:
+                if not line.startswith(u'['):
+                    yield self._clean(line)
+        line = u''.join(pending)
+        if line and not line.startswith(u'['):
+            yield self._clean(line)
+
+    def _clean(self, line):
+        """Remove colors and, unless the output is CSV, empty quotes."""
+        if self.output_format != 'csv':
+            line = line.replace(u'""', u'')
+        return _COLOR_REGEX.sub(u'', line)
+
+
+def command_stream(cmd, hostname=None, timeout=None, output_format=None):
+    """Executes SSH command on remote hostname streaming its output.
+
+    :param str output_format: The hammer output format, if any. CSV output
+        lines are not stripped of empty quotes, so that they can be parsed.
+    :return: An iterable over the output lines, see :class:`SSHCommandStream`.
+    :rtype: SSHCommandStream
+
+    """
+    return SSHCommandStream(cmd, hostname, timeout, output_format)
+
+
+def command_result(stdout, stderr, return_code, output_format=None):
+    """Clean up the raw output of a command and build its result.
+
+    Colors and Rails traffic information are removed from ``stdout``, which is
+    split into lines unless ``output_format`` is ``json``. ``stderr`` is
+    ignored if the command succeeded.
+
+    :param str stdout: The raw standard output of the command.
+    :param str stderr: The raw standard error of the command.
+    :param int return_code: The exit status of the command.
+    :param str output_format: The hammer output format, if any.
+    :rtype: SSHCommandResult
+
+    """
     if stdout:
         stdout = stdout.decode('utf-8')
         logger.debug("<<<\n%s", stdout)
@@ -167,21 +924,24 @@ def command(cmd, hostname=None, output_format=None, timeout=None):
     if stdout and output_format != 'json':
         # For output we don't really want to see all of Rails traffic
         # information, so strip it out.
-        # Empty fields are returned as "" which gives us u'""'
-        stdout = stdout.replace('""', '')
+        # Empty fields are returned as "" which gives us u'""'. CSV output is
+        # left untouched, "" is an escaped quote in quoted values there.
+        if output_format != 'csv':
+            stdout = stdout.replace('""', '')
         stdout = u"".join(stdout).split("\n")
         stdout = [
-            regex.sub('', line) for line in stdout if not line.startswith("[")
+            _COLOR_REGEX.sub('', line)
+            for line in stdout if not line.startswith("[")
         ]
 
-    # Ignore stderr if errorcode == 0. This is necessary since
+    # Ignore stderr if return_code == 0. This is necessary since
     # we're running Foreman in verbose mode which generates a lot
     # of output return as stderr.
-    errors = [] if errorcode == 0 else stderr
+    errors = [] if return_code == 0 else stderr
 
     if errors:
-        errors = regex.sub('', "".join(errors))
+        errors = _COLOR_REGEX.sub('', "".join(errors))
         logger.debug("<<< %s", errors)
 
     return SSHCommandResult(
-        stdout, errors, errorcode, output_format)
+        stdout, errors, return_code, output_format)
@@ -0,0 +1,250 @@
+# -*- encoding: utf-8 -*-
+"""An in-process SSH server standing in for a Satellite server.
+
+:class:`HammerStandInServer` accepts SSH connections on the loopback interface
+and answers ``exec`` requests with canned outputs. It makes it possible to
+exercise :mod:`robottelo.common.ssh` and :class:`robottelo.cli.base.Base`,
+including connection handling and output parsing, without a real server::
+
+    with HammerStandInServer(latency=0.01) as server:
+        server.configure()
+        result = Org.list()
+
+Any public key or password is accepted. Commands are matched against the
+registered regular expressions, the first match wins. Unmatched commands exit
+with status 127.
+
+"""
+import collections
+import logging
+import re
+import socket
+import threading
+import time
+
+import paramiko
+
+from robottelo.common import conf
+
+logger = logging.getLogger(__name__)
+
+#: Seconds to wait before closing a channel once its command is answered.
+CLOSE_DELAY = 1
+
+#: Canned hammer outputs used when none are given to the server. Each item is
+#: a ``(pattern, stdout, stderr, return_code)`` tuple.
+HAMMER_OUTPUTS = (
+    (
+        r'hammer .*organization create',
+        u'Message,Id,Name\nOrganization created,1,Default Organization\n',
+        u'',
+        0,
+    ),
+    (
+        r'hammer .*organization info',
+        u'Id:                 1\n'
+        u'Name:               Default Organization\n'
+        u'Label:              Default_Organization\n'
+        u'Description:\n'
+        u'Created at:         2015/01/01 00:00:00\n'
+        u'Users:\n'
+        u' admin\n'
+        u'Subnets:\n'
+        u'\n'
+        u'Domains:\n'
+        u' 1) example.com\n'
+        u'Compute resources:\n'
+        u'\n',
+        u'',
+        0,
+    ),
+    (
+        r'hammer .*--output=json .*organization list',
+        u'[{"Id": 1, "Name": "Default Organization",'
+        u' "Label": "Default_Organization"}]\n',
+        u'',
+        0,
+    ),
+    (
+        r'hammer .*organization list',
+        u'Id,Name,Label,Description\n' + u''.join(
+            u'{0},Organization {0},Organization_{0},""\n'.format(index)
+            for index in range(1, 101)
+        ),
+        u'',
+        0,
+    ),
+)
+
+
+class _StandInServerInterface(paramiko.ServerInterface):
+    """Accept any credentials and answer exec requests."""
+
+    def __init__(self, server):
+        self.server = server
+
+    def get_allowed_auths(self, username):
+        return 'publickey,password'
+
+    def check_auth_publickey(self, username, key):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_exec_request(self, channel, command):
+        thread = threading.Thread(
+            target=self.server.run_command, args=(channel, command))
+        thread.daemon = True
+        thread.start()
+        return True
+
+
+class HammerStandInServer(object):
+    """An SSH server serving canned command outputs.
+
+    :param outputs: An iterable of ``(pattern, stdout, stderr, return_code)``
+        tuples. Defaults to :data:`HAMMER_OUTPUTS`.
+    :param float latency: Seconds to wait before answering each command.
+
+    """
+
+    def __init__(self, outputs=None, latency=0):
+        self.outputs = [
+            (re.compile(pattern), stdout, stderr, return_code)
+            for pattern, stdout, stderr, return_code
+            in (HAMMER_OUTPUTS if outputs is None else outputs)
+        ]
+        self.latency = latency
+        #: The number of SSH connections accepted.
+        self.connections = 0
+        #: The commands received, in order.
+        self.commands = []
+        self._host_key = paramiko.RSAKey.generate(1024)
+        self._socket = None
+        self._transports = []
+        self._closing = collections.deque()
+        self._lock = threading.Lock()
+        self._backup = None
+        self.port = None
+
+    def start(self):
+        """Start listening on a random port of the loopback interface."""
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind(('127.0.0.1', 0))
+        self._socket.listen(100)
+        self.port = self._socket.getsockname()[1]
+        for target in (self._accept, self._close_channels):
+            thread = threading.Thread(target=target)
+            thread.daemon = True
+            thread.start()
+        logger.info('Stand-in SSH server listening on port {0}'.format(
+            self.port))
+
+    def stop(self):
+        """Stop accepting connections and close the accepted ones."""
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+        with self._lock:
+            transports, self._transports = self._transports, []
+            self._closing.clear()
+        for transport in transports:
+            transport.close()
+        self.restore()
+
+    def configure(self):
+        """Point the configuration to this server.
+
+        ``main.server.hostname`` and ``main.server.ssh.port`` are changed. Call
+        :meth:`restore` (or :meth:`stop`) to restore their previous values.
+
+        """
+        if self._backup is None:
+            self._backup = conf.properties.copy()
+        conf.properties['main.server.hostname'] = '127.0.0.1'
+        conf.properties['main.server.ssh.port'] = str(self.port)
+
+    def restore(self):
+        """Restore the configuration changed by :meth:`configure`."""
+        if self._backup is not None:
+            conf.properties = self._backup
+            self._backup = None
+
+    def add_output(self, pattern, stdout, stderr=u'', return_code=0):
+        """Serve ``stdout`` for commands matching ``pattern``.
+
+        The output takes precedence over the ones already registered.
+
+        """
+        self.outputs.insert(
+            0, (re.compile(pattern), stdout, stderr, return_code))
+
+    def _accept(self):
+        """Accept connections until the listening socket is closed."""
+        while self._socket is not None:
+            try:
+                client, _ = self._socket.accept()
+            except (socket.error, AttributeError):
+                return
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            transport = paramiko.Transport(client)
+            transport.add_server_key(self._host_key)
+            with self._lock:
+                self.connections += 1
+                self._transports.append(transport)
+            try:
+                transport.start_server(server=_StandInServerInterface(self))
+            except (paramiko.SSHException, EOFError, socket.error) as err:
+                logger.debug('Stand-in SSH negotiation failed: {0}'.format(
+                    err))
+
+    def run_command(self, channel, command):
+        """Answer ``command`` on ``channel``."""
+        with self._lock:
+            self.commands.append(command)
+        if self.latency:
+            time.sleep(self.latency)
+        for pattern, stdout, stderr, return_code in self.outputs:
+            if pattern.search(command):
+                break
+        else:
+            stdout, stderr, return_code = (
+                u'', u'{0}: command not found\n'.format(command), 127)
+        try:
+            if stdout:
+                channel.sendall(stdout.encode('utf-8'))
+            if stderr:
+                channel.sendall_stderr(stderr.encode('utf-8'))
+            channel.send_exit_status(return_code)
+            channel.shutdown_write()
+        except (socket.error, EOFError, paramiko.SSHException) as err:
+            logger.debug('Stand-in SSH channel error: {0}'.format(err))
+        # paramiko replies to the exec request only after
+        # check_channel_exec_request returns, and a client receiving the
+        # channel close before that reply considers the request failed. The
+        # output, exit status and EOF are enough for the client anyway.
+        with self._lock:
+            self._closing.append((time.time() + CLOSE_DELAY, channel))
+
+    def _close_channels(self):
+        """Close the answered channels once their close delay expires."""
+        while self._socket is not None:
+            now = time.time()
+            with self._lock:
+                while self._closing and self._closing[0][0] <= now:
+                    self._closing.popleft()[1].close()
+            time.sleep(0.1)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
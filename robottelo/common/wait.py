@@ -0,0 +1,132 @@
+# -*- encoding: utf-8 -*-
+"""Wait for eventually consistent results with an exponential backoff.
+
+Some server operations are not visible at once: elasticsearch indexes a new
+entity after a while, for example. Instead of sleeping a fixed time between
+retries, :func:`wait_for` calls a function until its result is satisfying,
+first right away, then after delays growing exponentially with a random
+jitter, until a deadline::
+
+    response = wait_for(
+        entity.read_raw,
+        until=lambda response: response.status_code != 404,
+        name='activation key indexing',
+    )
+
+The last result is returned whether it is satisfying or not, so the caller
+handles it as if it did not wait. Each wait is counted by name, see
+:func:`stats`.
+
+"""
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+#: Seconds to wait at most by default.
+DEFAULT_TIMEOUT = 25
+#: The first delay, in seconds.
+INITIAL_DELAY = 0.1
+#: The longest delay, in seconds.
+MAX_DELAY = 5
+#: The factor applied to the delay after each attempt.
+FACTOR = 2
+#: The share of a delay which is random, to spread concurrent retries.
+JITTER = 0.5
+
+# Maps the names of the waits to their counters
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def delays(timeout=DEFAULT_TIMEOUT, initial=INITIAL_DELAY, maximum=MAX_DELAY,
+           factor=FACTOR, jitter=JITTER):
+    """Yield the delays to wait between two attempts, until ``timeout``
+
+    Each delay is the previous one times ``factor``, up to ``maximum``, less
+    a random share of up to ``jitter`` of it. The last delay is cut to end at
+    the deadline.
+
+    """
+    deadline = time.time() + timeout
+    delay = initial
+    while True:
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return
+        yield min(remaining, delay * (1 - random.uniform(0, jitter)))
+        delay = min(maximum, delay * factor)
+
+
+def wait_for(function, until=bool, name=None, timeout=DEFAULT_TIMEOUT,
+             retry_on=(), **backoff):
+    """Call ``function`` until ``until`` accepts its result
+
+    :param function: Called without arguments.
+    :param until: Called with the result of ``function``, returns whether
+        it is satisfying. Defaults to the truth of the result.
+    :param str name: The name the wait is counted as, see :func:`stats`.
+        Defaults to the name of ``function``.
+    :param float timeout: Seconds to wait at most.
+    :param tuple retry_on: The exceptions of ``function`` which are retried,
+        the last one being raised once the deadline passes.
+    :param backoff: The ``initial``, ``maximum``, ``factor`` and ``jitter``
+        arguments of :func:`delays`.
+    :return: The last result of ``function``.
+
+    """
+    if name is None:
+        name = getattr(function, '__name__', repr(function))
+    attempts = 0
+    waited = 0
+    schedule = delays(timeout, **backoff)
+    while True:
+        attempts += 1
+        try:
+            result, error = function(), None
+            success = until(result)
+        except retry_on as err:
+            result, error, success = None, err, False
+        delay = None if success else next(schedule, None)
+        if delay is None:
+            break
+        time.sleep(delay)
+        waited += delay
+    _record(name, attempts, waited, success)
+    if not success:
+        logger.debug('Gave up waiting for {0} after {1} attempts'.format(
+            name, attempts))
+    if error is not None:
+        raise error
+    return result
+
+
+def _record(name, attempts, waited, success):
+    """Count a wait in the stats of ``name``"""
+    with _stats_lock:
+        counters = _stats.setdefault(name, {
+            'calls': 0,
+            'attempts': 0,
+            'waited': 0,
+            'timeouts': 0,
+        })
+        counters['calls'] += 1
+        counters['attempts'] += attempts
+        counters['waited'] += waited
+        if not success:
+            counters['timeouts'] += 1
+
+
+def stats():
+    """Return the counters of the waits
+
+    :return: A dictionary mapping the names of the waits to a dictionary of
+        counters: the ``calls`` of :func:`wait_for`, the ``attempts``, the
+        seconds ``waited`` and the ``timeouts``.
+
+    """
+    with _stats_lock:
+        return dict(
+            (name, dict(counters)) for name, counters in _stats.items())
@@ -0,0 +1,91 @@
+# -*- encoding: utf-8 -*-
+"""Teardown of the test processes, nose ``--processes`` workers included.
+
+The workers of a nose ``--processes`` run are ``multiprocessing`` children,
+which exit without running the ``atexit`` handlers. :func:`at_exit` registers
+its functions with ``multiprocessing.util.Finalize`` instead, which runs them
+when a ``multiprocessing`` child exits, and through ``atexit`` when the main
+process exits.
+
+A function is only called by the process which registered it, so register
+it from the process owning what it tears down, like when creating it::
+
+    at_exit(close_shard, SHARD_PRIORITY)
+
+The functions with the highest priority run first: the entities created by
+the tests are deleted before the shard organization holding them, and the
+hammer shells and sessions are closed once no more hammer commands run.
+
+:data:`RUN_ID` identifies the run the process belongs to, for the state
+shared by the processes of a run.
+
+"""
+import logging
+import os
+import threading
+import uuid
+
+from multiprocessing import util
+
+logger = logging.getLogger(__name__)
+
+#: The priority of the teardown of :mod:`robottelo.common.registry`.
+REGISTRY_PRIORITY = 40
+#: The priority of the teardown of :mod:`robottelo.cli.pool`.
+POOL_PRIORITY = 30
+#: The priority of the teardown of :mod:`robottelo.common.shard`.
+SHARD_PRIORITY = 20
+#: The priority of the teardown of :mod:`robottelo.cli.shell`.
+SHELL_PRIORITY = 15
+#: The priority of the teardown of :mod:`robottelo.cli.session`.
+SESSION_PRIORITY = 10
+#: The priority of the functions reporting on the process.
+REPORT_PRIORITY = 0
+#: The priority of the removal of the state shared by the processes of a run.
+RUN_STATE_PRIORITY = -10
+
+# The process which started the run, None if it was started by another one
+_run_pid = None if 'ROBOTTELO_RUN_ID' in os.environ else os.getpid()
+#: The id of the current run, inherited by the processes it starts through
+#: the ``ROBOTTELO_RUN_ID`` environment variable.
+RUN_ID = os.environ.setdefault('ROBOTTELO_RUN_ID', uuid.uuid4().hex)
+
+# The (pid, function) tuples registered
+_registered = set()
+_registered_lock = threading.Lock()
+
+
+def owns_run():
+    """Tell whether the current process started the run, see
+    :data:`RUN_ID`
+
+    """
+    return os.getpid() == _run_pid
+
+
+def at_exit(function, priority):
+    """Call ``function`` when the current process exits
+
+    Registering a function again in the same process does nothing. The
+    exceptions of ``function`` are logged.
+
+    :param function: Called without arguments.
+    :param int priority: The functions with the highest priority run first.
+    :return: Nothing.
+
+    """
+    key = (os.getpid(), function)
+    with _registered_lock:
+        if key in _registered:
+            return
+        _registered.add(key)
+
+    def teardown():
+        """Call ``function``, logging its exceptions"""
+        try:
+            function()
+        except Exception:  # pylint:disable=broad-except
+            logger.exception('Teardown {0} failed'.format(
+                getattr(function, '__name__', function)))
+
+    util.Finalize(None, teardown, exitpriority=priority)
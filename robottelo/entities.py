@@ -16,14 +16,17 @@ creating an entity. That is, the inner class contains non-field information.
 """
 from datetime import datetime
 from fauxfactory import gen_alpha, gen_alphanumeric, gen_url
-from nailgun import client, entity_fields
+from nailgun import client as nailgun_client, entity_fields, entity_mixins
 from nailgun.entity_mixins import (
+    TASK_TIMEOUT,
     Entity,
-    EntityCreateMixin,
     EntityDeleteMixin,
     EntityReadMixin,
-    _poll_task,
 )
+from requests.exceptions import HTTPError
+from robottelo.api import client
+from robottelo.api.pagination import DEFAULT_PER_PAGE, iter_results
+from robottelo.common import registry
 from robottelo.common.constants import (
     FAKE_1_YUM_REPO,
     OPERATING_SYSTEMS,
@@ -36,7 +39,8 @@ from robottelo.common.helpers import (
     get_external_docker_url,
     get_internal_docker_url,
 )
-from time import sleep
+from robottelo.common.wait import wait_for
+import copy
 import httplib
 import random
 # pylint:disable=too-few-public-methods
@@ -47,6 +51,14 @@ import random
 # single OneToOneField and OneToManyField.
 entity_fields.ENTITIES_MODULE = 'robottelo.entities'
 
+# Send the requests of the nailgun mixins over pooled connections too, see
+# robottelo.api.client.
+client.install(nailgun_client)
+
+# The subclasses of the entities created with ``create(fast=True)``, see
+# _UnreadEntity
+_unread_classes = {}
+
 
 class APIResponseError(Exception):
     """Indicates an error if response returns unexpected result."""
@@ -56,6 +68,118 @@ class HostCreateMissingError(Exception):
     """Indicates that ``Host.create_missing`` was unable to execute."""
 
 
+class EntityCreateMixin(entity_mixins.EntityCreateMixin):
+    """Record the entities created for deletion
+
+    Extend ``nailgun.entity_mixins.EntityCreateMixin`` so the entities which
+    can be deleted are tracked by :mod:`robottelo.common.registry`.
+
+    """
+
+    def create_json(self, create_missing=True):
+        """Extend ``nailgun.entity_mixins.EntityCreateMixin.create_json``.
+
+        Track the entity created, see :func:`robottelo.common.registry.track`.
+
+        """
+        attrs = super(EntityCreateMixin, self).create_json(create_missing)
+        if isinstance(self, EntityDeleteMixin) and 'id' in attrs:
+            entity = copy.copy(self)
+            entity.id = attrs['id']
+            registry.track(
+                type(self).__name__, attrs['id'], _registry_delete(entity))
+        return attrs
+
+    def create(self, create_missing=True, fast=False):
+        """Extend ``nailgun.entity_mixins.EntityCreateMixin.create``.
+
+        Reading the entity back after creating it costs one request, more for
+        the entities whose ``read`` fixes up the response of the server. When
+        only the id of the entity is needed, like for the parents of other
+        entities, pass ``fast=True``: the entity returned is built from the
+        values sent and the response to the POST request. It is read from
+        the server the first time a field missing from both is accessed.
+
+        :param bool create_missing: See
+            ``nailgun.entity_mixins.EntityCreateMixin.create``.
+        :param bool fast: Skip reading the entity back.
+        :return: An instance of type ``type(self)``.
+
+        """
+        if not fast:
+            return super(EntityCreateMixin, self).create(create_missing)
+        attrs = self.create_json(create_missing)
+        entity = copy.copy(self)
+        entity.__class__ = _unread_class(type(self))
+        api_names = getattr(self.Meta, 'api_names', {})
+        for field_name, field in self.get_fields().items():
+            if isinstance(field, (entity_fields.OneToOneField,
+                                  entity_fields.OneToManyField)):
+                # The response holds ids only, keep the entities sent
+                continue
+            remote_name = api_names.get(field_name, field_name)
+            if remote_name in attrs:
+                setattr(entity, field_name, attrs[remote_name])
+        return entity
+
+
+class _UnreadEntity(object):
+    """Read the entities created with ``create(fast=True)`` on demand
+
+    The entities are given a subclass of their class deriving from this one,
+    see :func:`_unread_class`. An unset field is the
+    ``nailgun.entity_fields.Field`` of the class: when one is accessed, the
+    entity is read, fills in the fields it lacks and gets its class back, so
+    that only the entities not read yet pay for the check.
+
+    """
+    # The class of the entity, set by _unread_class
+    _entity_class = None
+
+    def __getattribute__(self, name):
+        value = super(_UnreadEntity, self).__getattribute__(name)
+        if isinstance(value, entity_fields.Field):
+            unread_class = type(self)
+            self.__class__ = unread_class._entity_class
+            try:
+                entity = self.read()
+            except Exception:
+                self.__class__ = unread_class
+                raise
+            values = vars(self)
+            for field_name, field_value in entity.get_values().items():
+                values.setdefault(field_name, field_value)
+            value = getattr(self, name)
+        return value
+
+
+def _unread_class(entity_class):
+    """Return the subclass of ``entity_class`` for the unread entities"""
+    unread_class = _unread_classes.get(entity_class)
+    if unread_class is None:
+        unread_class = _unread_classes[entity_class] = type(
+            entity_class.__name__,
+            (_UnreadEntity, entity_class),
+            {'__module__': entity_class.__module__,
+             '_entity_class': entity_class},
+        )
+    return unread_class
+
+
+def _registry_delete(entity):
+    """Return a function deleting ``entity`` for the registry"""
+    def delete():
+        """Delete ``entity``, translating an HTTP 404 response"""
+        try:
+            entity.delete()
+        except HTTPError as err:
+            if (err.response is not None and
+                    err.response.status_code == httplib.NOT_FOUND):
+                raise registry.ResourceNotFound(entity.id)
+            raise
+    return delete
+
+
 class ActivationKey(
         Entity, EntityCreateMixin, EntityDeleteMixin, EntityReadMixin):
     """A representation of a Activtion Key entity."""
@@ -84,13 +208,13 @@ class ActivationKey(
 
         """
         super_read_raw = super(ActivationKey, self).read_raw
-        response = super_read_raw()
-        if rm_bug_is_open(4638):
-            for _ in range(5):
-                if response.status_code == 404:
-                    sleep(5)
-                    response = super_read_raw()
-        return response
+        if not rm_bug_is_open(4638):
+            return super_read_raw()
+        return wait_for(
+            super_read_raw,
+            until=lambda response: response.status_code != 404,
+            name='ActivationKey.read_raw',
+        )
 
     def path(self, which=None):
         """Extend ``nailgun.entity_mixins.Entity.path``.
@@ -1063,13 +1187,19 @@ class ForemanTask(Entity, EntityReadMixin):
         :raises: ``nailgun.entity_mixins.TaskFailedError`` if the task finishes
             with any result other than "success".
         :raises: ``requests.exceptions.HTTPError`` If the API returns a message
-            with an HTTP 4XX or 5XX status code.
+            with an HTTP 4XX status code.
+
+        The task is polled along with the other tasks of the server, see
+        :mod:`robottelo.api.tasks`.
 
         """
-        # pylint:disable=protected-access
-        # See nailgun.entity_mixins._poll_task for an explanation of why a
-        # private method is called.
-        return _poll_task(self.id, self._server_config, poll_rate, timeout)
+        # robottelo.api.tasks uses this module, so it is imported once needed
+        # only.
+        from robottelo.api.tasks import get_poller
+        return get_poller(self._server_config, poll_rate).submit(
+            self.id,
+            TASK_TIMEOUT if timeout is None else timeout
+        ).result()
 
 
 def _gpgkey_content():
@@ -1824,20 +1954,30 @@ class Organization(
         response.raise_for_status()
         return response.json()
 
-    def list_rhproducts(self, per_page=None):
-        """Lists all the RedHat Products after the importing of a manifest.
+    def iter_rhproducts(self, per_page=None, prefetch=False):
+        """Iterate over the RedHat Products after the importing of a
+        manifest, requesting them one page at a time.
 
-        :param int per_page: The no.of results to be shown per page.
+        :param int per_page: The no.of results to be requested per page.
+        :param bool prefetch: Request the next page in the background, see
+            :func:`robottelo.api.pagination.iter_pages`.
 
         """
-        response = client.get(
+        return iter_results(
             self.path('products'),
+            per_page=per_page,
+            prefetch=prefetch,
             auth=self._server_config.auth,
-            data={u'per_page': per_page},
             verify=self._server_config.verify,
         )
-        response.raise_for_status()
-        return response.json()['results']
+
+    def list_rhproducts(self, per_page=None):
+        """Lists all the RedHat Products after the importing of a manifest.
+
+        :param int per_page: The no.of results to be requested per page.
+
+        """
+        return list(self.iter_rhproducts(per_page))
 
 
 class OSDefaultTemplate(Entity):
@@ -1882,7 +2022,32 @@ class Permission(Entity, EntityReadMixin):
         api_path = 'api/v2/permissions'
         server_modes = ('sat', 'sam')
 
-    def search(self, per_page=10000):
+    def iter_search(self, per_page=DEFAULT_PER_PAGE, prefetch=False):
+        """Iterate over the permissions matching the values for instance
+        name and resource_type, requesting them one page at a time.
+
+        See :meth:`search` for the search terms.
+
+        :param int per_page: number of results per page to request
+        :param bool prefetch: Request the next page in the background, see
+            :func:`robottelo.api.pagination.iter_pages`.
+
+        """
+        search_terms = {}
+        if 'name' in vars(self):
+            search_terms[u'name'] = self.name
+        if 'resource_type' in vars(self):
+            search_terms[u'resource_type'] = self.resource_type
+        return iter_results(
+            self.path('base'),
+            search_terms,
+            per_page=per_page,
+            prefetch=prefetch,
+            auth=self._server_config.auth,
+            verify=self._server_config.verify,
+        )
+
+    def search(self, per_page=DEFAULT_PER_PAGE):
         """Searches for permissions using the values for instance name and
         resource_type
 
@@ -1901,24 +2066,11 @@ class Permission(Entity, EntityReadMixin):
         If both ``name`` and ``resource_type`` are provided, ``name`` is
         ignored.
 
-        :param int per_page: number of results per page to return
+        :param int per_page: number of results per page to request
         :returns: A list of matching permissions.
 
         """
-        search_terms = {u'per_page': per_page}
-        if 'name' in vars(self):
-            search_terms[u'name'] = self.name
-        if 'resource_type' in vars(self):
-            search_terms[u'resource_type'] = self.resource_type
-
-        response = client.get(
-            self.path('base'),
-            auth=self._server_config.auth,
-            data=search_terms,
-            verify=self._server_config.verify,
-        )
-        response.raise_for_status()
-        return response.json()['results']
+        return list(self.iter_search(per_page))
 
 
 class Ping(Entity):
@@ -1998,20 +2150,30 @@ class Product(
 
         return super(Product, self).read(entity, attrs, ignore)
 
-    def list_repositorysets(self, per_page=None):
-        """Lists all the RepositorySets in a Product.
+    def iter_repositorysets(self, per_page=None, prefetch=False):
+        """Iterate over the RepositorySets in a Product, requesting them
+        one page at a time.
 
-        :param int per_page: The no.of results to be shown per page.
+        :param int per_page: The no.of results to be requested per page.
+        :param bool prefetch: Request the next page in the background, see
+            :func:`robottelo.api.pagination.iter_pages`.
 
         """
-        response = client.get(
+        return iter_results(
             self.path('repository_sets'),
+            per_page=per_page,
+            prefetch=prefetch,
             auth=self._server_config.auth,
-            data={u'per_page': per_page},
             verify=self._server_config.verify,
         )
-        response.raise_for_status()
-        return response.json()['results']
+
+    def list_repositorysets(self, per_page=None):
+        """Lists all the RepositorySets in a Product.
+
+        :param int per_page: The no.of results to be requested per page.
+
+        """
+        return list(self.iter_repositorysets(per_page))
 
     def fetch_rhproduct_id(self, name, org_id):
         """Fetches the RedHat Product Id for a given Product name.
@@ -2304,7 +2466,8 @@ class Repository(
         :raises: ``APIResponseError`` If the API does not return any results.
 
         """
-        for _ in range(5 if bz_bug_is_open(1176708) else 1):
+        def search():
+            """Return the repositories named ``name``"""
             response = client.get(
                 self.path(which=None),
                 auth=self._server_config.auth,
@@ -2312,11 +2475,12 @@ class Repository(
                 verify=self._server_config.verify,
             )
             response.raise_for_status()
-            results = response.json()['results']
-            if len(results) == 0 and bz_bug_is_open(1176708):
-                sleep(5)
-            else:
-                break
+            return response.json()['results']
+
+        if bz_bug_is_open(1176708):
+            results = wait_for(search, name='Repository.fetch_repoid')
+        else:
+            results = search()
         if len(results) != 1:
             raise APIResponseError(
                 'Found {0} repositories named {1} in organization {2}: {3} '
@@ -18,7 +18,7 @@ from datetime import datetime
 from fabric.api import execute, settings
 from robottelo.cli.metatest import MetaCLITest
 from robottelo.common.helpers import get_server_url
-from robottelo.common import conf
+from robottelo.common import conf, registry, shard
 from robottelo.ui.activationkey import ActivationKey
 from robottelo.ui.architecture import Architecture
 from robottelo.ui.computeresource import ComputeResource
@@ -60,7 +60,13 @@ SAUCE_URL = "http://%s:%s@ondemand.saucelabs.com:80/wd/hub"
 
 
 class TestCase(unittest.TestCase):
-    """Robottelo test case"""
+    """Robottelo test case
+
+    When sharding is enabled, ``shard`` is the organization and location of
+    the worker running the test case, see :mod:`robottelo.common.shard`. It
+    is ``None`` otherwise.
+
+    """
 
     @classmethod
     def setUpClass(cls):  # noqa
@@ -68,6 +74,13 @@ class TestCase(unittest.TestCase):
         cls.logger = logging.getLogger('robottelo')
         # NOTE: longMessage defaults to True in Python 3.1 and above
         cls.longMessage = True
+        cls.shard = shard.current()
+        registry.start_class(cls)
+
+    @classmethod
+    def tearDownClass(cls):  # noqa
+        registry.finish_class(cls)
+        super(TestCase, cls).tearDownClass()
 
 
 class APITestCase(TestCase):
@@ -286,6 +299,7 @@ class UITestCase(TestCase):
                 cls.display.pid,
                 cls.display.display
             )
+        super(UITestCase, cls).tearDownClass()
 
 
 class InstallerTestCase(TestCase):
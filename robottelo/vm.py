@@ -143,6 +143,9 @@ class VirtualMachine(object):
         )
         if result.return_code > 0:
             logger.warning(result.stderr)
+        # The pooled connections to the destroyed machine are useless now
+        if self.ip_addr is not None:
+            ssh.close_connections(self.ip_addr)
 
         image_name = '{0}.img'.format(self.target_image)
         result = ssh.command(
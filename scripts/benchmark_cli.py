@@ -0,0 +1,130 @@
+#!/usr/bin/env python2
+"""Benchmark the overhead of the CLI layer.
+
+Run :class:`robottelo.cli.base.Base` operations against an in-process
+:class:`robottelo.common.sshserver.HammerStandInServer`, so no Satellite
+server or network is needed. For each operation print the throughput in
+commands per second, the 50th and 99th percentile latencies, and the memory
+used: the number of live objects left behind per operation and the growth of
+the peak resident set size.
+
+Use the ``benchmark-cli`` command provided by the make file in the parent
+directory to run it with the default options.
+
+"""
+from __future__ import print_function
+import argparse
+import gc
+import os
+import resource
+import sys
+import time
+
+# Append parent dir to sys.path if not already present. Do this so that
+# robottelo can be imported.
+ROBOTTELO_PATH = os.path.realpath(os.path.join(
+    os.path.dirname(__file__),
+    os.path.pardir
+))
+if ROBOTTELO_PATH not in sys.path:
+    sys.path.append(ROBOTTELO_PATH)
+from robottelo.cli.org import Org  # noqa pylint:disable=import-error
+from robottelo.common import conf, ssh  # noqa pylint:disable=import-error
+from robottelo.common.sshserver import (  # noqa pylint:disable=import-error
+    HammerStandInServer
+)
+
+#: The benchmarked operations.
+OPERATIONS = (
+    ('execute', lambda: Org.execute(u'organization list')),
+    ('create', lambda: Org.create({u'name': u'Default Organization'})),
+    ('list', Org.list),
+    ('exists', lambda: Org.exists(search=(u'name', u'Organization 1'))),
+)
+
+
+def percentile(values, percent):
+    """Return the ``percent`` percentile of the sorted list ``values``."""
+    index = int(round(percent / 100.0 * (len(values) - 1)))
+    return values[index]
+
+
+def benchmark(operation, iterations):
+    """Run ``operation`` ``iterations`` times and collect statistics.
+
+    :return: A tuple with the commands per second, p50 and p99 latencies in
+        milliseconds, live objects left per operation and peak RSS growth in
+        KiB.
+
+    """
+    operation()  # Warm up connections and caches
+    gc.collect()
+    objects_before = len(gc.get_objects())
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    latencies = []
+    start = time.time()
+    for _ in range(iterations):
+        operation_start = time.time()
+        result = operation()
+        latencies.append((time.time() - operation_start) * 1000)
+        if result.return_code != 0:
+            raise RuntimeError(result.stderr)
+    elapsed = time.time() - start
+    del result
+    gc.collect()
+    objects_after = len(gc.get_objects())
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    latencies.sort()
+    return (
+        iterations / elapsed,
+        percentile(latencies, 50),
+        percentile(latencies, 99),
+        float(objects_after - objects_before) / iterations,
+        rss_after - rss_before,
+    )
+
+
+def main():
+    """Parse the arguments and run the benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument(
+        '-n', '--iterations', type=int, default=200,
+        help='How many times each operation runs (default: %(default)s).')
+    parser.add_argument(
+        '-l', '--latency', type=float, default=0,
+        help='Seconds the server waits before answering (default: '
+        '%(default)s).')
+    parser.add_argument(
+        'operations', nargs='*', metavar='operation',
+        help='Operations to run, one of: {0} (default: all).'.format(
+            ', '.join(name for name, _ in OPERATIONS)))
+    args = parser.parse_args()
+
+    key_filename = os.path.join(
+        ROBOTTELO_PATH, 'tests', 'robottelo', 'data', 'test_dsa.key')
+    with HammerStandInServer(latency=args.latency) as server:
+        server.configure()
+        conf.properties['main.server.ssh.username'] = 'robottelo'
+        conf.properties['main.server.ssh.key_private'] = key_filename
+        conf.properties.setdefault('main.locale', 'en_US.UTF-8')
+        conf.properties.setdefault('foreman.admin.username', 'admin')
+        conf.properties.setdefault('foreman.admin.password', 'changeme')
+
+        print('{0:<10}{1:>12}{2:>10}{3:>10}{4:>12}{5:>12}'.format(
+            'operation', 'cmds/s', 'p50 ms', 'p99 ms', 'objs/op', 'rss KiB'))
+        for name, operation in OPERATIONS:
+            if args.operations and name not in args.operations:
+                continue
+            commands = len(server.commands)
+            stats = benchmark(operation, args.iterations)
+            # create runs two commands per operation
+            per_operation = (
+                len(server.commands) - commands) / (args.iterations + 1.0)
+            print('{0:<10}{1:>12.1f}{2:>10.2f}{3:>10.2f}{4:>12.1f}{5:>12}'
+                  .format(name, stats[0] * per_operation, *stats[1:]))
+        print('SSH connections opened: {0}'.format(server.connections))
+        ssh.close_connections()
+
+
+if __name__ == '__main__':
+    main()
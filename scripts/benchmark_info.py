@@ -0,0 +1,163 @@
+#!/usr/bin/env python2
+"""Benchmark the parser of hammer ``info`` outputs.
+
+Parse the recorded outputs found in ``tests/robottelo/data/hammer_info`` with
+:func:`robottelo.common.helpers.info_dictionary` and with the line by line
+implementation it replaced, and print the throughput of both in lines per
+second. The outputs the former implementation can not parse, the ones with
+nested collections, are only parsed by the current one.
+
+Use the ``benchmark-info`` command provided by the make file in the parent
+directory to run it with the default options.
+
+"""
+from __future__ import print_function
+import argparse
+import codecs
+import os
+import re
+import sys
+import time
+
+# Append parent dir to sys.path if not already present. Do this so that
+# robottelo can be imported.
+ROBOTTELO_PATH = os.path.realpath(os.path.join(
+    os.path.dirname(__file__),
+    os.path.pardir
+))
+if ROBOTTELO_PATH not in sys.path:
+    sys.path.append(ROBOTTELO_PATH)
+from robottelo.common.helpers import (  # noqa pylint:disable=import-error
+    info_dictionary
+)
+
+#: The directory holding the recorded ``hammer ... info`` outputs.
+CORPUS_PATH = os.path.join(
+    ROBOTTELO_PATH, 'tests', 'robottelo', 'data', 'hammer_info')
+
+
+class Result(object):
+    """A minimal stand-in for :class:`robottelo.common.ssh.SSHCommandResult`.
+
+    """
+    def __init__(self, stdout):
+        self.stdout = stdout
+
+
+def legacy_info_dictionary(result):  # noqa pylint:disable=R0912
+    """The former implementation of
+    :func:`robottelo.common.helpers.info_dictionary`.
+
+    """
+    r = {}
+    sub_prop = None  # stores name of the last group of sub-properties
+    sub_num = None  # is not None when list of properties
+
+    for line in result.stdout:
+        if line == '':
+            continue
+        if line.startswith(' '):
+            if line.find(':') != -1:
+                key, value = line.lstrip().split(":", 1)
+            elif line.find('=>') != -1:
+                key, value = line.lstrip().split(" =>", 1)
+            else:
+                key = value = None
+
+            if key is None and value is None:
+                match = re.match(r'\d+\)\s+(.+)$', line.lstrip())
+                if match is None:
+                    match = re.match(r'(.*)$', line.lstrip())
+                value = match.group(1)
+                if isinstance(r[sub_prop], dict):
+                    r[sub_prop] = []
+                r[sub_prop].append(value)
+            else:
+                starts_with_number = re.match(r'(\d+)\)', key)
+                if starts_with_number:
+                    sub_num = int(starts_with_number.group(1))
+                    if sub_num == 1:
+                        r[sub_prop] = []
+                    key = re.sub(r'\d+\)', '', key)
+                    r[sub_prop].append({})
+                key = key.lstrip().replace(' ', '-').lower()
+                if sub_num is not None:
+                    r[sub_prop][-1][key] = value.lstrip()
+                else:
+                    r[sub_prop][key] = value.lstrip()
+        else:
+            sub_num = None
+            key, value = line.lstrip().split(":", 1)
+            key = key.lstrip().replace(' ', '-').lower()
+            if value.lstrip() == '':
+                sub_prop = key
+                r[sub_prop] = {}
+            else:
+                r[key] = value.lstrip()
+
+    result.stdout = r
+    return result
+
+
+def load_corpus():
+    """Return a list of ``(name, lines)`` tuples, one per recorded output."""
+    corpus = []
+    for filename in sorted(os.listdir(CORPUS_PATH)):
+        with codecs.open(
+                os.path.join(CORPUS_PATH, filename), encoding='utf-8') as fh:
+            corpus.append((filename, fh.read().split('\n')))
+    return corpus
+
+
+def throughput(parser, lines, iterations, repeat=5):
+    """Return how many lines per second ``parser`` handles.
+
+    The best of ``repeat`` runs of ``iterations`` parsings is kept.
+
+    """
+    best = None
+    for _ in range(repeat):
+        results = [Result(list(lines)) for _ in range(iterations)]
+        start = time.time()
+        for result in results:
+            parser(result)
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(lines) * iterations / best
+
+
+def main():
+    """Parse the arguments and run the benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument(
+        '-n', '--iterations', type=int, default=2000,
+        help='How many times each output is parsed (default: %(default)s).')
+    args = parser.parse_args()
+
+    print('{0:<26}{1:>8}{2:>14}{3:>14}{4:>9}'.format(
+        'output', 'lines', 'legacy l/s', 'current l/s', 'speedup'))
+    totals = [0, 0, 0]
+    for name, lines in load_corpus():
+        current = throughput(info_dictionary, lines, args.iterations)
+        try:
+            expected = legacy_info_dictionary(Result(lines)).stdout
+        except (KeyError, AttributeError, TypeError):
+            # Nested collections make the former implementation fail
+            print('{0:<26}{1:>8}{2:>14}{3:>14.0f}{4:>9}'.format(
+                name, len(lines), 'fails', current, '-'))
+            continue
+        legacy = throughput(legacy_info_dictionary, lines, args.iterations)
+        same = info_dictionary(Result(lines)).stdout == expected
+        print('{0:<26}{1:>8}{2:>14.0f}{3:>14.0f}{4:>8.2f}x{5}'.format(
+            name, len(lines), legacy, current, current / legacy,
+            '' if same else '  (outputs differ)'))
+        totals[0] += len(lines)
+        totals[1] += len(lines) / legacy
+        totals[2] += len(lines) / current
+    print('{0:<26}{1:>8}{2:>14.0f}{3:>14.0f}{4:>8.2f}x'.format(
+        'total', totals[0], totals[0] / totals[1], totals[0] / totals[2],
+        totals[1] / totals[2]))
+
+
+if __name__ == '__main__':
+    main()
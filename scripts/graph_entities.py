@@ -9,7 +9,6 @@ command provided by the make file in the parent directory.
 """
 from __future__ import print_function
 from nailgun import entity_mixins
-import inspect  # noqa
 
 # Append parent dir to sys.path if not already present. Do this so that
 # robottelo can be imported.
@@ -22,29 +21,26 @@ ROBOTTELO_PATH = os.path.realpath(os.path.join(
 if ROBOTTELO_PATH not in sys.path:
     sys.path.append(ROBOTTELO_PATH)
 from robottelo import entities  # noqa pylint:disable=import-error
+from robottelo.common.graph import (  # noqa pylint:disable=import-error
+    entity_relationships
+)
 
 
 def graph():
     """Read through ``robottelo/entities.py`` and graph their relationships."""
-    # Compile a dict of `entity_mixins.Entity` subclasses.
-    entities_ = {}
-    for name, klass in inspect.getmembers(entities, inspect.isclass):
-        if issubclass(klass, entity_mixins.Entity):
-            entities_[name] = klass
     # Generate DOT-formatted output.
     print('digraph dependencies {')
-    for entity_name, entity in entities_.items():
+    for entity_name, relationships in entity_relationships(entities).items():
         # Graph out which entities this entity depends on.
-        for field_name, field in entity.get_fields().items():
-            if (isinstance(field, entity_mixins.OneToOneField) or
-                    isinstance(field, entity_mixins.OneToManyField)):
-                print('{0} -> {1} [label="{2}"{3}]'.format(
-                    entity_name,
-                    field.entity,
-                    field_name,
-                    ' color=red' if field.required else ''
-                ))
+        for field_name, field_entity, required in relationships:
+            print('{0} -> {1} [label="{2}"{3}]'.format(
+                entity_name,
+                field_entity,
+                field_name,
+                ' color=red' if required else ''
+            ))
         # Make entities that cannot be created less visible.
+        entity = getattr(entities, entity_name)
         if not issubclass(entity, entity_mixins.EntityCreateMixin):
             print('{0} [style=dotted]'.format(entity_name))
     print('}')
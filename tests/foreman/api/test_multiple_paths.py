@@ -767,7 +767,7 @@ class EntityReadTestCase(APITestCase):
         name and resource_type fields are populated
 
         """
-        attrs = entities.Permission().search(per_page=1)[0]
+        attrs = next(entities.Permission().iter_search(per_page=1))
         read_entity = entities.Permission(id=attrs['id']).read()
         self.assertIsInstance(read_entity, entities.Permission)
         self.assertGreater(len(read_entity.name), 0)
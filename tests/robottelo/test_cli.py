@@ -1,7 +1,14 @@
+import threading
 import unittest
 
-from robottelo.common import conf
-from robottelo.cli.base import Base
+from mock import patch
+from multiprocessing.pool import ThreadPool
+from robottelo.common import conf, ssh
+from robottelo.cli.base import Base, HammerCommand, command_cache
+from robottelo.cli.factory import CLIFactoryError, make_user_many
+from robottelo.cli.fixtures import FixtureGraph, build_fixtures
+from robottelo.cli.org import Org
+from robottelo.cli.product import Product
 
 
 class CLIClass(Base):
@@ -25,13 +32,13 @@ class BaseCliTestCase(unittest.TestCase):
     def test_construct_command(self):
         """_construct_command builds a command using flags and arguments"""
         Base.command_base = 'basecommand'
-        Base.command_sub = 'subcommand'
-        command_parts = Base._construct_command({
+        command = Base._construct_command({
             u'flag-one': True,
             u'flag-two': False,
             u'argument': u'value',
             u'ommited-arg': None,
-        }).split()
+        }, 'subcommand')
+        command_parts = command.split()
 
         self.assertIn(u'basecommand', command_parts)
         self.assertIn(u'subcommand', command_parts)
@@ -39,6 +46,36 @@ class BaseCliTestCase(unittest.TestCase):
         self.assertIn(u'--argument="value"', command_parts)
         self.assertNotIn(u'--flag-two', command_parts)
         self.assertEqual(len(command_parts), 4)
+        self.assertEqual(command.command_base, 'basecommand')
+        self.assertEqual(command.command_sub, 'subcommand')
+        self.assertIn((u'argument', u'value'), command.options)
+
+    def test_command_immutable(self):
+        """HammerCommand attributes can not be changed"""
+        command = HammerCommand('organization', 'info', {u'id': 1})
+        self.assertEqual(command, u'organization info --id="1"')
+        with self.assertRaises(AttributeError):
+            command.command_sub = 'delete'
+
+    def test_concurrent_commands(self):
+        """Different sub commands can be built from many threads"""
+        conf.properties['main.locale'] = 'en_US.UTF-8'
+        pool = ThreadPool(8)
+        with patch('robottelo.common.ssh.command') as command:
+            command.side_effect = lambda cmd, **_: ssh.command_result(
+                '', '', 0)
+            pool.map(
+                lambda index: (Org.list if index % 2 else Org.info)(
+                    {u'id': index}),
+                range(200)
+            )
+        pool.close()
+        for call in command.call_args_list:
+            index = int(call[0][0].split('--id="')[1].split('"')[0])
+            self.assertIn(
+                'organization list' if index % 2 else 'organization info',
+                call[0][0]
+            )
 
     def test_username_password_parameters_lookup(self):
         """Username and password returned are the parameters"""
@@ -68,3 +105,363 @@ class BaseCliTestCase(unittest.TestCase):
         self.assertEqual(new_class.foreman_admin_username, 'auser')
         self.assertEqual(new_class.foreman_admin_password, 'apass')
         self.assertIn(Base, new_class.__bases__)
+
+    def test_with_user_reused(self):
+        """``with_user`` returns the same class for the same user"""
+        self.assertIs(
+            Base.with_user('auser', 'apass'), Base.with_user('auser', 'apass'))
+        self.assertIsNot(
+            Base.with_user('auser', 'apass'), Org.with_user('auser', 'apass'))
+        self.assertIsNot(
+            Base.with_user('auser', 'apass'), Base.with_user('buser', 'apass'))
+
+
+class JSONOutputTestCase(unittest.TestCase):
+    """Tests for the JSON output mode of the Base cli class"""
+    def setUp(self):  # noqa
+        super(JSONOutputTestCase, self).setUp()
+        self.old_properties = conf.properties.copy()
+        conf.properties['foreman.admin.username'] = 'admin'
+        conf.properties['foreman.admin.password'] = 'changeme'
+        conf.properties['main.locale'] = 'en_US.UTF-8'
+        conf.properties['main.hammer.json'] = '1'
+
+    def tearDown(self):  # noqa
+        super(JSONOutputTestCase, self).tearDown()
+        conf.properties = self.old_properties
+
+    @staticmethod
+    def fake_command(outputs):
+        """Return a fake ``ssh.command`` answering with ``outputs``."""
+        def command(cmd, output_format=None, **_):
+            """Answer with the output of the first matching command."""
+            for sub_command, stdout in outputs:
+                if sub_command in cmd:
+                    return ssh.command_result(stdout, '', 0, output_format)
+            raise AssertionError('Unexpected command: {0}'.format(cmd))
+        return command
+
+    def test_create(self):
+        """create reads the new record back as typed JSON"""
+        outputs = [
+            ('--output=json organization create',
+             '{"Message": "Organization created", "Id": 7, "Name": "org"}'),
+            ('--output=json organization info --id="7"',
+             '{"Id": 7, "Name": "org", "Created at": "2015/01/14",'
+             ' "Users": [{"Login": "admin"}], "Default": false}'),
+        ]
+        with patch('robottelo.common.ssh.command',
+                   side_effect=self.fake_command(outputs)):
+            result = Org.create({u'name': u'org'})
+        self.assertEqual(result.stdout, {
+            u'id': 7,
+            u'name': u'org',
+            u'created-at': u'2015/01/14',
+            u'users': [{u'login': u'admin'}],
+            u'default': False,
+        })
+
+    def test_list(self):
+        """list returns typed JSON records"""
+        outputs = [
+            ('--output=json organization list',
+             '[{"Id": 1, "Name": "org"}, {"Id": 2, "Name": "other"}]'),
+        ]
+        with patch('robottelo.common.ssh.command',
+                   side_effect=self.fake_command(outputs)):
+            result = Org.list()
+        self.assertEqual(
+            result.stdout,
+            [{u'id': 1, u'name': u'org'}, {u'id': 2, u'name': u'other'}]
+        )
+
+    def test_disabled(self):
+        """info scrapes the human readable output when disabled"""
+        conf.properties['main.hammer.json'] = '0'
+        outputs = [('organization info', 'Id: 7\nName: org\n')]
+        with patch('robottelo.common.ssh.command',
+                   side_effect=self.fake_command(outputs)) as command:
+            result = Org.info({u'id': 7})
+        self.assertNotIn('--output', command.call_args[0][0])
+        self.assertEqual(result.stdout, {u'id': u'7', u'name': u'org'})
+
+
+class CommandCacheTestCase(unittest.TestCase):
+    """Tests for the command cache of the Base cli class"""
+    def setUp(self):  # noqa
+        super(CommandCacheTestCase, self).setUp()
+        self.old_properties = conf.properties.copy()
+        conf.properties['foreman.admin.username'] = 'admin'
+        conf.properties['foreman.admin.password'] = 'changeme'
+        conf.properties['main.locale'] = 'en_US.UTF-8'
+        conf.properties['main.hammer.cache'] = '1'
+        command_cache.clear()
+        patcher = patch('robottelo.common.ssh.command')
+        self.command = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.command.side_effect = lambda cmd, output_format=None, **_: (
+            ssh.command_result('Id,Name\n1,org\n', '', 0, output_format))
+
+    def tearDown(self):  # noqa
+        super(CommandCacheTestCase, self).tearDown()
+        command_cache.clear()
+        conf.properties = self.old_properties
+
+    def test_hit(self):
+        """Read only commands run once and results are copies"""
+        first = Org.list({u'id': 1})
+        first.stdout[0][u'name'] = u'changed'
+        second = Org.list({u'id': u'1'})
+        self.assertEqual(self.command.call_count, 1)
+        self.assertEqual(second.stdout, [{u'id': u'1', u'name': u'org'}])
+        self.assertEqual(
+            command_cache.stats(),
+            {'hits': 1, 'misses': 1, 'invalidations': 0, 'size': 1}
+        )
+
+    def test_key(self):
+        """Options, users and sub commands are part of the key"""
+        Org.list({u'id': 1})
+        Org.list({u'id': 2})
+        Org.with_user('other', 'pass').list({u'id': 1})
+        Org.puppetclasses({u'id': 1})
+        self.assertEqual(self.command.call_count, 4)
+
+    def test_invalidation(self):
+        """Mutating commands drop the outputs of their command base"""
+        Org.list()
+        Product.list({u'organization-id': 1})
+        Org.delete({u'id': 1})
+        Org.list()
+        Product.list({u'organization-id': 1})
+        self.assertEqual(self.command.call_count, 4)
+        self.assertEqual(command_cache.invalidations, 1)
+
+    def test_plain_command(self):
+        """Commands given as strings drop all the outputs"""
+        Org.list()
+        Org.execute(u'product delete --id=1')
+        Org.list()
+        self.assertEqual(self.command.call_count, 3)
+
+    def test_failure(self):
+        """Failed commands are not cached"""
+        self.command.side_effect = lambda cmd, output_format=None, **_: (
+            ssh.command_result('', 'Error', 1, output_format))
+        Org.list()
+        Org.list()
+        self.assertEqual(self.command.call_count, 2)
+
+    def test_ttl(self):
+        """Outputs expire after the TTL"""
+        conf.properties['main.hammer.cache.ttl'] = '0'
+        Org.list()
+        Org.list()
+        self.assertEqual(self.command.call_count, 2)
+
+    def test_disabled(self):
+        """Nothing is cached when disabled"""
+        conf.properties['main.hammer.cache'] = '0'
+        Org.list()
+        Org.list()
+        self.assertEqual(self.command.call_count, 2)
+        self.assertEqual(command_cache.misses, 0)
+
+
+class PipelineTestCase(unittest.TestCase):
+    """Tests for the pipeline of the Base cli class"""
+    def setUp(self):  # noqa
+        super(PipelineTestCase, self).setUp()
+        self.old_properties = conf.properties.copy()
+        conf.properties['foreman.admin.username'] = 'admin'
+        conf.properties['foreman.admin.password'] = 'changeme'
+        conf.properties['main.locale'] = 'en_US.UTF-8'
+
+    def tearDown(self):  # noqa
+        super(PipelineTestCase, self).tearDown()
+        conf.properties = self.old_properties
+
+    @patch('robottelo.common.ssh.command_pipeline')
+    def test_pipeline(self, command_pipeline):
+        """Queued commands run together when the block exits"""
+        command_pipeline.return_value = ['first', 'second']
+        with Org.pipeline(parallel=True) as pipe:
+            self.assertEqual(
+                pipe.execute(HammerCommand('organization', 'list'), 'csv'), 0)
+            self.assertEqual(pipe.execute(u'product list'), 1)
+            self.assertFalse(command_pipeline.called)
+        self.assertEqual(pipe.results, ['first', 'second'])
+        cmds = command_pipeline.call_args[0][0]
+        self.assertIn(u'hammer -v -u admin -p changeme', cmds[0])
+        self.assertIn(u'--output=csv organization list', cmds[0])
+        self.assertTrue(cmds[1].endswith(u'product list'))
+        self.assertEqual(
+            command_pipeline.call_args[1]['output_formats'], ['csv', None])
+        self.assertTrue(command_pipeline.call_args[1]['parallel'])
+
+    @patch('robottelo.common.ssh.command_pipeline')
+    def test_exception(self, command_pipeline):
+        """Nothing runs if the block raises an exception"""
+        with self.assertRaises(ValueError):
+            with Org.pipeline() as pipe:
+                pipe.execute(u'organization list')
+                raise ValueError
+        self.assertFalse(command_pipeline.called)
+        self.assertIsNone(pipe.results)
+
+
+class BulkFactoryTestCase(unittest.TestCase):
+    """Tests for the bulk factories of ``robottelo.cli.factory``"""
+    def setUp(self):  # noqa
+        super(BulkFactoryTestCase, self).setUp()
+        self.old_properties = conf.properties.copy()
+        conf.properties['foreman.admin.username'] = 'admin'
+        conf.properties['foreman.admin.password'] = 'changeme'
+        conf.properties['main.locale'] = 'en_US.UTF-8'
+
+    def tearDown(self):  # noqa
+        super(BulkFactoryTestCase, self).tearDown()
+        conf.properties = self.old_properties
+
+    @staticmethod
+    def fake_pipeline(cmds, output_formats=None, **kwargs):
+        """Answer the user create and info commands"""
+        results = []
+        for index, cmd in enumerate(cmds):
+            if u'user create' in cmd:
+                results.append(ssh.command_result(
+                    'Message,Id,Login\nUser created,{0},user{0}\n'
+                    .format(index + 1),
+                    '', 0, output_formats[index]))
+            else:
+                user_id = cmd.split(u'--id="')[1].split(u'"')[0]
+                results.append(ssh.command_result(
+                    'Id: {0}\nLogin: user{0}\n'.format(user_id),
+                    '', 0, output_formats[index]))
+        return results
+
+    @patch('robottelo.common.ssh.command_pipeline')
+    def test_make_many(self, command_pipeline):
+        """Entities are created and read back in one round trip each"""
+        command_pipeline.side_effect = self.fake_pipeline
+        users = make_user_many(3, {u'admin': u'true'})
+        self.assertEqual(command_pipeline.call_count, 2)
+        self.assertEqual(
+            users,
+            [{u'id': u'1', u'login': u'user1'},
+             {u'id': u'2', u'login': u'user2'},
+             {u'id': u'3', u'login': u'user3'}]
+        )
+        creates = command_pipeline.call_args_list[0][0][0]
+        self.assertEqual(len(creates), 3)
+        self.assertTrue(all(u'--admin="true"' in cmd for cmd in creates))
+        self.assertTrue(command_pipeline.call_args_list[1][1]['parallel'])
+
+    @patch('robottelo.common.ssh.command_pipeline')
+    def test_batches(self, command_pipeline):
+        """Entities are created ``batch_size`` at a time"""
+        command_pipeline.side_effect = self.fake_pipeline
+        self.assertEqual(len(make_user_many(5, batch_size=2)), 5)
+        self.assertEqual(command_pipeline.call_count, 6)
+
+    @patch('robottelo.common.ssh.command_pipeline')
+    def test_failure(self, command_pipeline):
+        """A failed create raises CLIFactoryError"""
+        command_pipeline.return_value = [
+            ssh.command_result('', 'Login has already been taken', 65)]
+        with self.assertRaises(CLIFactoryError):
+            make_user_many(1)
+        self.assertEqual(command_pipeline.call_count, 1)
+
+    @patch('robottelo.common.registry.track')
+    @patch('robottelo.common.ssh.command_pipeline')
+    def test_failure_siblings(self, command_pipeline, track):
+        """The entities created along a failed one are tracked"""
+        command_pipeline.return_value = [
+            ssh.command_result(
+                'Message,Id,Login\nUser created,1,user1\n', '', 0, 'csv'),
+            ssh.command_result('', 'Login has already been taken', 65),
+            ssh.command_result(
+                'Message,Id,Login\nUser created,3,user3\n', '', 0, 'csv'),
+        ]
+        with self.assertRaises(CLIFactoryError):
+            make_user_many(3)
+        self.assertEqual(
+            [call[0][:2] for call in track.call_args_list],
+            [('User', u'1'), ('User', u'3')]
+        )
+
+
+class FixtureGraphTestCase(unittest.TestCase):
+    """Tests for ``robottelo.cli.fixtures``"""
+    def setUp(self):  # noqa
+        super(FixtureGraphTestCase, self).setUp()
+        self.calls = []
+        self.lock = threading.Lock()
+        self.patchers = [
+            patch('robottelo.cli.factory.make_{0}'.format(kind),
+                  self.fake_factory(kind))
+            for kind in ('org', 'product', 'repository', 'activation_key')
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+
+    def tearDown(self):  # noqa
+        super(FixtureGraphTestCase, self).tearDown()
+        for patcher in self.patchers:
+            patcher.stop()
+
+    def fake_factory(self, kind):
+        """Return a factory recording its calls"""
+        def make(options=None):
+            """Return an entity with the given options"""
+            with self.lock:
+                self.calls.append((kind, options))
+                entity = dict(options or {})
+                entity[u'id'] = len(self.calls)
+            if kind == 'repository' and u'url' not in options:
+                raise CLIFactoryError('Please provide an URL')
+            return entity
+        return make
+
+    def test_build_fixtures(self):
+        """Dependencies are added and fill the factories options"""
+        fixtures = build_fixtures(
+            'repository', 'activation_key',
+            repository={u'url': u'http://example.com'},
+        )
+        self.assertEqual(
+            sorted(fixtures),
+            ['activation_key', 'org', 'product', 'repository'])
+        self.assertEqual(self.calls[0], ('org', {}))
+        self.assertEqual(
+            fixtures.repository[u'product-id'], fixtures.product[u'id'])
+        self.assertEqual(fixtures.repository[u'url'], u'http://example.com')
+        self.assertEqual(
+            fixtures.product[u'organization-id'], fixtures.org[u'id'])
+        self.assertEqual(
+            fixtures.activation_key[u'organization-id'], fixtures.org[u'id'])
+
+    def test_timings(self):
+        """The time spent on each fixture is recorded"""
+        fixture_graph = FixtureGraph()
+        fixture_graph.add('org')
+        fixture_graph.add('product')
+        fixture_graph.add('other_product', 'product', {u'name': u'other'})
+        fixture_graph.build()
+        self.assertEqual(
+            sorted(fixture_graph.timings),
+            ['org', 'other_product', 'product'])
+        self.assertIn('other_product', fixture_graph.report())
+
+    def test_failure(self):
+        """Dependents of a failed fixture are not created"""
+        fixture_graph = FixtureGraph()
+        fixture_graph.add('repository')
+        fixture_graph.add('content_view', 'activation_key', depends={
+            u'repository-id': 'repository'})
+        with self.assertRaises(CLIFactoryError):
+            fixture_graph.build()
+        self.assertEqual(
+            [kind for kind, _ in self.calls],
+            ['org', 'product', 'repository'])
@@ -0,0 +1,144 @@
+"""Tests for module ``robottelo.cli.pool``."""
+# (protected-access) pylint:disable=W0212
+import itertools
+import threading
+import time
+import unittest
+
+from mock import patch
+from robottelo.cli import pool
+from robottelo.cli.factory import CLIFactoryError
+from robottelo.common import conf, registry
+
+
+class EntityPoolTestCase(unittest.TestCase):
+    """Tests for class ``robottelo.cli.pool.EntityPool``."""
+    def setUp(self):  # noqa pylint:disable=C0103
+        self.counter = itertools.count(1)
+        self.created = []
+        self.deleted = []
+        self.lock = threading.Lock()
+
+    def create(self):
+        """Return a new entity."""
+        with self.lock:
+            entity = {u'id': next(self.counter)}
+            self.created.append(entity)
+        return entity
+
+    def wait_ready(self, entity_pool, ready):
+        """Wait until ``ready`` entities are in the pool."""
+        deadline = time.time() + 5
+        while entity_pool.stats()['ready'] < ready:
+            self.assertLess(time.time(), deadline)
+            time.sleep(0.01)
+
+    def test_take(self):
+        """Entities are created in the background and handed out once."""
+        entity_pool = pool.EntityPool(self.create, self.deleted.append, 2)
+        entity_pool.start()
+        self.wait_ready(entity_pool, 2)
+        self.assertEqual(len(self.created), 2)
+        first = entity_pool.take()
+        second = entity_pool.take()
+        self.assertNotEqual(first, second)
+        self.assertEqual(entity_pool.stats()['hits'], 2)
+        # Taken entities are replaced
+        self.wait_ready(entity_pool, 2)
+        self.assertEqual(len(self.created), 4)
+        entity_pool.close()
+        self.assertEqual(
+            sorted(entity[u'id'] for entity in self.deleted), [3, 4])
+
+    def test_empty(self):
+        """Entities are created when taken if the pool is empty."""
+        entity_pool = pool.EntityPool(self.create, self.deleted.append)
+        self.assertEqual(entity_pool.take(), {u'id': 1})
+        self.assertEqual(
+            entity_pool.stats(), {'hits': 0, 'misses': 1, 'ready': 0})
+        entity_pool.close()
+        self.assertEqual(self.deleted, [])
+
+    @patch('robottelo.cli.pool.RETRY_DELAY', 0)
+    def test_failure(self):
+        """Failed creations are retried."""
+        failures = [ValueError('boom')]
+
+        def create():
+            """Fail once."""
+            if failures:
+                raise failures.pop()
+            return self.create()
+
+        entity_pool = pool.EntityPool(create, size=1)
+        entity_pool.start()
+        self.wait_ready(entity_pool, 1)
+        self.assertEqual(entity_pool.take(), {u'id': 1})
+        entity_pool.close()
+
+
+class TakeTestCase(unittest.TestCase):
+    """Tests for function ``robottelo.cli.pool.take``."""
+    def setUp(self):  # noqa pylint:disable=C0103
+        self.old_properties = conf.properties.copy()
+        conf.properties['main.pool.size'] = '3'
+        conf.properties['main.pool.size.thing'] = '0'
+
+    def tearDown(self):  # noqa pylint:disable=C0103
+        conf.properties = self.old_properties
+        pool._kinds.pop('thing', None)
+        pool.close_pools()
+
+    def test_take(self):
+        """Registered kinds are available with their configured size."""
+        counter = itertools.count(1)
+        pool.register('thing', lambda: next(counter))
+        self.assertEqual(pool.take('thing'), 1)
+        self.assertEqual(pool.get_pool('thing').size, 0)
+        self.assertEqual(pool.pool_size('org'), 3)
+
+    def test_unknown(self):
+        """Unknown kinds are refused."""
+        with self.assertRaises(KeyError):
+            pool.take('thing')
+
+
+class DeleteOrgTestCase(unittest.TestCase):
+    """Tests for the deletion of the pooled organizations."""
+    def test_delete(self):
+        """Organizations are deleted by id or by name."""
+        with patch('robottelo.cli.pool.Org.delete') as delete:
+            delete.return_value.return_code = 0
+            pool._delete_org({u'id': 1})
+            delete.assert_called_with({u'id': 1})
+            pool._delete_org_of({u'organization': u'org'})
+            delete.assert_called_with({u'name': u'org'})
+
+    def test_failure(self):
+        """Failed deletions raise an error."""
+        with patch('robottelo.cli.pool.Org.delete') as delete:
+            delete.return_value.return_code = 65
+            delete.return_value.stderr = u'Error: org not found'
+            with self.assertRaises(registry.ResourceNotFound):
+                pool._delete_org({u'id': 1})
+            delete.return_value.stderr = u'Error: busy'
+            with self.assertRaises(CLIFactoryError):
+                pool._delete_org_of({u'organization': u'org'})
+
+    @patch('robottelo.cli.pool.factory.make_product')
+    @patch('robottelo.cli.pool.factory.make_org')
+    def test_make_in_org_failure(self, make_org, make_product):
+        """The organization is deleted when the entity cannot be created."""
+        make_org.return_value = {u'id': 1}
+        make_product.side_effect = CLIFactoryError('boom')
+        make = pool._make_in_org('make_product')
+        with patch('robottelo.cli.pool.Org.delete') as delete:
+            delete.return_value.return_code = 0
+            with self.assertRaises(CLIFactoryError):
+                make()
+            delete.assert_called_once_with({u'id': 1})
+            # The error of the entity wins over the one of the deletion
+            delete.return_value.return_code = 65
+            delete.return_value.stderr = u'Error: busy'
+            with self.assertRaisesRegexp(CLIFactoryError, 'boom'):
+                make()
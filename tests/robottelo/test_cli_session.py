@@ -0,0 +1,142 @@
+"""Tests for module ``robottelo.cli.session``."""
+# (protected-access) pylint:disable=W0212
+import unittest
+
+from mock import patch
+from robottelo.cli import session
+from robottelo.cli.base import Base
+from robottelo.common import conf
+from robottelo.common.ssh import SSHCommandResult
+
+
+class HammerSessionTestCase(unittest.TestCase):
+    """Tests for class ``robottelo.cli.session.HammerSession``."""
+    def setUp(self):  # noqa pylint:disable=C0103
+        self.old_properties = conf.properties.copy()
+        conf.properties['main.locale'] = 'en_US.UTF-8'
+        self.hammer_session = session.HammerSession('admin', 'changeme')
+
+    def tearDown(self):  # noqa pylint:disable=C0103
+        conf.properties = self.old_properties
+
+    @patch('robottelo.common.ssh.command')
+    def test_login(self, ssh_command):
+        """The user is logged in once, in the session home directory."""
+        ssh_command.return_value = SSHCommandResult(return_code=0)
+        self.hammer_session.login()
+        self.hammer_session.login()
+        self.assertEqual(ssh_command.call_count, 1)
+        command = ssh_command.call_args[0][0]
+        self.assertIn(
+            'HOME={0} '.format(self.hammer_session.home), command)
+        self.assertIn(
+            'hammer auth login basic -u admin -p changeme', command)
+        self.assertIn(':use_sessions: true', command)
+        self.assertTrue(self.hammer_session.logged_in)
+
+        self.hammer_session.login(force=True)
+        self.assertEqual(ssh_command.call_count, 2)
+
+    @patch('robottelo.common.ssh.command')
+    def test_login_error(self, ssh_command):
+        """A failed login raises an error, and is not tried again."""
+        ssh_command.return_value = SSHCommandResult(
+            stderr=u'Invalid username or password', return_code=1)
+        with self.assertRaises(session.HammerSessionError):
+            self.hammer_session.login()
+        self.assertFalse(self.hammer_session.logged_in)
+        with self.assertRaises(session.HammerSessionError):
+            self.hammer_session.login()
+        self.assertEqual(ssh_command.call_count, 1)
+        ssh_command.return_value = SSHCommandResult(return_code=0)
+        self.hammer_session.login(force=True)
+        self.assertTrue(self.hammer_session.logged_in)
+        self.assertIsNone(self.hammer_session.error)
+
+    @patch('robottelo.common.ssh.command')
+    def test_close(self, ssh_command):
+        """The home directory is removed even if the login failed."""
+        self.hammer_session.close()
+        self.assertEqual(ssh_command.call_count, 0)
+        ssh_command.return_value = SSHCommandResult(return_code=1)
+        with self.assertRaises(session.HammerSessionError):
+            self.hammer_session.login()
+        self.hammer_session.close()
+        command = ssh_command.call_args[0][0]
+        self.assertEqual(
+            command, 'rm -rf {0}'.format(self.hammer_session.home))
+        ssh_command.return_value = SSHCommandResult(return_code=0)
+        self.hammer_session.login(force=True)
+        self.hammer_session.close()
+        self.assertIn('hammer auth logout', ssh_command.call_args[0][0])
+        self.hammer_session.close()
+        self.assertEqual(ssh_command.call_count, 4)
+
+    def test_home(self):
+        """Each user gets its own home directory."""
+        self.assertNotEqual(
+            self.hammer_session.home,
+            session.HammerSession('admin', 'other').home
+        )
+        self.assertTrue(
+            self.hammer_session.home.startswith(session.SESSIONS_ROOT))
+
+    def test_expired(self):
+        """Authentication errors tell that the session expired."""
+        self.assertTrue(session.HammerSession.expired(SSHCommandResult(
+            stderr=u'Session has expired', return_code=129)))
+        self.assertFalse(session.HammerSession.expired(SSHCommandResult(
+            stderr=u'Session has expired', return_code=0)))
+        self.assertFalse(session.HammerSession.expired(SSHCommandResult(
+            stderr=u'Error: organization not found', return_code=65)))
+        self.assertFalse(session.HammerSession.expired(SSHCommandResult(
+            stderr=u'Invalid username or password', return_code=129)))
+
+
+class BaseExecuteSessionTestCase(unittest.TestCase):
+    """Tests for the hammer sessions support of ``Base``."""
+    def setUp(self):  # noqa pylint:disable=C0103
+        self.old_properties = conf.properties.copy()
+        conf.properties['main.hammer.sessions'] = '1'
+        conf.properties['main.locale'] = 'en_US.UTF-8'
+        conf.properties['foreman.admin.username'] = 'admin'
+        conf.properties['foreman.admin.password'] = 'changeme'
+
+    def tearDown(self):  # noqa pylint:disable=C0103
+        conf.properties = self.old_properties
+
+    @patch('robottelo.common.ssh.command')
+    @patch('robottelo.cli.base.get_session')
+    def test_session(self, get_session, ssh_command):
+        """The command reuses the session instead of the credentials."""
+        get_session.return_value.environment.return_value = u'HOME=/tmp/s'
+        ssh_command.return_value = SSHCommandResult(return_code=0)
+        Base.execute(u'organization list')
+        get_session.assert_called_once_with('admin', 'changeme')
+        command = ssh_command.call_args[0][0]
+        self.assertTrue(command.startswith('HOME=/tmp/s LANG=en_US.UTF-8'))
+        self.assertNotIn('-p changeme', command)
+
+    @patch('robottelo.common.ssh.command')
+    @patch('robottelo.cli.base.get_session')
+    def test_expired(self, get_session, ssh_command):
+        """An expired session is refreshed and the command run again."""
+        get_session.return_value.environment.return_value = u'HOME=/tmp/s'
+        ssh_command.side_effect = [
+            SSHCommandResult(stderr=u'Session has expired', return_code=129),
+            SSHCommandResult(stdout=u'ok', return_code=0),
+        ]
+        result = Base.execute(u'organization list')
+        self.assertEqual(result.return_code, 0)
+        self.assertEqual(ssh_command.call_count, 2)
+        get_session.return_value.login.assert_called_once_with(force=True)
+
+    @patch('robottelo.common.ssh.command')
+    @patch('robottelo.cli.base.get_session')
+    def test_login_error(self, get_session, ssh_command):
+        """The credentials are passed when the login fails."""
+        get_session.side_effect = session.HammerSessionError
+        ssh_command.return_value = SSHCommandResult(return_code=0)
+        Base.execute(u'organization list')
+        self.assertIn(
+            '-u admin -p changeme', ssh_command.call_args[0][0])
@@ -0,0 +1,217 @@
+"""Tests for module ``robottelo.cli.shell``."""
+# (protected-access) pylint:disable=W0212
+import os
+import select
+import unittest
+
+from mock import patch
+from robottelo.cli import shell
+from robottelo.cli.base import Base
+from robottelo.common import conf, worker
+
+
+class MockChannel(object):
+    """A mock ``paramiko.Channel`` running a fake ``hammer shell``.
+
+    Every line sent is answered with the matching value of ``responses``
+    followed by the prompt.
+
+    """
+    def __init__(self, responses):
+        self.responses = responses
+        self.stdout = ''
+        self.stderr = ''
+        self.closed = False
+        self.exited = False
+        self.eof_received = False
+        self.sent = []
+        # A pipe readable while there is data to read, like paramiko's
+        self._pipe = os.pipe()
+        self._readable = False
+        self._queue(shell.PROMPT.encode('utf-8'), '')
+
+    def _queue(self, stdout, stderr):
+        """Queue output and make the pipe readable."""
+        self.stdout += stdout
+        self.stderr += stderr
+        self._update_pipe()
+
+    def _update_pipe(self):
+        """Make the pipe readable if and only if there is data to read."""
+        readable = bool(self.stdout or self.stderr)
+        if readable and not self._readable:
+            os.write(self._pipe[1], '*')
+        elif self._readable and not readable:
+            os.read(self._pipe[0], 1)
+        self._readable = readable
+
+    def fileno(self):
+        """Return a file descriptor readable while there is data to read."""
+        return self._pipe[0]
+
+    def exit_status_ready(self):
+        """Return whether the fake shell exited."""
+        return self.exited
+
+    def recv_ready(self):
+        """Return whether there is stdout data to read."""
+        return len(self.stdout) > 0
+
+    def recv_stderr_ready(self):
+        """Return whether there is stderr data to read."""
+        return len(self.stderr) > 0
+
+    def recv(self, size):
+        """Consume ``size`` bytes of stdout."""
+        data, self.stdout = self.stdout[:size], self.stdout[size:]
+        self._update_pipe()
+        return data
+
+    def recv_stderr(self, size):
+        """Consume ``size`` bytes of stderr."""
+        data, self.stderr = self.stderr[:size], self.stderr[size:]
+        self._update_pipe()
+        return data
+
+    def sendall(self, data):
+        """Record ``data`` and queue the matching response."""
+        self.sent.append(data)
+        line = data.rstrip('\n')
+        if line == 'exit':
+            self.exited = True
+            return
+        if line not in self.responses:
+            # Simulate a hung command
+            return
+        stdout, stderr = self.responses[line]
+        self._queue(stdout + shell.PROMPT.encode('utf-8'), stderr)
+
+    def close(self):
+        """Mark the channel as closed."""
+        if not self.closed:
+            os.close(self._pipe[0])
+            os.close(self._pipe[1])
+        self.closed = True
+
+
+class HammerShellTestCase(unittest.TestCase):
+    """Tests for class ``robottelo.cli.shell.HammerShell``."""
+    def setUp(self):  # noqa pylint:disable=C0103
+        self.old_properties = conf.properties.copy()
+        conf.properties['main.locale'] = 'en_US.UTF-8'
+        self.channel = MockChannel({
+            '--output=csv organization list': ('Id,Name\n1,org\n', ''),
+            'organization info --id="2"': ('', 'Error: not found\n'),
+        })
+        self.hammer_shell = shell.HammerShell('admin', 'changeme')
+
+        def start():
+            """Attach the mock channel instead of opening a connection."""
+            self.hammer_shell._channel = self.channel
+        self.hammer_shell.start = start
+
+    def tearDown(self):  # noqa pylint:disable=C0103
+        self.channel.close()
+        conf.properties = self.old_properties
+
+    def test_run(self):
+        """The output before the prompt is the command output."""
+        result = self.hammer_shell.run(
+            u'organization list', output_format='csv')
+        self.assertEqual(result.return_code, 0)
+        self.assertEqual(result.stdout, [{u'id': u'1', u'name': u'org'}])
+        self.assertEqual(
+            self.channel.sent, ['--output=csv organization list\n'])
+
+    def test_run_error(self):
+        """A command writing to stderr is considered failed."""
+        result = self.hammer_shell.run(u'organization info --id="2"')
+        self.assertEqual(result.return_code, 1)
+        self.assertEqual(result.stderr, u'Error: not found\n')
+
+    def test_late_error(self):
+        """Errors arriving after the prompt do not fail the next command."""
+        self.hammer_shell.run(u'organization list', output_format='csv')
+        self.channel._queue('', 'Error: late\n')
+        result = self.hammer_shell.run(
+            u'organization list', output_format='csv')
+        self.assertEqual(result.return_code, 0)
+        self.assertEqual(self.channel.stderr, '')
+
+    def test_out_of_sync(self):
+        """A missing prompt closes the shell and raises an error."""
+        with patch('select.select', wraps=select.select) as select_:
+            with self.assertRaises(shell.HammerShellError):
+                self.hammer_shell.run(u'organization list', timeout=0.1)
+        # The shell waits for the output instead of polling
+        self.assertLess(select_.call_count, 3)
+        self.assertTrue(self.channel.closed)
+        self.assertIsNone(self.hammer_shell._channel)
+
+    def test_eof(self):
+        """A shell closing its output raises an error."""
+        self.hammer_shell.run(u'organization list', output_format='csv')
+        self.channel.eof_received = True
+        with self.assertRaises(shell.HammerShellError):
+            self.hammer_shell.run(u'organization list', timeout=5)
+        self.assertTrue(self.channel.closed)
+
+    @patch('robottelo.common.limiter.limit')
+    def test_limited(self, limit):
+        """Commands run in a slot of the ssh limiter."""
+        self.hammer_shell.run(u'organization list', output_format='csv')
+        limit.assert_called_once_with('ssh')
+        self.assertTrue(limit.return_value.__exit__.called)
+
+    def test_multiline(self):
+        """Multiline commands are refused."""
+        with self.assertRaises(shell.HammerShellError):
+            self.hammer_shell.run(u'organization list\norganization list')
+        self.assertEqual(self.channel.sent, [])
+
+
+class GetShellTestCase(unittest.TestCase):
+    """Tests for function ``robottelo.cli.shell.get_shell``."""
+    def tearDown(self):  # noqa pylint:disable=C0103
+        shell.close_shells()
+
+    @patch('robottelo.common.worker.at_exit')
+    def test_get_shell(self, at_exit):
+        """Shells are shared by user and closed when the worker exits."""
+        hammer_shell = shell.get_shell('admin', 'changeme')
+        self.assertIs(shell.get_shell('admin', 'changeme'), hammer_shell)
+        self.assertIsNot(shell.get_shell('admin', 'other'), hammer_shell)
+        at_exit.assert_called_with(
+            shell.close_shells, worker.SHELL_PRIORITY)
+
+
+class BaseExecuteShellTestCase(unittest.TestCase):
+    """Tests for the hammer shell backend of ``Base.execute``."""
+    def setUp(self):  # noqa pylint:disable=C0103
+        self.old_properties = conf.properties.copy()
+        conf.properties['main.hammer.shell'] = '1'
+        conf.properties['main.locale'] = 'en_US.UTF-8'
+        conf.properties['foreman.admin.username'] = 'admin'
+        conf.properties['foreman.admin.password'] = 'changeme'
+
+    def tearDown(self):  # noqa pylint:disable=C0103
+        conf.properties = self.old_properties
+
+    @patch('robottelo.common.ssh.command')
+    @patch('robottelo.cli.base.get_shell')
+    def test_shell(self, get_shell, ssh_command):
+        """The command runs on the hammer shell when enabled."""
+        Base.execute(u'organization list', output_format='csv')
+        get_shell.assert_called_once_with('admin', 'changeme')
+        get_shell.return_value.run.assert_called_once_with(
+            u'organization list', output_format='csv', timeout=None)
+        self.assertFalse(ssh_command.called)
+
+    @patch('robottelo.common.ssh.command')
+    @patch('robottelo.cli.base.get_shell')
+    def test_fallback(self, get_shell, ssh_command):
+        """The one-shot mode is used when the shell is out of sync."""
+        get_shell.return_value.run.side_effect = shell.HammerShellError
+        Base.execute(u'organization list')
+        self.assertEqual(ssh_command.call_count, 1)
+        self.assertIn(u'hammer -v', ssh_command.call_args[0][0])
@@ -1,7 +1,13 @@
 """Unit tests for :mod:`robottelo.common.decorators`."""
+import os
+import shutil
+import tempfile
+import time
+
 from ddt import DATA_ATTR
 from fauxfactory import gen_integer
-from robottelo.common import conf, decorators
+from mock import patch
+from robottelo.common import cache, conf, decorators, registry
 from unittest import TestCase
 # (Too many public methods) pylint: disable=R0904
 
@@ -151,3 +157,136 @@ class RunOnlyOnTestCase(TestCase):
         conf.properties['main.project'] = 'samtdd'
         with self.assertRaises(decorators.ProjectModeError):
             decorators.run_only_on('sat')
+
+
+class CacheableTestCase(TestCase):
+    """Tests for :func:`robottelo.common.decorators.cacheable`."""
+    def setUp(self):  # noqa pylint:disable=C0103
+        """Back up the configuration and decorate a counting factory."""
+        self.old_properties = conf.properties.copy()
+        conf.properties['main.server.hostname'] = 'example.com'
+        conf.properties['main.object_cache'] = 'memory'
+        conf.properties['main.object_cache.size'] = '2'
+        self.calls = []
+
+        def make_thing(options=None):
+            """Return a new thing."""
+            self.calls.append(options)
+            return {u'id': len(self.calls)}
+        self.make_thing = decorators.cacheable(make_thing)
+        cache.get_object_cache().clear()
+
+    def tearDown(self):  # noqa pylint:disable=C0103
+        """Restore the configuration."""
+        conf.properties = self.old_properties
+        cache.get_object_cache().clear()
+
+    def test_not_cached(self):
+        """Objects are not cached by default."""
+        self.assertNotEqual(self.make_thing(), self.make_thing())
+
+    def test_options(self):
+        """Objects are cached per options."""
+        first = self.make_thing({u'organization-id': 1}, cached=True)
+        self.assertEqual(
+            self.make_thing(
+                {'organization-id': '1', 'name': None}, cached=True),
+            first
+        )
+        self.assertNotEqual(
+            self.make_thing({u'organization-id': 2}, cached=True), first)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_size(self):
+        """The least recently used objects are evicted."""
+        first = self.make_thing({u'name': u'first'}, cached=True)
+        self.make_thing({u'name': u'second'}, cached=True)
+        self.make_thing({u'name': u'first'}, cached=True)
+        self.make_thing({u'name': u'third'}, cached=True)
+        self.assertEqual(
+            self.make_thing({u'name': u'first'}, cached=True), first)
+        self.make_thing({u'name': u'second'}, cached=True)
+        self.assertEqual(len(self.calls), 4)
+
+    def test_ttl(self):
+        """Expired objects are created again."""
+        conf.properties['main.object_cache.ttl'] = '1'
+        first = self.make_thing(cached=True)
+        with patch('time.time', return_value=time.time() + 2):
+            self.assertNotEqual(self.make_thing(cached=True), first)
+
+    def test_registry(self):
+        """Cached objects are deleted with the session, not the test."""
+        conf.properties['main.cleanup'] = 'class'
+        deleted = []
+        old_registry = registry.registry
+        registry.registry = registry.ResourceRegistry(
+            lambda: {'Thing': set()})
+
+        def make_tracked_thing(options=None):
+            """Return a new thing tracked by the registry."""
+            thing = {u'id': len(deleted) + 1}
+            registry.registry.track(
+                'Thing', thing[u'id'], lambda: deleted.append(thing))
+            return thing
+        try:
+            registry.registry.push_scope('test')
+            decorators.cacheable(make_tracked_thing)(cached=True)
+            registry.registry.pop_scope()
+            self.assertEqual(deleted, [])
+            registry.registry.close()
+            self.assertEqual(deleted, [{u'id': 1}])
+        finally:
+            registry.registry = old_registry
+
+    def test_shared(self):
+        """The shared backend keeps the objects in a SQLite database."""
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'cache', 'objects.sqlite')
+            with patch('robottelo.common.cache.SHARED_CACHE_PATH', path):
+                conf.properties['main.object_cache'] = 'shared'
+                shared_cache = cache.get_object_cache()
+            self.assertIsInstance(shared_cache, cache.SharedCache)
+            self.assertEqual(shared_cache.path, path)
+            first = self.make_thing({u'name': u'first'}, cached=True)
+            self.assertEqual(
+                self.make_thing({u'name': u'first'}, cached=True), first)
+            # Another process sees the same database
+            self.assertEqual(
+                cache.SharedCache(path).get(
+                    cache.cache_key(u'thing@example.com', {u'name': 'first'})),
+                first
+            )
+            self.make_thing({u'name': u'second'}, cached=True)
+            self.make_thing({u'name': u'third'}, cached=True)
+            self.assertEqual(len(self.calls), 3)
+            self.make_thing({u'name': u'first'}, cached=True)
+            self.assertEqual(len(self.calls), 4)
+            self.assertEqual(shared_cache.ttl, cache.DEFAULT_SHARED_TTL)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_shared_runs(self):
+        """The shared backend drops the objects of the previous runs."""
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'objects.sqlite')
+            cache.SharedCache(path, run_id='first').put('key', 1)
+            self.assertEqual(
+                cache.SharedCache(path, run_id='first').get('key'), 1)
+            self.assertIsNone(
+                cache.SharedCache(path, run_id='second').get('key'))
+            self.assertIsNone(
+                cache.SharedCache(path, run_id='first').get('key'))
+        finally:
+            shutil.rmtree(directory)
+
+    def test_key_locks(self):
+        """The memory backend drops the key locks no thread uses."""
+        # (protected-access) pylint:disable=W0212
+        memory_cache = cache.MemoryCache()
+        with memory_cache.lock('first'):
+            with memory_cache.lock('second'):
+                self.assertEqual(len(memory_cache._key_locks), 2)
+        self.assertEqual(memory_cache._key_locks, {})
@@ -1,9 +1,10 @@
 """Tests for :mod:`robottelo.entities`."""
 from ddt import data, ddt, unpack
 from fauxfactory import gen_integer
-from nailgun import client, config
+from nailgun import config
 from nailgun.entity_mixins import NoSuchPathError
 from robottelo import entities
+from robottelo.api import client
 from unittest import TestCase
 import mock
 # (Too many public methods) pylint: disable=R0904
@@ -267,3 +268,70 @@ class OrganizationTestCase(TestCase):
                 id=self.entity_id,
             ).subscriptions()
             self.assertEqual(response, [])
+
+
+class FastCreateTestCase(TestCase):
+    """Tests for ``robottelo.entities.EntityCreateMixin.create(fast=True)``."""
+
+    def setUp(self):  # pylint:disable=C0103
+        """Set ``self.server_config`` and ``self.entity_id``."""
+        self.server_config = config.ServerConfig('http://example.com')
+        self.entity_id = gen_integer(min_value=1)
+
+    def read(self):
+        """Return what ``Domain.read`` would."""
+        return entities.Domain(
+            self.server_config,
+            id=self.entity_id,
+            name='example.com',
+            fullname='Example',
+        )
+
+    def test_no_read(self):
+        """The entity is built from the response, without reading it."""
+        with mock.patch.object(entities.Domain, 'create_json') as create_json:
+            create_json.return_value = {
+                'id': self.entity_id,
+                'name': 'example.com',
+            }
+            with mock.patch.object(entities.Domain, 'read') as read:
+                domain = entities.Domain(
+                    self.server_config, location=[1]).create(fast=True)
+                self.assertEqual(domain.id, self.entity_id)
+                self.assertEqual(domain.name, 'example.com')
+                self.assertEqual(domain.location[0].id, 1)
+                self.assertFalse(read.called)
+
+    def test_read_on_access(self):
+        """The entity is read once a field it lacks is accessed."""
+        with mock.patch.object(entities.Domain, 'create_json') as create_json:
+            create_json.return_value = {'id': self.entity_id}
+            with mock.patch.object(entities.Domain, 'read') as read:
+                read.side_effect = self.read
+                domain = entities.Domain(self.server_config).create(fast=True)
+                self.assertIsInstance(domain, entities.Domain)
+                self.assertEqual(domain.fullname, 'Example')
+                self.assertEqual(domain.name, 'example.com')
+                self.assertEqual(read.call_count, 1)
+                self.assertIs(type(domain), entities.Domain)
+
+    def test_read_error(self):
+        """The entity is read again if reading it failed."""
+        with mock.patch.object(entities.Domain, 'create_json') as create_json:
+            create_json.return_value = {'id': self.entity_id}
+            with mock.patch.object(entities.Domain, 'read') as read:
+                read.side_effect = [ValueError('boom'), self.read()]
+                domain = entities.Domain(self.server_config).create(fast=True)
+                with self.assertRaises(ValueError):
+                    domain.name  # pylint:disable=pointless-statement
+                self.assertEqual(domain.name, 'example.com')
+                self.assertEqual(read.call_count, 2)
+
+    def test_slow(self):
+        """Without ``fast``, the entity is read back at once."""
+        with mock.patch.object(entities.Domain, 'create_json') as create_json:
+            create_json.return_value = {'id': self.entity_id}
+            with mock.patch.object(entities.Domain, 'read') as read:
+                entities.Domain(self.server_config).create()
+                read.assert_called_once_with(
+                    attrs={'id': self.entity_id})
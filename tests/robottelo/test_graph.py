@@ -0,0 +1,103 @@
+"""Tests for module ``robottelo.common.graph``."""
+import collections
+import threading
+import time
+import unittest
+
+from robottelo.common import graph
+
+
+class TopologicalOrderTestCase(unittest.TestCase):
+    """Tests for function ``topological_order``."""
+    def test_order(self):
+        """Each node comes after the nodes it depends on."""
+        dependencies = collections.OrderedDict((
+            ('activation_key', ('org', 'content_view')),
+            ('content_view', ('org', 'repository')),
+            ('repository', ('product',)),
+            ('product', ('org',)),
+            ('org', ()),
+        ))
+        order = graph.topological_order(dependencies)
+        self.assertEqual(sorted(order), sorted(dependencies))
+        for node, node_dependencies in dependencies.items():
+            for dependency in node_dependencies:
+                self.assertLess(order.index(dependency), order.index(node))
+
+    def test_cycle(self):
+        """Cycles are refused."""
+        with self.assertRaises(graph.GraphError):
+            graph.topological_order({'a': ('b',), 'b': ('c',), 'c': ('a',)})
+
+    def test_unknown(self):
+        """Dependencies on unknown nodes are refused."""
+        with self.assertRaises(graph.GraphError):
+            graph.topological_order({'a': ('b',)})
+
+    def test_reverse(self):
+        """``reverse`` lists the dependents of each node."""
+        self.assertEqual(
+            graph.reverse(collections.OrderedDict((
+                ('a', ()), ('b', ('a',)), ('c', ('a', 'b'))))),
+            {'a': ['b', 'c'], 'b': ['c'], 'c': []}
+        )
+
+
+class RunTestCase(unittest.TestCase):
+    """Tests for function ``run``."""
+    def test_run(self):
+        """Independent nodes run at the same time, after their dependencies.
+        """
+        dependencies = {
+            'org': (),
+            'product': ('org',),
+            'lifecycle_environment': ('org',),
+            'repository': ('product',),
+        }
+        lock = threading.Lock()
+        done = []
+        concurrent = set()
+
+        def function(node):
+            """Record the nodes done before ``node`` starts."""
+            with lock:
+                before = set(done)
+                concurrent.add(node)
+            time.sleep(0.05)
+            with lock:
+                if len(concurrent) > 1:
+                    concurrent.add('overlap')
+                concurrent.discard(node)
+                done.append(node)
+            return before
+
+        outcome = graph.run(dependencies, function)
+        self.assertEqual(outcome.errors, {})
+        self.assertEqual(outcome.skipped, [])
+        self.assertEqual(sorted(outcome.timings), sorted(dependencies))
+        for node, node_dependencies in dependencies.items():
+            self.assertTrue(set(node_dependencies) <= outcome.results[node])
+        self.assertIn('overlap', concurrent)
+
+    def test_errors(self):
+        """Nodes depending on a failed node are skipped."""
+        def function(node):
+            """Fail for ``product``."""
+            if node == 'product':
+                raise ValueError(node)
+            return node
+
+        outcome = graph.run({
+            'org': (),
+            'product': ('org',),
+            'repository': ('product',),
+            'content_view': ('repository',),
+            'lifecycle_environment': ('org',),
+        }, function, max_workers=1)
+        self.assertEqual(
+            outcome.results,
+            {'org': 'org', 'lifecycle_environment': 'lifecycle_environment'}
+        )
+        self.assertEqual(list(outcome.errors), ['product'])
+        self.assertEqual(
+            sorted(outcome.skipped), ['content_view', 'repository'])
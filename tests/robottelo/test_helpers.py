@@ -1,11 +1,14 @@
+# -*- encoding: utf-8 -*-
 """Tests for module ``robottelo.common.helpers``."""
 # (Too many public methods) pylint: disable=R0904
+import copy
+import os
 import unittest
-from robottelo.common import conf
+from robottelo.common import conf, get_app_root
 from robottelo.common.helpers import (
-    escape_search, generate_strings_list, get_server_url,
-    get_server_credentials, info_dictionary, invalid_names_list,
-    valid_data_list, valid_names_list,
+    csv_records, csv_to_dictionary, escape_search, generate_strings_list,
+    get_server_url, get_server_credentials, info_dictionary,
+    invalid_names_list, valid_data_list, valid_names_list,
 )
 
 
@@ -143,6 +146,97 @@ class GenerateStringListTestCase(unittest.TestCase):
             self.assertIsInstance(string, unicode)
 
 
+class CSVRecordsTestCase(unittest.TestCase):
+    """Tests for function ``csv_records``."""
+    def test_records(self):
+        """Generate a record per line using the header as keys"""
+        records = csv_records(iter([
+            u'Id,Name,Full Name',
+            u'1,foo,"foo, bar"',
+            u'',
+            u'2,bár,',
+        ]))
+        self.assertEqual(next(records), {
+            u'id': u'1', u'name': u'foo', u'full-name': u'foo, bar'})
+        self.assertEqual(next(records), {
+            u'id': u'2', u'name': u'bár', u'full-name': u''})
+        with self.assertRaises(StopIteration):
+            next(records)
+
+    def test_empty(self):
+        """No records are generated for an empty output"""
+        self.assertEqual(list(csv_records([])), [])
+        self.assertEqual(list(csv_records([u'Id,Name'])), [])
+
+
+class CSVToDictionaryTestCase(unittest.TestCase):
+    """Tests for function ``csv_to_dictionary`` and class ``CSVTable``."""
+    def setUp(self):  # noqa pylint:disable=C0103
+        self.lines = [
+            u'Id,Name,Description',
+            u'1,foo,"with, comma"',
+            u'2,bár,"with ""quotes"""',
+            u'3,baz,"multi',
+            u'line"',
+            u'',
+        ]
+        self.table = csv_to_dictionary(self.lines)
+
+    def test_records(self):
+        """Quoted values can hold commas, quotes and line breaks"""
+        self.assertEqual(len(self.table), 3)
+        self.assertEqual(self.table, [
+            {u'id': u'1', u'name': u'foo', u'description': u'with, comma'},
+            {u'id': u'2', u'name': u'bár', u'description': u'with "quotes"'},
+            {u'id': u'3', u'name': u'baz', u'description': u'multi\nline'},
+        ])
+        self.assertEqual(self.table[-1][u'id'], u'3')
+        self.assertEqual(self.table.column(u'id'), [u'1', u'2', u'3'])
+
+    def test_input_unchanged(self):
+        """The lines are left untouched"""
+        self.assertEqual(len(self.lines), 6)
+
+    def test_find(self):
+        """Records can be looked up by column value"""
+        self.assertEqual(self.table.find(u'id', u'2')[u'name'], u'bár')
+        self.assertEqual(self.table.find(u'name', u'baz')[u'id'], u'3')
+        self.assertIsNone(self.table.find(u'id', u'4'))
+        self.assertIsNone(self.table.find(u'label', u'foo'))
+
+    def test_updated_records(self):
+        """Records accessed by index keep their updates"""
+        self.table[0][u'name'] = u'qux'
+        self.assertEqual(self.table[0][u'name'], u'qux')
+        self.assertEqual(list(self.table)[0][u'name'], u'qux')
+
+    def test_deepcopy(self):
+        """Copies do not share the records"""
+        self.table[0][u'name'] = u'qux'
+        table = copy.deepcopy(self.table)
+        table[0][u'name'] = u'quux'
+        table[1][u'name'] = u'quux'
+        self.assertEqual(self.table[0][u'name'], u'qux')
+        self.assertEqual(self.table[1][u'name'], u'bár')
+        self.assertEqual(table, [
+            {u'id': u'1', u'name': u'quux', u'description': u'with, comma'},
+            {u'id': u'2', u'name': u'quux', u'description': u'with "quotes"'},
+            {u'id': u'3', u'name': u'baz', u'description': u'multi\nline'},
+        ])
+
+    def test_short_records(self):
+        """Values missing from short records are missing from the dicts"""
+        table = csv_to_dictionary([u'Id,Name', u'1'])
+        self.assertEqual(table, [{u'id': u'1'}])
+        self.assertEqual(table.column(u'name'), [])
+
+    def test_empty(self):
+        """An empty output gives an empty table"""
+        self.assertEqual(csv_to_dictionary([]), [])
+        self.assertEqual(csv_to_dictionary([u'Id,Name', u'']), [])
+        self.assertFalse(csv_to_dictionary([u'Id,Name']))
+
+
 class EscapeSearchTestCase(unittest.TestCase):
     def test_return_type(self):
         """Tests if escape search returns a unicode string"""
@@ -253,3 +347,49 @@ class InfoDictionaryTestCase(unittest.TestCase):
                 'url': '/custom/url2',
             }],
         })
+
+    def test_parse_nested_attributes(self):
+        """Can parse collections nested in collections"""
+        output = FakeSSHResult(stdout=[
+            'Rules:',
+            ' 1) ID:        1',
+            '    Types:',
+            '        1) bugfix',
+            '        2) security',
+            '    Errata ID:',
+            '    Environments:',
+            '        1) Id:   1',
+            '           Name: Library',
+            '    Created:   2015/01/14',
+            'Parameters:',
+            '    ntp-server => clock.example.com',
+        ])
+
+        result = info_dictionary(output)
+        self.assertDictEqual(result.stdout, {
+            'rules': [{
+                'id': '1',
+                'types': ['bugfix', 'security'],
+                'errata-id': '',
+                'environments': [{'id': '1', 'name': 'Library'}],
+                'created': '2015/01/14',
+            }],
+            'parameters': {'ntp-server': 'clock.example.com'},
+        })
+
+    def test_parse_recorded_outputs(self):
+        """Can parse the recorded hammer info outputs"""
+        path = os.path.join(
+            get_app_root(), 'tests', 'robottelo', 'data', 'hammer_info')
+        for filename in os.listdir(path):
+            with open(os.path.join(path, filename)) as handler:
+                output = FakeSSHResult(stdout=handler.read().split('\n'))
+            self.assertIsInstance(info_dictionary(output).stdout, dict)
+
+        with open(os.path.join(path, 'content-view.txt')) as handler:
+            output = FakeSSHResult(stdout=handler.read().split('\n'))
+        result = info_dictionary(output).stdout
+        self.assertEqual(result['composite'], {})
+        self.assertEqual(result['versions'][1]['version'], '2.0')
+        self.assertEqual(result['docker-repositories'], {})
+        self.assertEqual(result['activation-keys'], ['dev-key', 'prod-key'])
@@ -0,0 +1,180 @@
+"""Tests for module ``robottelo.common.limiter``."""
+# (protected-access) pylint:disable=W0212
+import multiprocessing
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from mock import patch
+from robottelo.common import conf, limiter
+
+
+class Response(object):  # pylint:disable=too-few-public-methods
+    """A fake HTTP response."""
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class StateTestCase(unittest.TestCase):
+    """Keep the state files of the limiters in a temporary directory."""
+    def setUp(self):  # noqa pylint:disable=C0103
+        self.directory = tempfile.mkdtemp()
+        self.patcher = patch.object(
+            limiter, 'STATE_DIRECTORY', self.directory)
+        self.patcher.start()
+
+    def tearDown(self):  # noqa pylint:disable=C0103
+        self.patcher.stop()
+        shutil.rmtree(self.directory)
+
+
+class AdaptiveLimiterTestCase(StateTestCase):
+    """Tests for class ``robottelo.common.limiter.AdaptiveLimiter``."""
+    def test_increase(self):
+        """The cap grows while operations complete in time at the cap."""
+        adaptive = limiter.AdaptiveLimiter('test', initial=2, latency=10)
+        for _ in range(4):
+            first, second = adaptive.acquire(), adaptive.acquire()
+            adaptive.release(first)
+            adaptive.release(second)
+        self.assertEqual(adaptive.stats()['limit'], 3)
+        self.assertEqual(adaptive.stats()['completed'], 8)
+
+    def test_no_increase_below_cap(self):
+        """The cap does not grow while it is not reached."""
+        adaptive = limiter.AdaptiveLimiter('test', initial=4)
+        for _ in range(10):
+            adaptive.release(adaptive.acquire())
+        self.assertEqual(adaptive.stats()['limit'], 4)
+
+    def test_decrease(self):
+        """A failure halves the cap, once per congestion event."""
+        adaptive = limiter.AdaptiveLimiter('test', initial=8)
+        starts = [adaptive.acquire() for _ in range(3)]
+        for start in starts:
+            adaptive.release(start, failed=True)
+        stats = adaptive.stats()
+        self.assertEqual(stats['limit'], 4)
+        self.assertEqual(stats['failed'], 3)
+        self.assertEqual(stats['decreases'], 1)
+
+    def test_slow(self):
+        """An operation above the latency threshold lowers the cap."""
+        adaptive = limiter.AdaptiveLimiter('test', initial=4, latency=0)
+        adaptive.release(adaptive.acquire() - 1)
+        self.assertEqual(adaptive.stats()['limit'], 2)
+        self.assertEqual(adaptive.stats()['failed'], 0)
+
+    def test_minimum(self):
+        """The cap never goes below the minimum."""
+        adaptive = limiter.AdaptiveLimiter('test', initial=1)
+        with self.assertRaises(ValueError):
+            with adaptive.slot():
+                raise ValueError('boom')
+        self.assertEqual(adaptive.stats()['limit'], 1)
+
+    def test_wait(self):
+        """Operations wait for a slot once the cap is reached."""
+        adaptive = limiter.AdaptiveLimiter('test', initial=1)
+        start = adaptive.acquire()
+        acquired = threading.Event()
+
+        def wait():
+            """Wait for a slot."""
+            adaptive.release(adaptive.acquire())
+            acquired.set()
+
+        thread = threading.Thread(target=wait)
+        thread.start()
+        deadline = time.time() + 5
+        while adaptive.stats()['queued'] < 1:
+            self.assertLess(time.time(), deadline)
+            time.sleep(0.01)
+        self.assertFalse(acquired.is_set())
+        adaptive.release(start)
+        thread.join(5)
+        self.assertTrue(acquired.is_set())
+        self.assertEqual(adaptive.stats()['max_queued'], 1)
+
+    def test_elapsed(self):
+        """The latency given replaces the time the slot was held."""
+        adaptive = limiter.AdaptiveLimiter('test', initial=4, latency=10)
+        with adaptive.slot() as outcome:
+            outcome.elapsed = 11
+        self.assertEqual(adaptive.stats()['limit'], 2)
+        adaptive.release(adaptive.acquire() - 20, elapsed=1)
+        self.assertEqual(adaptive.stats()['decreases'], 1)
+
+    def test_release(self):
+        """A slot given back before the end of the block is not given twice."""
+        adaptive = limiter.AdaptiveLimiter('test', initial=1)
+        with adaptive.slot() as outcome:
+            outcome.release()
+            self.assertEqual(adaptive.stats()['in_flight'], 0)
+            self.assertIsNotNone(adaptive.acquire(blocking=False))
+        stats = adaptive.stats()
+        self.assertEqual(stats['in_flight'], 1)
+        self.assertEqual(stats['completed'], 1)
+
+    def test_processes(self):
+        """The slots are shared by the processes, the dead ones included."""
+        adaptive = limiter.AdaptiveLimiter('test', initial=1)
+        acquired = multiprocessing.Event()
+        done = multiprocessing.Event()
+
+        def hold():
+            """Take the slot and exit without giving it back."""
+            adaptive.acquire()
+            acquired.set()
+            done.wait(5)
+
+        process = multiprocessing.Process(target=hold)
+        process.start()
+        try:
+            self.assertTrue(acquired.wait(5))
+            self.assertEqual(adaptive.stats()['in_flight'], 1)
+            self.assertIsNone(adaptive.acquire(blocking=False))
+        finally:
+            done.set()
+            process.join(5)
+        self.assertEqual(adaptive.stats()['in_flight'], 0)
+        self.assertIsNotNone(adaptive.acquire(blocking=False))
+
+
+class LimitHttpTestCase(StateTestCase):
+    """Tests for function ``robottelo.common.limiter.limit_http``."""
+    def setUp(self):  # noqa pylint:disable=C0103
+        super(LimitHttpTestCase, self).setUp()
+        self.old_properties = conf.properties.copy()
+        conf.properties['main.limiter'] = '1'
+        conf.properties['main.limiter.initial.http-test'] = '8'
+        limiter._limiters.clear()
+
+    def tearDown(self):  # noqa pylint:disable=C0103
+        super(LimitHttpTestCase, self).tearDown()
+        conf.properties = self.old_properties
+        limiter._limiters.clear()
+
+    def test_server_errors(self):
+        """HTTP 5XX responses are failures, other responses are not."""
+        get = limiter.limit_http('http-test', Response)
+        self.assertEqual(get(200).status_code, 200)
+        self.assertEqual(get(404).status_code, 404)
+        get(503)
+        stats = limiter.stats()['http-test']
+        self.assertEqual(stats['completed'], 3)
+        self.assertEqual(stats['failed'], 1)
+        self.assertEqual(stats['limit'], 4)
+
+    def test_disabled(self):
+        """Nothing is limited unless enabled."""
+        conf.properties['main.limiter'] = '0'
+        limiter.limit_http('http-test', Response)(503)
+        self.assertEqual(limiter.stats(), {})
+
+    def test_wrapped_once(self):
+        """Limited functions are not wrapped again."""
+        get = limiter.limit_http('http-test', Response)
+        self.assertIs(limiter.limit_http('http-test', get), get)
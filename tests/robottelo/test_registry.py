@@ -0,0 +1,161 @@
+"""Tests for module ``robottelo.common.registry``."""
+import threading
+import unittest
+
+from robottelo import entities
+from robottelo.common import conf, graph, registry
+
+
+def kind_dependencies():
+    """Return the dependencies between some kinds of entities."""
+    return {
+        'Organization': set(),
+        'Product': set(['Organization']),
+        'Repository': set(['Product']),
+        'LifecycleEnvironment': set(['Organization']),
+    }
+
+
+class ResourceRegistryTestCase(unittest.TestCase):
+    """Tests for class ``robottelo.common.registry.ResourceRegistry``."""
+    def setUp(self):  # noqa pylint:disable=C0103
+        self.old_properties = conf.properties.copy()
+        conf.properties['main.cleanup'] = 'class'
+        self.registry = registry.ResourceRegistry(kind_dependencies)
+        self.deleted = []
+        self.lock = threading.Lock()
+
+    def tearDown(self):  # noqa pylint:disable=C0103
+        conf.properties = self.old_properties
+
+    def track(self, kind, resource_id, parent=None):
+        """Track an entity whose deletion is recorded in ``self.deleted``."""
+        def delete():
+            """Record the deletion."""
+            with self.lock:
+                self.deleted.append((kind, resource_id))
+        self.registry.track(kind, resource_id, delete, parent)
+
+    def test_teardown_order(self):
+        """Entities are deleted after the entities depending on them."""
+        self.registry.push_scope('test')
+        self.track('Organization', 1)
+        self.track('Product', 2)
+        self.track('LifecycleEnvironment', 3)
+        self.track('Repository', 4)
+        report = self.registry.pop_scope()
+        self.assertEqual(len(report.deleted), 4)
+        order = [kind for kind, _ in self.deleted]
+        self.assertLess(order.index('Repository'), order.index('Product'))
+        self.assertLess(order.index('Product'), order.index('Organization'))
+        self.assertLess(
+            order.index('LifecycleEnvironment'), order.index('Organization'))
+
+    def test_parent(self):
+        """Entities are deleted before their parent, whatever their kind."""
+        self.registry.push_scope('test')
+        self.track('Organization', 2)
+        self.track('Organization', 1, ('Organization', 2))
+        self.registry.pop_scope()
+        self.assertEqual(
+            self.deleted, [('Organization', 1), ('Organization', 2)])
+
+    def test_report(self):
+        """Missing and failed entities are reported, not raised."""
+        def missing():
+            """Pretend the entity is gone."""
+            raise registry.ResourceNotFound(1)
+
+        def failing():
+            """Pretend the deletion failed."""
+            raise ValueError('boom')
+
+        self.registry.push_scope('test')
+        self.registry.track('Product', 1, missing)
+        self.registry.track('Product', 2, failing)
+        self.track('Organization', 3)
+        report = self.registry.pop_scope()
+        self.assertEqual([resource.id for resource in report.missing], [u'1'])
+        self.assertEqual(
+            [resource.id for resource in report.failed], [u'2'])
+        # The organization is deleted even if one of its products was not
+        self.assertEqual(self.deleted, [('Organization', 3)])
+        self.assertIn('1 failed', str(report))
+
+    def test_scopes(self):
+        """Only the entities of the closed scope are deleted."""
+        self.track('Organization', 1)
+        self.registry.push_scope('test')
+        self.track('Organization', 2)
+        self.assertEqual(self.registry.scope, 'test')
+        self.registry.pop_scope()
+        self.assertEqual(self.deleted, [('Organization', 2)])
+        self.assertEqual(self.registry.scope, 'session')
+        self.registry.close()
+        self.assertEqual(
+            self.deleted, [('Organization', 2), ('Organization', 1)])
+
+    def test_session(self):
+        """The entities of a session block outlive the current scope."""
+        self.registry.push_scope('test')
+        with self.registry.session():
+            self.track('Organization', 1)
+        self.track('Organization', 2)
+        self.registry.pop_scope()
+        self.assertEqual(self.deleted, [('Organization', 2)])
+        self.registry.close()
+        self.assertEqual(
+            self.deleted, [('Organization', 2), ('Organization', 1)])
+
+    def test_untracked(self):
+        """Nothing is tracked when disabled or in an untracked block."""
+        with self.registry.untracked():
+            self.track('Organization', 1)
+        conf.properties['main.cleanup'] = 'none'
+        self.track('Organization', 2)
+        self.assertEqual(len(self.registry.pop_scope().deleted), 0)
+
+
+class StartClassTestCase(unittest.TestCase):
+    """Tests for functions ``robottelo.common.registry.start_class`` and
+    ``finish_class``.
+
+    """
+    def setUp(self):  # noqa pylint:disable=C0103
+        self.old_properties = conf.properties.copy()
+        self.old_registry = registry.registry
+        registry.registry = registry.ResourceRegistry(kind_dependencies)
+
+    def tearDown(self):  # noqa pylint:disable=C0103
+        conf.properties = self.old_properties
+        registry.registry = self.old_registry
+
+    def test_class_scope(self):
+        """The class scope is opened and closed around the class."""
+        conf.properties['main.cleanup'] = 'class'
+        registry.start_class(StartClassTestCase)
+        self.assertEqual(
+            registry.registry.scope,
+            'class:{0}.StartClassTestCase'.format(__name__)
+        )
+        registry.finish_class(StartClassTestCase)
+        self.assertEqual(registry.registry.scope, 'session')
+
+    def test_module_scope(self):
+        """The module scope stays open after the class."""
+        conf.properties['main.cleanup'] = 'module'
+        registry.start_class(StartClassTestCase)
+        registry.finish_class(StartClassTestCase)
+        self.assertEqual(
+            registry.registry.scope, 'module:{0}'.format(__name__))
+
+
+class EntityDependenciesTestCase(unittest.TestCase):
+    """Tests for function ``robottelo.common.graph.entity_dependencies``."""
+    def test_entities(self):
+        """The dependencies of ``robottelo.entities`` have no cycle."""
+        dependencies = graph.entity_dependencies(entities)
+        order = graph.topological_order(dependencies)
+        self.assertLess(
+            order.index('Organization'), order.index('Product'))
+        self.assertLess(order.index('Product'), order.index('Repository'))
@@ -0,0 +1,93 @@
+"""Unit tests for module ``robottelo.api.client``."""
+# (protected-access) pylint:disable=W0212
+import BaseHTTPServer
+import json
+import threading
+import types
+
+from robottelo.api import client
+from unittest import TestCase
+
+
+class EchoHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Answer the requests with their method, content type and body."""
+    protocol_version = 'HTTP/1.1'
+
+    def _echo(self):
+        """Send the request back as JSON."""
+        length = int(self.headers.getheader('content-length') or 0)
+        body = json.dumps({
+            'method': self.command,
+            'content-type': self.headers.getheader('content-type'),
+            'cookie': self.headers.getheader('cookie'),
+            'data': self.rfile.read(length),
+        })
+        self.send_response(200)
+        self.send_header('Set-Cookie', '_session_id=1; path=/')
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = _echo  # noqa pylint:disable=C0103
+
+    def log_message(self, *args):  # pylint:disable=arguments-differ
+        """Keep the test output clean."""
+
+
+class ClientTestCase(TestCase):
+    """Tests for the functions of ``robottelo.api.client``."""
+    def setUp(self):  # noqa
+        self.server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), EchoHandler)
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.01,))
+        self.thread.daemon = True
+        self.thread.start()
+        self.url = 'http://127.0.0.1:{0}/api'.format(self.server.server_port)
+        client.close_sessions()
+
+    def tearDown(self):  # noqa
+        client.close_sessions()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_json(self):
+        """Data is sent as JSON, like ``nailgun.client`` does."""
+        reply = client.post(self.url, {'name': 'foo'}).json()
+        self.assertEqual(reply['method'], 'POST')
+        self.assertEqual(reply['content-type'], 'application/json')
+        self.assertEqual(json.loads(reply['data']), {'name': 'foo'})
+
+    def test_reuse(self):
+        """Requests to the same server reuse the open connection."""
+        for _ in range(3):
+            self.assertEqual(client.get(self.url).status_code, 200)
+        client.put(self.url, {'name': 'foo'})
+        self.assertEqual(
+            client.stats(), {'requests': 4, 'opened': 1, 'reused': 3})
+
+    def test_credentials(self):
+        """Sessions are not shared between credentials."""
+        self.assertIsNot(
+            client.get_session(self.url, auth=('admin', 'changeme')),
+            client.get_session(self.url, auth=('other', 'changeme')),
+        )
+        self.assertIs(
+            client.get_session(self.url + '/other', auth=['admin', 'x']),
+            client.get_session(self.url, auth=('admin', 'x')),
+        )
+
+    def test_cookies(self):
+        """The session cookies of the server are not sent back."""
+        auth = ('admin', 'changeme')
+        client.get(self.url, auth=auth)
+        self.assertIsNone(client.get(self.url, auth=auth).json()['cookie'])
+        session = client.get_session(self.url, auth=auth)
+        self.assertEqual(len(session.cookies), 0)
+
+    def test_install(self):
+        """Installed modules send their requests with this module."""
+        module = types.ModuleType('fake_client')
+        client.install(module)
+        self.assertIs(module.get, client.get)
+        self.assertIs(module.request, client.request)
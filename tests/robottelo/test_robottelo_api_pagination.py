@@ -0,0 +1,116 @@
+"""Unit tests for module ``robottelo.api.pagination``."""
+import mock
+
+from robottelo.api import pagination
+from unittest import TestCase
+
+
+def paged_response(items, total=True):
+    """Return a fake ``client.get`` paging over ``items``.
+
+    :param list items: The whole collection.
+    :param bool total: Whether the pages tell the size of the collection.
+
+    """
+    def response(url, data, **kwargs):  # pylint:disable=unused-argument
+        """Answer with the page requested in ``data``."""
+        per_page = data.get(u'per_page', 2)
+        start = (data[u'page'] - 1) * per_page
+        body = {
+            u'page': data[u'page'],
+            u'per_page': per_page,
+            u'results': items[start:start + per_page],
+        }
+        if total:
+            body[u'subtotal'] = len(items)
+        reply = mock.Mock()
+        reply.json.return_value = body
+        return reply
+    return response
+
+
+class IterPagesTestCase(TestCase):
+    """Tests for function ``robottelo.api.pagination.iter_pages``."""
+    def test_all_pages(self):
+        """Every page is requested, until the last one."""
+        with mock.patch.object(pagination.client, 'get') as get:
+            get.side_effect = paged_response(range(5))
+            pages = list(pagination.iter_pages('/api/x', per_page=2))
+        self.assertEqual(
+            [page[u'results'] for page in pages], [[0, 1], [2, 3], [4]])
+        self.assertEqual(get.call_count, 3)
+
+    def test_total(self):
+        """No empty page is requested when the total is reached."""
+        with mock.patch.object(pagination.client, 'get') as get:
+            get.side_effect = paged_response(range(4))
+            self.assertEqual(
+                len(list(pagination.iter_pages('/api/x', per_page=2))), 2)
+        self.assertEqual(get.call_count, 2)
+
+    def test_no_total(self):
+        """Without a total, the pages are requested until a short one."""
+        with mock.patch.object(pagination.client, 'get') as get:
+            get.side_effect = paged_response(range(4), total=False)
+            self.assertEqual(
+                len(list(pagination.iter_pages('/api/x', per_page=2))), 3)
+        self.assertEqual(get.call_count, 3)
+
+    def test_server_page_size(self):
+        """Without ``per_page``, the page size of the server is used."""
+        with mock.patch.object(pagination.client, 'get') as get:
+            get.side_effect = paged_response(range(3))
+            pages = list(pagination.iter_pages('/api/x', per_page=None))
+        self.assertEqual(len(pages), 2)
+        self.assertNotIn(u'per_page', get.call_args[1]['data'])
+
+    def test_data(self):
+        """The search parameters are sent along with the page number."""
+        with mock.patch.object(pagination.client, 'get') as get:
+            get.side_effect = paged_response([])
+            list(pagination.iter_pages(
+                '/api/x', {u'search': u'name=x'}, verify=False))
+        self.assertEqual(get.call_args[1]['data'][u'search'], u'name=x')
+        self.assertEqual(get.call_args[1]['data'][u'page'], 1)
+        self.assertFalse(get.call_args[1]['verify'])
+
+    def test_raise_for_status(self):
+        """The HTTP errors are raised unless told otherwise."""
+        with mock.patch.object(pagination.client, 'get') as get:
+            get.return_value.json.return_value = {u'errors': [u'x']}
+            list(pagination.iter_pages('/api/x'))
+            self.assertTrue(get.return_value.raise_for_status.called)
+        with mock.patch.object(pagination.client, 'get') as get:
+            get.return_value.json.return_value = {u'errors': [u'x']}
+            pages = list(pagination.iter_pages(
+                '/api/x', raise_for_status=False))
+            self.assertEqual(pages, [{u'errors': [u'x']}])
+            self.assertFalse(get.return_value.raise_for_status.called)
+
+
+class IterResultsTestCase(TestCase):
+    """Tests for function ``robottelo.api.pagination.iter_results``."""
+    def test_lazy(self):
+        """Pages are only requested when the caller gets to them."""
+        with mock.patch.object(pagination.client, 'get') as get:
+            get.side_effect = paged_response(range(10))
+            for result in pagination.iter_results('/api/x', per_page=2):
+                if result == 2:
+                    break
+        self.assertEqual(get.call_count, 2)
+
+    def test_prefetch(self):
+        """Prefetching yields the same results."""
+        with mock.patch.object(pagination.client, 'get') as get:
+            get.side_effect = paged_response(range(5))
+            results = list(pagination.iter_results(
+                '/api/x', per_page=2, prefetch=True))
+        self.assertEqual(results, list(range(5)))
+        self.assertEqual(get.call_count, 3)
+
+    def test_prefetch_error(self):
+        """Errors of the prefetched pages are raised to the caller."""
+        with mock.patch.object(pagination.client, 'get') as get:
+            get.side_effect = ValueError
+            with self.assertRaises(ValueError):
+                list(pagination.iter_results('/api/x', prefetch=True))
@@ -0,0 +1,135 @@
+"""Unit tests for module ``robottelo.api.planner``."""
+import itertools
+import mock
+
+from nailgun import config
+from robottelo import entities
+from robottelo.api import planner
+from robottelo.common.graph import GraphError
+from unittest import TestCase
+
+
+class CreationPlanTestCase(TestCase):
+    """Tests for class ``robottelo.api.planner.CreationPlan``."""
+    def setUp(self):  # noqa pylint:disable=C0103
+        self.plan = planner.CreationPlan(
+            config.ServerConfig('http://example.com'))
+        self.ids = itertools.count(1)
+
+    def create(self, entity, fast=False):  # pylint:disable=unused-argument
+        """Pretend to create ``entity`` and return it with an id."""
+        entity.id = next(self.ids)
+        return entity
+
+    def test_shared_parents(self):
+        """Entities needing a parent of the same class share it."""
+        self.plan.add('product', 'Product')
+        self.plan.add('lifecycle_environment', entities.LifecycleEnvironment)
+        self.plan.add('content_view', 'ContentView')
+        self.assertEqual(
+            self.plan.levels(),
+            [
+                ['Organization'],
+                ['product', 'lifecycle_environment', 'content_view'],
+            ]
+        )
+
+    def test_transitive_parents(self):
+        """The parents of the shared parents are planned too."""
+        self.plan.add('repository', 'Repository')
+        self.plan.add('content_view', 'ContentView')
+        dependencies = self.plan.dependencies()
+        self.assertEqual(dependencies['repository'], set(['Product']))
+        self.assertEqual(dependencies['Product'], set(['Organization']))
+        self.assertEqual(dependencies['content_view'], set(['Organization']))
+
+    def test_requested_parent(self):
+        """A requested entity is the parent shared by the others."""
+        self.plan.add('org', 'Organization')
+        self.plan.add('product', 'Product')
+        self.plan.add('other', 'Product', organization='org')
+        self.assertEqual(
+            self.plan.levels(), [['org'], ['product', 'other']])
+
+    def test_given_values(self):
+        """Given entities are not planned."""
+        organization = entities.Organization(self.plan.server_config, id=1)
+        self.plan.add('product', 'Product', organization=organization)
+        self.assertEqual(self.plan.levels(), [['product']])
+
+    def test_self_contained(self):
+        """The parents of self-contained entities are not planned."""
+        self.plan.add('host', 'Host')
+        self.assertEqual(self.plan.levels(), [['host']])
+
+    def test_unknown_label(self):
+        """Referencing an unknown label is an error."""
+        self.plan.add('product', 'Product', organization='org')
+        with self.assertRaises(GraphError):
+            self.plan.dependencies()
+
+    def test_duplicate_label(self):
+        """Labels are unique."""
+        self.plan.add('product', 'Product')
+        with self.assertRaises(ValueError):
+            self.plan.add('product', 'Product')
+
+    def test_execute(self):
+        """Entities are created with the entities they reference."""
+        self.plan.add('product', 'Product')
+        self.plan.add('content_view', 'ContentView')
+        with mock.patch.object(
+                entities.EntityCreateMixin,
+                'create',
+                autospec=True) as create:
+            create.side_effect = self.create
+            created = self.plan.execute(max_workers=2)
+        self.assertEqual(create.call_count, 3)
+        self.assertEqual(create.call_args[1], {'fast': True})
+        self.assertEqual(created['Organization'].id, 1)
+        self.assertIs(
+            created['product'].organization, created['Organization'])
+        self.assertIs(
+            created['content_view'].organization, created['Organization'])
+
+    def test_execute_error(self):
+        """The entities depending on a failed one are skipped."""
+        self.plan.add('repository', 'Repository')
+        self.plan.add('content_view', 'ContentView')
+
+        def create(entity, fast):
+            """Fail to create products."""
+            if isinstance(entity, entities.Product):
+                raise ValueError
+            return self.create(entity, fast)
+
+        with mock.patch.object(
+                entities.EntityCreateMixin,
+                'create',
+                autospec=True) as create_mock:
+            create_mock.side_effect = create
+            with self.assertRaises(planner.PlanError) as context:
+                self.plan.execute()
+        outcome = context.exception.outcome
+        self.assertEqual(
+            set(outcome.results), set(['Organization', 'content_view']))
+        self.assertEqual(list(outcome.errors), ['Product'])
+        self.assertEqual(outcome.skipped, ['repository'])
+
+
+class CreateEntitiesTestCase(TestCase):
+    """Tests for function ``robottelo.api.planner.create_entities``."""
+    def test_create_entities(self):
+        """One entity per name is returned."""
+        with mock.patch.object(
+                entities.EntityCreateMixin,
+                'create',
+                autospec=True) as create:
+            create.side_effect = lambda entity, fast: entity
+            created = planner.create_entities(
+                ['Product', 'GPGKey'],
+                config.ServerConfig('http://example.com'),
+            )
+        self.assertEqual(set(created), set(['Product', 'GPGKey']))
+        self.assertIs(
+            created['Product'].organization, created['GPGKey'].organization)
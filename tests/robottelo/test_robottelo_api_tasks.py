@@ -0,0 +1,97 @@
+"""Unit tests for module ``robottelo.api.tasks``."""
+# (protected-access) pylint:disable=W0212
+import mock
+
+from nailgun import config
+from nailgun.entity_mixins import TaskFailedError, TaskTimedOutError
+from robottelo.api import tasks
+from unittest import TestCase
+
+
+def bulk_response(states):
+    """Return a fake ``bulk_search`` response for ``states``.
+
+    :param dict states: Maps task ids to a ``(state, result)`` tuple.
+
+    """
+    def response(url, data, **kwargs):  # pylint:disable=unused-argument
+        """Answer each search with the state of its task."""
+        reply = mock.Mock()
+        reply.json.return_value = [
+            {
+                u'search_params': search,
+                u'results': [{
+                    u'id': search[u'task_id'],
+                    u'state': states[search[u'task_id']][0],
+                    u'result': states[search[u'task_id']][1],
+                    u'humanized': {u'errors': []},
+                }] if search[u'task_id'] in states else [],
+            }
+            for search in data[u'searches']
+        ]
+        return reply
+    return response
+
+
+class TaskPollerTestCase(TestCase):
+    """Tests for class ``robottelo.api.tasks.TaskPoller``."""
+    def setUp(self):  # noqa
+        self.server_config = config.ServerConfig(
+            'http://example.com', auth=('admin', 'changeme'), verify=False)
+        self.poller = tasks.TaskPoller(self.server_config, poll_rate=0.01)
+
+    def test_bulk(self):
+        """Outstanding tasks are checked with one request per tick."""
+        states = {
+            u'a': (u'running', u'pending'),
+            u'b': (u'stopped', u'success'),
+        }
+        with mock.patch.object(tasks.client, 'post') as post:
+            post.side_effect = bulk_response(states)
+            future_a = self.poller.submit(u'a')
+            future_b = self.poller.submit(u'b')
+            self.assertEqual(future_b.result(5)[u'id'], u'b')
+            self.assertFalse(future_a.done())
+            states[u'a'] = (u'stopped', u'success')
+            self.assertEqual(future_a.result(5)[u'id'], u'a')
+        self.assertIn(u'bulk_search', post.call_args[0][0])
+        self.assertLess(self.poller.requests, 10)
+        self.assertEqual(self.poller.outstanding(), 0)
+
+    def test_failed(self):
+        """Unsuccessful and unknown tasks fail their future."""
+        with mock.patch.object(tasks.client, 'post') as post:
+            post.side_effect = bulk_response(
+                {u'a': (u'stopped', u'warning')})
+            future_a = self.poller.submit(u'a')
+            future_b = self.poller.submit(u'b')
+            with self.assertRaises(TaskFailedError):
+                future_a.result(5)
+            with self.assertRaises(TaskFailedError):
+                future_b.result(5)
+
+    def test_timeout(self):
+        """Tasks still running past their timeout time out."""
+        with mock.patch.object(tasks.client, 'post') as post:
+            post.side_effect = bulk_response(
+                {u'a': (u'running', u'pending')})
+            with self.assertRaises(TaskTimedOutError):
+                self.poller.submit(u'a', timeout=0).result(5)
+
+
+class PollTasksTestCase(TestCase):
+    """Tests for function ``robottelo.api.tasks.poll_tasks``."""
+    def test_poll_tasks(self):
+        """All the tasks are waited for, in order."""
+        server_config = config.ServerConfig(
+            'http://example.com', auth=('admin', 'changeme'), verify=False)
+        states = {
+            u'a': (u'stopped', u'success'),
+            u'b': (u'stopped', u'success'),
+        }
+        with mock.patch.object(tasks.client, 'post') as post:
+            post.side_effect = bulk_response(states)
+            results = tasks.poll_tasks([u'b', u'a'], server_config)
+        self.assertEqual([task[u'id'] for task in results], [u'b', u'a'])
+        self.assertIs(
+            tasks.get_poller(server_config), tasks.get_poller(server_config))
@@ -0,0 +1,117 @@
+"""Tests for module ``robottelo.common.shard``."""
+# (protected-access) pylint:disable=W0212
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+
+from mock import patch
+from robottelo.cli import factory
+from robottelo.cli.base import Base
+from robottelo.cli.org import Org
+from robottelo.common import conf, shard
+
+
+class ShardTestCase(unittest.TestCase):
+    """Tests for class ``robottelo.common.shard.Shard``."""
+    def setUp(self):  # noqa pylint:disable=C0103
+        self.shard = shard.Shard(u'robottelo-shard-1-abc')
+        self.shard._org = {u'id': u'7'}
+        self.shard._location = {u'id': u'9'}
+
+    def test_apply_defaults(self):
+        """Unset organization and location ids point to the shard."""
+        options = self.shard.apply_defaults({
+            u'name': u'foo',
+            u'organization': None,
+            u'organization-id': None,
+            u'location-ids': None,
+        })
+        self.assertEqual(options, {
+            u'name': u'foo',
+            u'organization': None,
+            u'organization-id': u'7',
+            u'location-ids': u'9',
+        })
+
+    def test_apply_defaults_given(self):
+        """Given organizations and locations are kept."""
+        options = {
+            u'organization': u'Default_Organization',
+            u'organization-id': None,
+            u'location-id': u'3',
+        }
+        self.assertEqual(
+            self.shard.apply_defaults(dict(options)), options)
+
+    def test_name_for(self):
+        """Fixed names are prefixed with the shard name."""
+        self.assertEqual(
+            self.shard.name_for(u'foo'), u'robottelo-shard-1-abc-foo')
+
+
+class CurrentTestCase(unittest.TestCase):
+    """Tests for function ``robottelo.common.shard.current`` and its use by
+    the CLI.
+
+    """
+    def setUp(self):  # noqa pylint:disable=C0103
+        self.old_properties = conf.properties.copy()
+        conf.properties['main.shard'] = '1'
+        shard._shards.clear()
+
+    def tearDown(self):  # noqa pylint:disable=C0103
+        conf.properties = self.old_properties
+        shard._shards.clear()
+
+    def test_disabled(self):
+        """There is no shard unless enabled."""
+        conf.properties['main.shard'] = '0'
+        self.assertIsNone(shard.current())
+        self.assertIsNone(shard.namespace())
+
+    def test_current(self):
+        """The same shard is returned to a process."""
+        current = shard.current()
+        self.assertIs(shard.current(), current)
+        self.assertTrue(current.name.startswith(shard.SHARD_PREFIX))
+
+    def test_factory(self):
+        """Factories requiring an organization default to the shard one."""
+        shard.current()._org = {u'id': u'7'}
+        with patch('robottelo.cli.factory.create_object') as create_object:
+            factory.make_product()
+        self.assertEqual(
+            create_object.call_args[0][2][u'organization-id'], u'7')
+
+    def test_list(self):
+        """Searches requiring an organization look in the shard one."""
+        shard.current()._org = {u'id': u'7'}
+        with patch.object(Org, 'command_requires_org', True):
+            with patch.object(Base, 'execute') as execute:
+                Org.list()
+        self.assertIn(
+            u'--organization-id="7"', execute.call_args[0][0])
+
+    def test_close_in_worker(self):
+        """The shard of a worker is deleted when the worker exits."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'closed')
+
+        def close(shard_):
+            """Record the name of the shard closed."""
+            with open(path, 'w') as closed:
+                closed.write(shard_.name)
+
+        with patch.object(shard.Shard, 'close', autospec=True) as close_mock:
+            close_mock.side_effect = close
+            process = multiprocessing.Process(target=shard.current)
+            process.start()
+            process.join()
+        self.assertEqual(process.exitcode, 0)
+        with open(path) as closed:
+            name = closed.read()
+        self.assertIn(u'-{0}-'.format(process.pid), name)
+        self.assertEqual(shard._shards, {})
@@ -1,8 +1,145 @@
 """Tests for module ``robottelo.common.ssh``."""
 # (too-many-public-methods) pylint: disable=R0904
-from robottelo.common import conf, get_app_root, ssh
+from contextlib import contextmanager
+from mock import patch
+from robottelo.common import conf, get_app_root, limiter, ssh
+from robottelo.common.sshserver import HammerStandInServer
 from unittest import TestCase
 import os
+import paramiko
+import shutil
+import subprocess
+import tempfile
+import threading
+
+
+def enable_limiter(test_case):
+    """Enable the limiters for ``test_case``, with a cap of 1."""
+    # (protected-access) pylint:disable=W0212
+    directory = tempfile.mkdtemp()
+    test_case.addCleanup(shutil.rmtree, directory)
+    patcher = patch.object(limiter, 'STATE_DIRECTORY', directory)
+    patcher.start()
+    test_case.addCleanup(patcher.stop)
+    conf.properties['main.limiter'] = '1'
+    conf.properties['main.limiter.initial'] = '1'
+    limiter._limiters.clear()
+    test_case.addCleanup(limiter._limiters.clear)
+
+
+class MockChannel(object):
+    """A mock ``paramiko.Channel`` object.
+
+    Commands in ``MockChannel.outputs`` finish with the recorded ``(stdout,
+    stderr, exit_status)``, any other command runs forever.
+
+    """
+    outputs = {
+        'echo one': ('one\n', '', 0),
+        'echo two': ('two\n', '', 0),
+        'false': ('', 'failed\n', 1),
+        'hammer': (
+            '[ INFO 2015] Rails\nId,Name\n1,\x1b[1mfoo\x1b[0m\n2,b\xc3',
+            '',
+            0,
+        ),
+    }
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.stdout = self.stderr = ''
+        self.exit_status = None
+        self.closed = False
+        self.eof_received = False
+        # A pipe readable once the output is available, like paramiko's
+        self._pipe = os.pipe()
+
+    def fileno(self):
+        """Return a file descriptor readable once the command finished."""
+        return self._pipe[0]
+
+    def settimeout(self, timeout):
+        """A no-op stub method."""
+
+    def exec_command(self, cmd):
+        """Queue the recorded output of ``cmd``."""
+        if cmd in self.outputs:
+            self.stdout, self.stderr, self.exit_status = self.outputs[cmd]
+            self.eof_received = True
+            os.write(self._pipe[1], '*')
+
+    def recv_ready(self):
+        """Return whether there is stdout data to read."""
+        return len(self.stdout) > 0
+
+    def recv_stderr_ready(self):
+        """Return whether there is stderr data to read."""
+        return len(self.stderr) > 0
+
+    def recv(self, size):
+        """Consume ``size`` bytes of stdout."""
+        data, self.stdout = self.stdout[:size], self.stdout[size:]
+        if data.endswith('\xc3'):
+            # Split a multibyte character between two reads
+            self.stdout += '\xa1\n'
+        return data
+
+    def recv_stderr(self, size):
+        """Consume ``size`` bytes of stderr."""
+        data, self.stderr = self.stderr[:size], self.stderr[size:]
+        return data
+
+    def exit_status_ready(self):
+        """Return whether the command finished."""
+        return self.exit_status is not None
+
+    def recv_exit_status(self):
+        """Return the exit status of the command."""
+        return self.exit_status
+
+    def close(self):
+        """Mark the channel as closed."""
+        if not self.closed:
+            os.close(self._pipe[0])
+            os.close(self._pipe[1])
+        self.closed = True
+        self.transport.open_channels -= 1
+
+
+class MockSocket(object):
+    """A mock ``socket.socket`` object."""
+    def setsockopt(self, *args):
+        """Do nothing."""
+
+
+class MockTransport(object):
+    """A mock ``paramiko.Transport`` object."""
+    def __init__(self):
+        """Mark the transport as active and record the keepalive interval."""
+        self.sock = MockSocket()
+        self.active = True
+        self.keepalive = None
+        self.open_channels = 0
+        self.max_open_channels = 0
+        # Whether the server dropped the connection without notice
+        self.stale = False
+
+    def open_session(self):
+        """Return a new mock channel and track the open channels."""
+        if self.stale:
+            raise paramiko.SSHException('SSH session not active')
+        self.open_channels += 1
+        self.max_open_channels = max(
+            self.max_open_channels, self.open_channels)
+        return MockChannel(self)
+
+    def is_active(self):
+        """Return whether the transport is marked as active."""
+        return self.active
+
+    def set_keepalive(self, interval):
+        """Record the keepalive ``interval``."""
+        self.keepalive = interval
 
 
 class MockSSHClient(object):
@@ -23,6 +160,7 @@ class MockSSHClient(object):
         self.hostname = None
         self.username = None
         self.key_filename = None
+        self.transport = MockTransport()
 
     def set_missing_host_key_policy(self, policy):  # pylint:disable=W0613
         """A no-op stub method."""
@@ -50,6 +188,11 @@ class MockSSHClient(object):
     def close(self):
         """A no-op stub method."""
         self.close_ += 1
+        self.transport.active = False
+
+    def get_transport(self):
+        """Return the mock transport."""
+        return self.transport
 
 
 class SSHTestCase(TestCase):
@@ -64,6 +207,7 @@ class SSHTestCase(TestCase):
         are called.
 
         """
+        backup_sshclient = ssh._call_paramiko_sshclient  # noqa pylint:disable=W0212
         ssh._call_paramiko_sshclient = MockSSHClient  # pylint:disable=W0212
         backup = conf.properties
 
@@ -85,3 +229,396 @@ class SSHTestCase(TestCase):
         self.assertEqual(connection.close_, 1)
 
         conf.properties = backup
+        ssh._call_paramiko_sshclient = backup_sshclient  # noqa pylint:disable=W0212
+
+
+class CommandResultTestCase(TestCase):
+    """Tests for function ``robottelo.common.ssh.command_result``."""
+    def test_csv(self):
+        """Quoted CSV values are parsed, escaped quotes included."""
+        result = ssh.command_result(
+            'Id,Name,Description\n1,"a, ""b""",""\n', '', 0, 'csv')
+        self.assertEqual(result.stdout, [
+            {u'id': u'1', u'name': u'a, "b"', u'description': u''}])
+        self.assertEqual(result.stdout.find(u'id', u'1')[u'name'], u'a, "b"')
+
+    def test_empty_quotes(self):
+        """Empty quotes are removed from other outputs."""
+        result = ssh.command_result('Name: ""\n', '', 0)
+        self.assertEqual(result.stdout, [u'Name: ', u''])
+
+
+class CommandPipelineTestCase(TestCase):
+    """Tests for function ``robottelo.common.ssh.command_pipeline``.
+
+    The pipeline script runs on the local shell instead of a server.
+
+    """
+    # (protected-access) pylint:disable=W0212
+    def setUp(self):  # noqa pylint:disable=C0103
+        """Run the commands locally."""
+        self.backup = ssh._command_output
+        self.scripts = []
+
+        def command_output(cmd, hostname=None, timeout=None, limited=True):
+            """Run ``cmd`` on the local shell."""
+            self.assertFalse(limited)
+            self.scripts.append(cmd)
+            process = subprocess.Popen(
+                ['sh', '-c', cmd],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
+            stdout, stderr = process.communicate()
+            return stdout, stderr, process.returncode
+        ssh._command_output = command_output
+
+    def tearDown(self):  # noqa pylint:disable=C0103
+        """Restore the backed up function."""
+        ssh._command_output = self.backup
+
+    def check_results(self, parallel):
+        """Run some commands and check their results."""
+        results = ssh.command_pipeline(
+            [
+                'printf \'Id,Name\\n1,"a ""b"""\\n\'',
+                'echo error >&2; exit 3',
+                'printf "no line break"',
+                'echo last # comment',
+            ],
+            output_formats=['csv', None, None, None],
+            parallel=parallel,
+        )
+        self.assertEqual(len(self.scripts), 1)
+        self.assertEqual(
+            [result.return_code for result in results], [0, 3, 0, 0])
+        self.assertEqual(results[0].stdout, [{u'id': u'1', u'name': u'a "b"'}])
+        self.assertEqual(results[1].stderr, 'error\n')
+        self.assertEqual(results[2].stdout, [u'no line break'])
+        self.assertEqual(results[3].stdout, [u'last', u''])
+
+    def test_sequential(self):
+        """Commands run one after the other in a single script."""
+        self.check_results(parallel=False)
+        self.assertNotIn('wait', self.scripts[0])
+
+    def test_parallel(self):
+        """Commands run in the background in a single script."""
+        self.check_results(parallel=True)
+        self.assertIn('wait', self.scripts[0])
+
+    def test_empty(self):
+        """No script is run without commands."""
+        self.assertEqual(ssh.command_pipeline([]), [])
+        self.assertEqual(self.scripts, [])
+
+    def test_latency(self):
+        """The latency of the script is the one of its slowest command."""
+        outcome = limiter._Outcome()
+
+        @contextmanager
+        def limit(name):  # pylint:disable=unused-argument
+            """Record the outcome of the script."""
+            yield outcome
+
+        with patch.object(limiter, 'limit', limit):
+            ssh.command_pipeline(['sleep 0.2', 'true', 'true'])
+        self.assertGreaterEqual(outcome.elapsed, 0.2)
+        self.assertLess(outcome.elapsed, 5)
+
+
+class SSHConnectionPoolTestCase(TestCase):
+    """Tests for class ``robottelo.common.ssh.SSHConnectionPool``."""
+    # (protected-access) pylint:disable=W0212
+    def setUp(self):  # noqa pylint:disable=C0103
+        """Mock ``paramiko.SSHClient`` and create a connection pool."""
+        self.backup = ssh._call_paramiko_sshclient
+        ssh._call_paramiko_sshclient = MockSSHClient
+        self.pool = ssh.SSHConnectionPool(
+            max_idle_time=60, max_size=1, keepalive_interval=15)
+        self.key = ('example.com', 'nobody', '/tmp/key')
+
+    def tearDown(self):  # noqa pylint:disable=C0103
+        """Restore ``ssh._call_paramiko_sshclient``."""
+        ssh._call_paramiko_sshclient = self.backup
+
+    def test_reuse(self):
+        """A released connection is handed out again."""
+        client, reused = self.pool.acquire(*self.key)
+        self.assertFalse(reused)
+        self.assertEqual(client.transport.keepalive, 15)
+        self.pool.release(client, *self.key)
+        client2, reused = self.pool.acquire(*self.key)
+        self.assertTrue(reused)
+        self.assertIs(client, client2)
+        self.assertEqual(client.connect_, 1)
+        self.assertEqual(client.close_, 0)
+
+    def test_different_keys(self):
+        """Connections are not shared between different keys."""
+        client, _ = self.pool.acquire(*self.key)
+        self.pool.release(client, *self.key)
+        client2, reused = self.pool.acquire(
+            'example.org', 'nobody', '/tmp/key')
+        self.assertFalse(reused)
+        self.assertIsNot(client, client2)
+
+    def test_max_size(self):
+        """Connections beyond ``max_size`` are closed on release."""
+        client, _ = self.pool.acquire(*self.key)
+        client2, _ = self.pool.acquire(*self.key)
+        self.pool.release(client, *self.key)
+        self.pool.release(client2, *self.key)
+        self.assertEqual(client.close_, 0)
+        self.assertEqual(client2.close_, 1)
+
+    def test_inactive_connection(self):
+        """A connection with an inactive transport is not reused."""
+        client, _ = self.pool.acquire(*self.key)
+        self.pool.release(client, *self.key)
+        client.transport.active = False
+        client2, reused = self.pool.acquire(*self.key)
+        self.assertFalse(reused)
+        self.assertIsNot(client, client2)
+        self.assertEqual(client.close_, 1)
+
+    def test_max_idle_time(self):
+        """A connection idle for too long is evicted."""
+        client, _ = self.pool.acquire(*self.key)
+        self.pool.release(client, *self.key)
+        self.pool.max_idle_time = -1
+        _, reused = self.pool.acquire(*self.key)
+        self.assertFalse(reused)
+        self.assertEqual(client.close_, 1)
+
+    def test_other_process(self):
+        """Connections created by another process are not reused."""
+        client, _ = self.pool.acquire(*self.key)
+        self.pool.release(client, *self.key)
+        self.pool._pid = -1
+        _, reused = self.pool.acquire(*self.key)
+        self.assertFalse(reused)
+        # Closing would also disconnect the parent process session
+        self.assertEqual(client.close_, 0)
+
+    def test_evict(self):
+        """``evict`` closes the idle connections of the given host."""
+        client, _ = self.pool.acquire(*self.key)
+        client2, _ = self.pool.acquire('example.org', 'nobody', '/tmp/key')
+        self.pool.release(client, *self.key)
+        self.pool.release(client2, 'example.org', 'nobody', '/tmp/key')
+        self.pool.evict('example.com')
+        self.assertEqual(client.close_, 1)
+        self.assertEqual(client2.close_, 0)
+        self.pool.evict()
+        self.assertEqual(client2.close_, 1)
+
+
+class CommandBatchTestCase(TestCase):
+    """Tests for function ``robottelo.common.ssh.command_batch``."""
+    # (protected-access) pylint:disable=W0212
+    def setUp(self):  # noqa pylint:disable=C0103
+        """Mock ``paramiko.SSHClient`` and configure the server."""
+        self.backup = ssh._call_paramiko_sshclient
+        self.backup_properties = conf.properties.copy()
+        self.clients = []
+
+        def client_factory():
+            """Record the created clients."""
+            self.clients.append(MockSSHClient())
+            return self.clients[-1]
+        ssh._call_paramiko_sshclient = client_factory
+        conf.properties['main.server.hostname'] = 'batch.example.com'
+        conf.properties['main.server.ssh.username'] = 'nobody'
+        conf.properties['main.server.ssh.key_private'] = '/tmp/key'
+
+    def tearDown(self):  # noqa pylint:disable=C0103
+        """Restore the backed up objects and close pooled connections."""
+        ssh.close_connections('batch.example.com')
+        ssh._call_paramiko_sshclient = self.backup
+        conf.properties = self.backup_properties
+
+    def test_results_in_order(self):
+        """Results are returned in the same order as the commands."""
+        results = ssh.command_batch(
+            ['echo two', 'false', 'echo one'], max_parallel=2)
+        self.assertEqual(
+            [result.return_code for result in results], [0, 1, 0])
+        self.assertEqual(results[0].stdout, [u'two', u''])
+        self.assertEqual(results[1].stderr, 'failed\n')
+        self.assertEqual(results[2].stdout, [u'one', u''])
+        self.assertEqual(len(self.clients), 1)
+        self.assertEqual(self.clients[0].transport.max_open_channels, 2)
+
+    def test_timeout(self):
+        """A command that does not finish does not affect the others."""
+        results = ssh.command_batch(['sleep 100', 'echo one'], timeout=0.1)
+        self.assertEqual(results[0].return_code, -1)
+        self.assertIn('Timed out', results[0].stderr)
+        self.assertEqual(results[1].return_code, 0)
+        self.assertEqual(self.clients[0].transport.open_channels, 0)
+
+    def test_limited(self):
+        """Each command takes a slot of the ssh limiter."""
+        enable_limiter(self)
+        results = ssh.command_batch(['echo one', 'false', 'echo two'])
+        self.assertEqual(
+            [result.return_code for result in results], [0, 1, 0])
+        stats = limiter.stats()['ssh']
+        self.assertEqual(stats['completed'], 3)
+        self.assertEqual(stats['in_flight'], 0)
+        # The first command ran alone, completing at the cap raised it
+        self.assertEqual(stats['limit'], 2)
+        self.assertEqual(self.clients[0].transport.max_open_channels, 2)
+
+    def test_stale_connection(self):
+        """A stale pooled connection is replaced by a new one."""
+        ssh.command_batch(['echo one'])
+        self.clients[0].transport.stale = True
+        results = ssh.command_batch(['echo one', 'echo two'])
+        self.assertEqual(
+            [result.return_code for result in results], [0, 0])
+        self.assertEqual(len(self.clients), 2)
+
+
+class CommandStreamTestCase(TestCase):
+    """Tests for function ``robottelo.common.ssh.command_stream``."""
+    # (protected-access) pylint:disable=W0212
+    def setUp(self):  # noqa pylint:disable=C0103
+        """Mock ``paramiko.SSHClient`` and configure the server."""
+        self.backup = ssh._call_paramiko_sshclient
+        self.backup_properties = conf.properties.copy()
+        ssh._call_paramiko_sshclient = MockSSHClient
+        conf.properties['main.server.hostname'] = 'stream.example.com'
+        conf.properties['main.server.ssh.username'] = 'nobody'
+        conf.properties['main.server.ssh.key_private'] = '/tmp/key'
+
+    def tearDown(self):  # noqa pylint:disable=C0103
+        """Restore the backed up objects and close pooled connections."""
+        ssh.close_connections('stream.example.com')
+        ssh._call_paramiko_sshclient = self.backup
+        conf.properties = self.backup_properties
+
+    def test_lines(self):
+        """Lines are decoded, colour stripped and Rails filtered."""
+        stream = ssh.command_stream('hammer')
+        self.assertEqual(
+            list(stream), [u'Id,Name', u'1,foo', u'2,b\xe1'])
+        self.assertEqual(stream.return_code, 0)
+        self.assertEqual(stream.stderr, [])
+
+    def test_error(self):
+        """stderr is available after the iteration."""
+        stream = ssh.command_stream('false')
+        self.assertEqual(list(stream), [])
+        self.assertEqual(stream.return_code, 1)
+        self.assertEqual(stream.stderr, 'failed\n')
+
+    def test_iterate_once(self):
+        """A stream can not be iterated twice."""
+        stream = ssh.command_stream('false')
+        list(stream)
+        with self.assertRaises(RuntimeError):
+            list(stream)
+
+    def test_limited(self):
+        """A stream holds a slot of the ssh limiter until its first output."""
+        enable_limiter(self)
+        lines = iter(ssh.command_stream('hammer'))
+        next(lines)
+        stats = limiter.stats()['ssh']
+        self.assertEqual(stats['in_flight'], 0)
+        self.assertEqual(stats['completed'], 1)
+        lines.close()
+        stats = limiter.stats()['ssh']
+        self.assertEqual(stats['in_flight'], 0)
+        self.assertEqual(stats['failed'], 0)
+
+    def test_stale_connection(self):
+        """A stale pooled connection is replaced by a new one."""
+        clients = []
+
+        def client_factory():
+            """Record the created clients."""
+            clients.append(MockSSHClient())
+            return clients[-1]
+        ssh._call_paramiko_sshclient = client_factory
+        list(ssh.command_stream('echo one'))
+        clients[0].transport.stale = True
+        self.assertEqual(list(ssh.command_stream('echo one')), [u'one'])
+        self.assertEqual(len(clients), 2)
+
+    def test_command_in_loop(self):
+        """Limited commands run while iterating over a stream at a cap of 1."""
+        enable_limiter(self)
+        conf.properties['main.limiter.max'] = '1'
+        outputs = []
+
+        def run():
+            """Run a command per line of the stream."""
+            for _ in ssh.command_stream('hammer'):
+                outputs.append(list(ssh.command_stream('echo one')))
+
+        thread = threading.Thread(target=run)
+        # A thread waiting forever for a slot must not block the test run
+        thread.daemon = True
+        thread.start()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(outputs, [[u'one']] * 3)
+        self.assertEqual(limiter.stats()['ssh']['limit'], 1)
+
+
+class StandInServerTestCase(TestCase):
+    """End to end tests of ``robottelo.common.ssh`` against
+    ``robottelo.common.sshserver.HammerStandInServer``.
+
+    """
+    def setUp(self):  # noqa pylint:disable=C0103
+        """Start the server and point the configuration to it."""
+        self.backup_properties = conf.properties.copy()
+        conf.properties['main.server.ssh.username'] = 'nobody'
+        conf.properties['main.server.ssh.key_private'] = os.path.join(
+            get_app_root(), 'tests', 'robottelo', 'data', 'test_dsa.key')
+        self.server = HammerStandInServer()
+        self.server.start()
+        self.server.configure()
+
+    def tearDown(self):  # noqa pylint:disable=C0103
+        """Close the connections and stop the server."""
+        ssh.close_connections()
+        self.server.stop()
+        conf.properties = self.backup_properties
+
+    def test_command(self):
+        """Commands are answered over a single reused connection."""
+        for _ in range(3):
+            result = ssh.command('hammer organization list')
+            self.assertEqual(result.return_code, 0)
+            self.assertEqual(result.stdout[0], u'Id,Name,Label,Description')
+            self.assertEqual(
+                result.stdout[100], u'100,Organization 100,Organization_100,')
+        result = ssh.command('unknown')
+        self.assertEqual(result.return_code, 127)
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(len(self.server.commands), 4)
+
+    def test_stream_stderr(self):
+        """Streams drain stderr while waiting for stdout."""
+        # More than the channel window, the server blocks until it is read
+        self.server.add_output(
+            r'^noisy$', u'first\n', u'x' * (3 * 2 ** 20), 1)
+        stream = ssh.command_stream('noisy', timeout=10)
+        self.assertEqual(list(stream), [u'first'])
+        self.assertEqual(stream.return_code, 1)
+        self.assertEqual(len(stream.stderr), 3 * 2 ** 20)
+
+    def test_batch(self):
+        """Batched commands are answered over real channels."""
+        results = ssh.command_batch(
+            ['hammer organization list'] * 3 + ['unknown'], max_parallel=2)
+        self.assertEqual(
+            [result.return_code for result in results], [0, 0, 0, 127])
+        self.assertEqual(
+            results[2].stdout[100], u'100,Organization 100,Organization_100,')
+        self.assertEqual(self.server.connections, 1)
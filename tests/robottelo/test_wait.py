@@ -0,0 +1,77 @@
+"""Tests for module ``robottelo.common.wait``."""
+# (protected-access) pylint:disable=W0212
+import unittest
+
+from mock import patch
+from robottelo.common import wait
+
+
+class DelaysTestCase(unittest.TestCase):
+    """Tests for function ``robottelo.common.wait.delays``."""
+    def test_exponential(self):
+        """Delays grow exponentially up to the maximum."""
+        schedule = wait.delays(
+            timeout=100, initial=1, maximum=4, factor=2, jitter=0)
+        self.assertEqual(
+            [next(schedule) for _ in range(4)], [1, 2, 4, 4])
+
+    def test_jitter(self):
+        """Delays are shortened by a random share of up to ``jitter``."""
+        for delay in wait.delays(timeout=100, initial=1, maximum=1):
+            self.assertGreaterEqual(delay, 0.5)
+            self.assertLessEqual(delay, 1)
+            break
+
+    def test_deadline(self):
+        """No delay is yielded past the deadline."""
+        self.assertEqual(list(wait.delays(timeout=0)), [])
+
+
+@patch('robottelo.common.wait.time.sleep')
+class WaitForTestCase(unittest.TestCase):
+    """Tests for function ``robottelo.common.wait.wait_for``."""
+    def setUp(self):  # noqa pylint:disable=C0103
+        wait._stats.clear()
+
+    def test_success(self, sleep):
+        """The function is called until its result is satisfying."""
+        results = iter([404, 404, 200])
+        result = wait.wait_for(
+            lambda: next(results), until=lambda code: code == 200, name='t')
+        self.assertEqual(result, 200)
+        self.assertEqual(sleep.call_count, 2)
+        stats = wait.stats()['t']
+        self.assertEqual(stats['calls'], 1)
+        self.assertEqual(stats['attempts'], 3)
+        self.assertEqual(stats['timeouts'], 0)
+        self.assertGreater(stats['waited'], 0)
+
+    def test_first_attempt(self, sleep):
+        """Satisfying results are returned without waiting."""
+        self.assertEqual(wait.wait_for(lambda: [1], name='t'), [1])
+        self.assertFalse(sleep.called)
+
+    def test_timeout(self, sleep):
+        """The last result is returned once the deadline passes."""
+        self.assertEqual(wait.wait_for(list, name='t', timeout=0), [])
+        self.assertEqual(wait.stats()['t']['timeouts'], 1)
+        self.assertFalse(sleep.called)
+
+    def test_retry_on(self, sleep):  # pylint:disable=unused-argument
+        """Listed exceptions are retried, the last one is raised."""
+        errors = iter([ValueError('1'), None])
+
+        def function():
+            """Raise the next error, if any."""
+            error = next(errors)
+            if error is not None:
+                raise error
+            return True
+
+        self.assertTrue(wait.wait_for(function, retry_on=(ValueError,)))
+        with self.assertRaises(ValueError):
+            wait.wait_for(
+                function=lambda: int('x'),
+                retry_on=(ValueError,),
+                timeout=0,
+            )
@@ -0,0 +1,75 @@
+"""Tests for module ``robottelo.common.worker``."""
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+
+from robottelo.common import worker
+
+
+def _record(path, line):
+    """Return a function appending ``line`` to the file ``path``."""
+    def record():
+        """Append the line."""
+        with open(path, 'a') as records:
+            records.write(line + '\n')
+    return record
+
+
+class AtExitTestCase(unittest.TestCase):
+    """Tests for function ``robottelo.common.worker.at_exit``."""
+    def setUp(self):  # noqa pylint:disable=C0103
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'records')
+
+    def tearDown(self):  # noqa pylint:disable=C0103
+        shutil.rmtree(self.directory)
+
+    def run_worker(self, target):
+        """Run ``target`` in a worker and return the lines it recorded."""
+        process = multiprocessing.Process(target=target)
+        process.start()
+        process.join()
+        self.assertEqual(process.exitcode, 0)
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path) as records:
+            return records.read().splitlines()
+
+    def test_worker(self):
+        """The functions run by priority when a worker exits, once."""
+        low = _record(self.path, 'low')
+        high = _record(self.path, 'high')
+
+        def target():
+            """Register the functions, one of them twice."""
+            worker.at_exit(low, 1)
+            worker.at_exit(high, 2)
+            worker.at_exit(high, 2)
+
+        self.assertEqual(self.run_worker(target), ['high', 'low'])
+
+    def test_other_process(self):
+        """The functions registered by the parent do not run in a worker."""
+        def target():
+            """Register a function, then run a worker of its own."""
+            worker.at_exit(_record(self.path, 'parent'), 1)
+            child = multiprocessing.Process(target=lambda: None)
+            child.start()
+            child.join()
+
+        self.assertEqual(self.run_worker(target), ['parent'])
+
+    def test_error(self):
+        """A failing function does not prevent the other ones."""
+        def fail():
+            """Fail."""
+            raise ValueError
+
+        def target():
+            """Register a failing function first."""
+            worker.at_exit(fail, 2)
+            worker.at_exit(_record(self.path, 'done'), 1)
+
+        self.assertEqual(self.run_worker(target), ['done'])